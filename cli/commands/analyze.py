@@ -2,23 +2,72 @@
 Analyze command for the CLI
 """
 
+import json
 import click
+from functools import lru_cache
 from rich.console import Console
 from rich.table import Table
 from rich.panel import Panel
-from rich.json import JSON
-import sys
-from pathlib import Path
+from rich.syntax import Syntax
+from pygments.lexers.data import JsonLexer
+from rich.text import Text
 
-# Add src to path
-sys.path.append(str(Path(__file__).parent.parent.parent / 'src'))
-
-from core.config import SchemaConfig
-from validation.schema_validator import SchemaValidator
-from utils.exceptions import ValidationError
+from src.core.config import SchemaConfig
+from src.validation.schema_validator import SchemaValidator
+from src.utils.exceptions import ValidationError
+from src.utils.helpers import write_json
 
 console = Console()
 
+# Importance of each schema type for the breakdown table
+_IMPORTANCE_MAP = {
+    'Product': 'Critical for e-commerce',
+    'Organization': 'Important for brand',
+    'BreadcrumbList': 'Good for navigation',
+    'FAQPage': 'Helpful for SEO',
+    'Review': 'Boosts trust',
+    'AggregateRating': 'Improves CTR'
+}
+
+# Common schema types and the analysis flag that records their presence
+_SCHEMA_CHECK_KEYS = (
+    ('Product', 'has_product'),
+    ('Organization', 'has_organization'),
+    ('BreadcrumbList', 'has_breadcrumb'),
+    ('FAQPage', 'has_faq'),
+    ('Review', 'has_review')
+)
+
+# Display color for each recommendation priority
+_PRIORITY_COLORS = {'High': 'red', 'Medium': 'yellow', 'Low': 'blue'}
+
+_STATUS_PRESENT = "✓ Present"
+_STATUS_MISSING = "✗ Missing"
+
+def _echo_tsv(header: tuple, rows) -> None:
+    """Write rows as tab-separated lines, used instead of Rich tables when output is piped"""
+    click.echo("\t".join(header))
+    for row in rows:
+        click.echo("\t".join(row))
+
+def _scalar(value):
+    return value
+
+# Display form of each JSON value type in the detailed schema view; other types are omitted
+_DISPLAY_HANDLERS = {
+    str: _scalar,
+    int: _scalar,
+    float: _scalar,
+    bool: _scalar,
+    list: lambda value: f"[{len(value)} items]",
+    dict: lambda value: "[object]"
+}
+
+@lru_cache(maxsize=1)
+def _get_validator() -> SchemaValidator:
+    """Return the shared validator, creating it on first use"""
+    return SchemaValidator()
+
 @click.command()
 @click.option('--shop-domain', required=True, help='Shopify shop domain')
 @click.option('--product-handle', required=True, help='Product handle to analyze')
@@ -32,7 +81,7 @@ def analyze(shop_domain, product_handle, detailed, google_check, output):
     
     with console.status("[bold green]Analyzing existing structured data..."):
         try:
-            validator = SchemaValidator()
+            validator = _get_validator()
             analysis = validator.analyze_existing_structured_data(product_url)
             
         except ValidationError as e:
@@ -43,13 +92,14 @@ def analyze(shop_domain, product_handle, detailed, google_check, output):
             raise click.Abort()
     
     # Display results
-    _display_analysis(analysis, product_url, detailed, google_check)
+    _display_analysis(analysis, product_url, detailed, google_check, validator=validator)
     
     # Save to file if requested
     if output:
         _save_analysis(analysis, output)
 
-def _display_analysis(analysis: dict, product_url: str, detailed: bool = False, google_check: bool = False):
+def _display_analysis(analysis: dict, product_url: str, detailed: bool = False, google_check: bool = False,
+                      validator: SchemaValidator = None):
     """Display comprehensive analysis results"""
     
     console.print(f"\n[bold blue]Schema Analysis Report[/bold blue]")
@@ -60,14 +110,16 @@ def _display_analysis(analysis: dict, product_url: str, detailed: bool = False,
         console.print(Panel(f"[red]{analysis['error']}[/red]", title="Error", border_style="red"))
         return
     
+    analysis_data = analysis.get('analysis', {})
+    
     # Summary statistics
     _display_summary_stats(analysis)
     
     # Schema type breakdown
-    _display_schema_breakdown(analysis)
+    _display_schema_breakdown(analysis_data)
     
     # Missing elements analysis
-    _display_missing_elements(analysis)
+    _display_missing_elements(analysis_data)
     
     # Detailed schema information
     if detailed:
@@ -75,39 +127,46 @@ def _display_analysis(analysis: dict, product_url: str, detailed: bool = False,
     
     # Google Rich Results check
     if google_check:
-        _display_google_compatibility(analysis)
+        _display_google_compatibility(analysis, validator)
     
     # Recommendations
-    _display_recommendations(analysis)
+    _display_recommendations(analysis, analysis_data)
 
 def _display_summary_stats(analysis: dict):
     """Display summary statistics"""
     
-    table = Table(title="Analysis Summary")
-    table.add_column("Metric", style="cyan")
-    table.add_column("Value", style="green")
-    table.add_column("Status", style="yellow")
-    
     # Basic stats
     schema_count = analysis.get('found_schemas', 0)
-    table.add_row("JSON-LD Schemas Found", str(schema_count), "✓" if schema_count > 0 else "⚠")
-    
     microdata_count = analysis.get('microdata_items', 0)
-    table.add_row("Microdata Items", str(microdata_count), "✓" if microdata_count > 0 else "○")
-    
     rdfa_count = analysis.get('rdfa_items', 0)
-    table.add_row("RDFa Items", str(rdfa_count), "✓" if rdfa_count > 0 else "○")
     
     # Schema types
     has_product = analysis.get('has_product_schema', False)
-    table.add_row("Product Schema", "Present" if has_product else "Missing", "✓" if has_product else "✗")
+    
+    rows = [
+        ("JSON-LD Schemas Found", str(schema_count), "✓" if schema_count > 0 else "⚠"),
+        ("Microdata Items", str(microdata_count), "✓" if microdata_count > 0 else "○"),
+        ("RDFa Items", str(rdfa_count), "✓" if rdfa_count > 0 else "○"),
+        ("Product Schema", "Present" if has_product else "Missing", "✓" if has_product else "✗"),
+    ]
+    
+    if not console.is_terminal:
+        _echo_tsv(("Metric", "Value", "Status"), rows)
+        return
+    
+    table = Table(title="Analysis Summary")
+    table.add_column("Metric", style="cyan", no_wrap=True)
+    table.add_column("Value", style="green", no_wrap=True)
+    table.add_column("Status", style="yellow", no_wrap=True, width=6)
+    
+    for row in rows:
+        table.add_row(*row)
     
     console.print(table)
 
-def _display_schema_breakdown(analysis: dict):
+def _display_schema_breakdown(analysis_data: dict):
     """Display breakdown of schema types found"""
     
-    analysis_data = analysis.get('analysis', {})
     schema_types = analysis_data.get('schema_types_found', [])
     
     if not schema_types:
@@ -116,47 +175,45 @@ def _display_schema_breakdown(analysis: dict):
     
     console.print(f"\n[bold blue]Schema Types Found:[/bold blue]")
     
+    # Check common schema types
+    rows = [
+        (
+            schema_type,
+            _STATUS_PRESENT if analysis_data.get(key, False) else _STATUS_MISSING,
+            _IMPORTANCE_MAP.get(schema_type, 'Optional')
+        )
+        for schema_type, key in _SCHEMA_CHECK_KEYS
+    ]
+    
+    if not console.is_terminal:
+        _echo_tsv(("Schema Type", "Status", "Importance"), rows)
+        return
+    
     table = Table()
-    table.add_column("Schema Type", style="cyan")
-    table.add_column("Status", style="green")
-    table.add_column("Importance", style="yellow")
-    
-    # Define importance levels
-    importance_map = {
-        'Product': 'Critical for e-commerce',
-        'Organization': 'Important for brand',
-        'BreadcrumbList': 'Good for navigation',
-        'FAQPage': 'Helpful for SEO',
-        'Review': 'Boosts trust',
-        'AggregateRating': 'Improves CTR'
-    }
+    table.add_column("Schema Type", style="cyan", no_wrap=True)
+    table.add_column("Status", style="green", no_wrap=True, width=10)
+    table.add_column("Importance", style="yellow", no_wrap=True)
     
-    # Check common schema types
-    schema_checks = {
-        'Product': analysis_data.get('has_product', False),
-        'Organization': analysis_data.get('has_organization', False),
-        'BreadcrumbList': analysis_data.get('has_breadcrumb', False),
-        'FAQPage': analysis_data.get('has_faq', False),
-        'Review': analysis_data.get('has_review', False)
-    }
-    
-    for schema_type, present in schema_checks.items():
-        status = "✓ Present" if present else "✗ Missing"
-        importance = importance_map.get(schema_type, 'Optional')
-        table.add_row(schema_type, status, importance)
+    for row in rows:
+        table.add_row(*row)
     
     console.print(table)
 
-def _display_missing_elements(analysis: dict):
+def _display_missing_elements(analysis_data: dict):
     """Display missing required elements"""
     
-    analysis_data = analysis.get('analysis', {})
     missing_fields = analysis_data.get('missing_fields', [])
     
-    if missing_fields:
-        console.print(f"\n[bold yellow]Missing Required Fields:[/bold yellow]")
+    if missing_fields and not console.is_terminal:
+        _echo_tsv(("Missing Field",), ((field,) for field in missing_fields))
+    elif missing_fields:
+        # Render all fields as one Text so Rich lays the block out once
+        text = Text("\nMissing Required Fields:", style="bold yellow")
         for field in missing_fields:
-            console.print(f"  [red]✗[/red] {field}")
+            text.append("\n  ")
+            text.append("✗", style="red")
+            text.append(f" {field}")
+        console.print(text)
     else:
         console.print(f"\n[green]✓ All required fields are present[/green]")
 
@@ -170,6 +227,9 @@ def _display_detailed_schemas(analysis: dict):
     
     console.print(f"\n[bold blue]Detailed Schema Information:[/bold blue]")
     
+    # One lexer instance for every schema instead of a by-name lookup per Syntax
+    lexer = JsonLexer() if console.is_terminal else None
+    
     for i, schema in enumerate(schemas):
         schema_type = schema.get('@type', 'Unknown')
         console.print(f"\n[blue]Schema {i+1}: {schema_type}[/blue]")
@@ -179,86 +239,134 @@ def _display_detailed_schemas(analysis: dict):
         for key, value in schema.items():
             if key.startswith('@'):
                 display_schema[key] = value
-            elif isinstance(value, (str, int, float, bool)):
-                display_schema[key] = value
-            elif isinstance(value, list):
-                display_schema[key] = f"[{len(value)} items]"
-            elif isinstance(value, dict):
-                display_schema[key] = "[object]"
+                continue
+            
+            handler = _DISPLAY_HANDLERS.get(type(value))
+            if handler:
+                display_schema[key] = handler(value)
         
-        console.print(JSON.from_data(display_schema, indent=2))
+        payload = json.dumps(display_schema, indent=2, default=str)
+        if lexer:
+            console.print(Syntax(payload, lexer, background_color="default", word_wrap=False))
+        else:
+            click.echo(payload)
 
-def _display_google_compatibility(analysis: dict):
+def _display_google_compatibility(analysis: dict, validator: SchemaValidator = None):
     """Display Google Rich Results compatibility"""
     
     console.print(f"\n[bold blue]Google Rich Results Compatibility:[/bold blue]")
     
-    validator = SchemaValidator()
     schemas = analysis.get('schemas', [])
     
     if not schemas:
         console.print("[yellow]No schemas to check[/yellow]")
         return
     
-    table = Table()
-    table.add_column("Schema", style="cyan")
-    table.add_column("Google Compatible", style="green")
-    table.add_column("Issues", style="red")
+    # The shared validator memoizes results by schema signature, so schemas that
+    # repeat across analyses are not re-checked
+    validator = validator or _get_validator()
+    google_results = validator.validate_against_google_requirements_bulk(schemas)
     
-    for schema in schemas:
+    rows = []
+    for schema, google_result in zip(schemas, google_results):
         schema_type = schema.get('@type', 'Unknown')
-        google_result = validator.validate_against_google_requirements(schema)
         
         compatible = "✓" if google_result['eligible_for_rich_results'] else "✗"
         issues = len(google_result['errors'])
         issues_text = f"{issues} errors" if issues > 0 else "None"
         
-        table.add_row(schema_type, compatible, issues_text)
+        rows.append((schema_type, compatible, issues_text))
+    
+    if not console.is_terminal:
+        _echo_tsv(("Schema", "Google Compatible", "Issues"), rows)
+        return
+    
+    table = Table()
+    table.add_column("Schema", style="cyan", no_wrap=True)
+    table.add_column("Google Compatible", style="green", no_wrap=True)
+    table.add_column("Issues", style="red", no_wrap=True)
+    
+    for row in rows:
+        table.add_row(*row)
     
     console.print(table)
 
-def _display_recommendations(analysis: dict):
+def _display_recommendations(analysis: dict, analysis_data: dict):
     """Display actionable recommendations"""
     
-    recommendations = _generate_recommendations(analysis)
+    recommendations = _generate_recommendations(analysis, analysis_data)
     
     if not recommendations:
         console.print(f"\n[green]✓ Your structured data looks good![/green]")
         return
     
-    console.print(f"\n[bold yellow]Recommendations for Improvement:[/bold yellow]")
+    if not console.is_terminal:
+        _echo_tsv(
+            ("#", "Priority", "Recommendation", "Details"),
+            (
+                (str(i), rec.get('priority', 'Medium'), rec['message'], rec.get('details', ''))
+                for i, rec in enumerate(recommendations, 1)
+            )
+        )
+        return
+    
+    text = Text("\nRecommendations for Improvement:", style="bold yellow")
     
     for i, rec in enumerate(recommendations, 1):
         priority = rec.get('priority', 'Medium')
-        color = {'High': 'red', 'Medium': 'yellow', 'Low': 'blue'}.get(priority, 'white')
+        color = _PRIORITY_COLORS.get(priority, 'white')
         
-        console.print(f"  [bold]{i}.[/bold] [{color}][{priority}][/{color}] {rec['message']}")
+        text.append("\n  ")
+        text.append(f"{i}.", style="bold")
+        text.append(" ")
+        text.append(f"[{priority}]", style=color)
+        text.append(f" {rec['message']}")
         
         if rec.get('details'):
-            console.print(f"     [dim]{rec['details']}[/dim]")
+            text.append(f"\n     {rec['details']}", style="dim")
+    
+    console.print(text)
 
-def _generate_recommendations(analysis: dict) -> list:
+def _generate_recommendations(analysis: dict, analysis_data: dict = None) -> list:
     """Generate actionable recommendations based on analysis"""
     
+    if analysis_data is None:
+        analysis_data = analysis.get('analysis', {})
+    
+    return list(_build_recommendations(
+        bool(analysis_data.get('has_product')),
+        bool(analysis_data.get('has_organization')),
+        bool(analysis_data.get('has_breadcrumb')),
+        bool(analysis_data.get('has_faq')),
+        bool(analysis_data.get('has_review')),
+        tuple(analysis_data.get('missing_fields', [])),
+        analysis.get('found_schemas', 0)
+    ))
+
+@lru_cache(maxsize=256)
+def _build_recommendations(has_product: bool, has_organization: bool, has_breadcrumb: bool,
+                           has_faq: bool, has_review: bool, missing_fields: tuple,
+                           found_schemas: int) -> tuple:
+    """Build recommendations from the analysis flags (memoized, results are shared)"""
+    
     recommendations = []
-    analysis_data = analysis.get('analysis', {})
     
     # Critical recommendations
-    if not analysis_data.get('has_product'):
+    if not has_product:
         recommendations.append({
             'priority': 'High',
             'message': 'Add Product schema markup',
             'details': 'Product schema is essential for e-commerce SEO and rich snippets'
         })
     
-    if not analysis_data.get('has_organization'):
+    if not has_organization:
         recommendations.append({
             'priority': 'Medium',
             'message': 'Add Organization schema',
             'details': 'Helps establish brand authority and enables business rich snippets'
         })
     
-    if not analysis_data.get('has_breadcrumb'):
+    if not has_breadcrumb:
         recommendations.append({
             'priority': 'Medium',
             'message': 'Add BreadcrumbList schema',
@@ -266,7 +374,6 @@ def _generate_recommendations(analysis: dict) -> list:
         })
     
     # Missing fields
-    missing_fields = analysis_data.get('missing_fields', [])
     if missing_fields:
         recommendations.append({
             'priority': 'High',
@@ -275,14 +382,14 @@ def _generate_recommendations(analysis: dict) -> list:
         })
     
     # Enhancement recommendations
-    if not analysis_data.get('has_faq'):
+    if not has_faq:
         recommendations.append({
             'priority': 'Low',
             'message': 'Consider adding FAQ schema',
             'details': 'FAQ schema can improve search visibility and user experience'
         })
     
-    if not analysis_data.get('has_review'):
+    if not has_review:
         recommendations.append({
             'priority': 'Medium',
             'message': 'Add review/rating schema',
@@ -290,22 +397,21 @@ def _generate_recommendations(analysis: dict) -> list:
         })
     
     # No structured data at all
-    if analysis.get('found_schemas', 0) == 0:
+    if found_schemas == 0:
         recommendations.append({
             'priority': 'High',
             'message': 'Implement structured data markup',
             'details': 'No structured data found. This is a major SEO opportunity.'
         })
     
-    return recommendations
+    return tuple(recommendations)
 
 def _save_analysis(analysis: dict, output_path: str):
     """Save analysis results to file"""
     
     try:
-        import json
-        with open(output_path, 'w', encoding='utf-8') as f:
-            json.dump(analysis, f, indent=2, ensure_ascii=False)
+        with open(output_path, 'wb') as f:
+            write_json(f, analysis)
         
         console.print(f"\n[green]✓ Analysis saved to {output_path}[/green]")
         
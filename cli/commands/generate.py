@@ -5,41 +5,46 @@ Generate command for CLI
 
 import os
 import json
+import tempfile
 import click
 from rich.console import Console
-from rich.progress import Progress, SpinnerColumn, TextColumn, BarColumn, TaskProgressColumn
 from rich.table import Table
 from rich.panel import Panel
-from dotenv import load_dotenv
-import sys
-from pathlib import Path
 
-# Add src to path
-sys.path.append(str(Path(__file__).parent.parent.parent / 'src'))
-
-from core.config import SchemaConfig
-from core.generator import SchemaGenerator
-from ai.enhancer import AIEnhancer
+from src.core.config import SchemaConfig
 # from integrations.reviews.detector import ReviewDetector
-from utils.exceptions import SchemaGeneratorError
+from src.utils.exceptions import SchemaGeneratorError
 
-load_dotenv()
 console = Console()
 
 @click.command()
 @click.option('--shop-domain', required=True, help='Shopify shop domain (without .myshopify.com)')
 @click.option('--access-token', help='Shopify Admin API access token')
 @click.option('--openai-key', help='OpenAI API key for AI enhancements')
-@click.option('--output', '-o', default='schemas.json', help='Output file path')
+@click.option('--output', '-o', default='schemas.json',
+              help='Output file path (.jsonl writes one product package per line)')
 @click.option('--limit', '-l', default=50, help='Maximum number of products to process')
 @click.option('--include-analysis', is_flag=True, help='Include existing schema analysis')
 @click.option('--enable-ai', is_flag=True, help='Enable AI-powered enhancements')
 @click.option('--include-reviews', is_flag=True, help='Include review data in schemas')
 @click.option('--config-file', help='Path to configuration file')
+@click.option('--processes', '-p', default=1, type=click.IntRange(min=1),
+              help='Worker processes for building schemas without AI or reviews')
 def generate(shop_domain, access_token, openai_key, output, limit, include_analysis, 
-             enable_ai, include_reviews, config_file):
+             enable_ai, include_reviews, config_file, processes):
     """Generate structured data schemas for a Shopify store"""
     
+    # Heavy dependencies are imported here so --help and argument errors stay fast
+    from rich.progress import Progress, SpinnerColumn, TextColumn, BarColumn, TaskProgressColumn
+    from src.core.generator import SchemaGenerator
+    from src.ai.enhancer import AIEnhancer
+    
+    # .env also holds settings other than credentials (e.g. OPENAI_BASE_URL), so it
+    # is always read from the working directory, where setup writes it; variables
+    # already set in the environment take precedence
+    from dotenv import find_dotenv, load_dotenv
+    load_dotenv(find_dotenv(usecwd=True))
+    
     try:
         # Load configuration
         if config_file:
@@ -68,10 +73,13 @@ def generate(shop_domain, access_token, openai_key, output, limit, include_analy
         _display_config(config)
         
         # Initialize components
-        ai_enhancer = AIEnhancer(openai_key) if config.enable_ai_features and openai_key else None
+        ai_enhancer = (
+            AIEnhancer(openai_key, small_model=config.openai_small_model)
+            if config.enable_ai_features and openai_key else None
+        )
         # review_integrator = ReviewDetector() if config.include_reviews else None
         
-        generator = SchemaGenerator(config, ai_enhancer)
+        generator = SchemaGenerator(config, ai_enhancer, processes=processes)
         
         # Generate schemas with progress tracking
         with Progress(
@@ -80,6 +88,9 @@ def generate(shop_domain, access_token, openai_key, output, limit, include_analy
             BarColumn(),
             TaskProgressColumn(),
             console=console,
+            refresh_per_second=4,
+            auto_refresh=False,
+            transient=True,
         ) as progress:
             
             main_task = progress.add_task("Generating schemas...", total=100)
@@ -89,6 +100,7 @@ def generate(shop_domain, access_token, openai_key, output, limit, include_analy
                 progress.update(main_task, description="Testing connection...")
                 shop_info = generator.client.get_shop_info()
                 progress.update(main_task, advance=10)
+                progress.refresh()
                 
                 if not shop_info.get('name'):
                     console.print("[red]Error: Unable to connect to Shopify API[/red]")
@@ -96,18 +108,33 @@ def generate(shop_domain, access_token, openai_key, output, limit, include_analy
                 
                 console.print(f"[green]✓ Connected to {shop_info['name']}[/green]")
                 
-                # Generate schemas
+                # Generate schemas, writing each product to the output file as it is built
                 progress.update(main_task, description="Generating schemas...")
-                schemas = generator.generate_complete_schema_package()
-                progress.update(main_task, advance=80)
+                progress.refresh()
                 
-                # Save results
-                progress.update(main_task, description="Saving results...")
-                with open(output, 'w') as f:
-                    json.dump(schemas, f, indent=2)
-                progress.update(main_task, advance=10)
+                def on_product(count, product_schemas):
+                    progress.update(main_task, advance=80 / max(config.max_products, 1))
+                    if count % 50 == 0:
+                        progress.refresh()
+                
+                write_package = (generator.stream_schema_package if output.endswith('.jsonl')
+                                 else generator.write_schema_package)
+                
+                # Stream into a temp file that only replaces the output once
+                # generation succeeds, so a failed run keeps the previous file
+                fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(output) or '.',
+                                                prefix=f".{os.path.basename(output)}.", suffix='.tmp')
+                try:
+                    with os.fdopen(fd, 'wb') as f:
+                        schemas = write_package(f, shop_info=shop_info, on_product=on_product)
+                        file_size = f.tell()
+                    os.replace(tmp_path, output)
+                except BaseException:
+                    os.unlink(tmp_path)
+                    raise
                 
                 progress.update(main_task, description="Complete!", completed=100)
+                progress.refresh()
                 
             except Exception as e:
                 progress.stop()
@@ -115,7 +142,7 @@ def generate(shop_domain, access_token, openai_key, output, limit, include_analy
                 raise click.Abort()
         
         # Display results
-        _display_results(schemas, output)
+        _display_results(schemas, output, file_size)
         
     except SchemaGeneratorError as e:
         console.print(f"[red]Schema Generator Error: {e}[/red]")
@@ -126,6 +153,10 @@ def generate(shop_domain, access_token, openai_key, output, limit, include_analy
 
 def _display_config(config: SchemaConfig):
     """Display current configuration"""
+    # Piped output only carries the results summary
+    if not console.is_terminal:
+        return
+    
     config_table = Table(title="Configuration")
     config_table.add_column("Setting", style="cyan")
     config_table.add_column("Value", style="green")
@@ -139,37 +170,52 @@ def _display_config(config: SchemaConfig):
     console.print(config_table)
     console.print()
 
-def _display_results(schemas: dict, output_file: str):
+def _display_results(schemas: dict, output_file: str, file_size: int):
     """Display generation results"""
     
+    if not console.is_terminal:
+        # One JSON line is easier to consume from scripts than a rendered table
+        sample_product = schemas.get('sample_product') or {}
+        click.echo(json.dumps({
+            'shop_domain': schemas.get('shop_domain'),
+            'total_products': schemas.get('total_products', 0),
+            'collections': len(schemas.get('collections', [])),
+            'output_file': output_file,
+            'generated_at': schemas.get('generated_at'),
+            'ai_enhanced': bool((schemas.get('config') or {}).get('ai_enabled')),
+            'sample_product': sample_product.get('title'),
+            'file_size': file_size,
+        }, default=str))
+        return
+    
     console.print("\n[bold green]✓ Schema generation complete![/bold green]")
     
+    rows = [
+        ("Shop Domain", schemas.get('shop_domain', 'Unknown')),
+        ("Total Products", str(schemas.get('total_products', 0))),
+        ("Products Processed", str(schemas.get('total_products', 0))),
+        ("Collections", str(len(schemas.get('collections', [])))),
+        ("Output File", output_file),
+        ("Generated At", schemas.get('generated_at', 'Unknown')),
+    ]
+    
+    if config_info := schemas.get('config'):
+        rows.append(("AI Enhanced", "✓" if config_info.get('ai_enabled') else "✗"))
+    
     # Create results table
     table = Table(title="Generation Summary")
-    table.add_column("Metric", style="cyan")
+    table.add_column("Metric", style="cyan", no_wrap=True)
     table.add_column("Value", style="green")
     
-    table.add_row("Shop Domain", schemas.get('shop_domain', 'Unknown'))
-    table.add_row("Total Products", str(schemas.get('total_products', 0)))
-    table.add_row("Products Processed", str(len(schemas.get('products', []))))
-    table.add_row("Collections", str(len(schemas.get('collections', []))))
-    table.add_row("Output File", output_file)
-    table.add_row("Generated At", schemas.get('generated_at', 'Unknown'))
-    
-    if config_info := schemas.get('config'):
-        table.add_row("AI Enhanced", "✓" if config_info.get('ai_enabled') else "✗")
+    for row in rows:
+        table.add_row(*row)
     
     console.print(table)
     
     # Show sample schema info
-    if schemas.get('products'):
-        sample_product = schemas['products'][0]
+    if sample_product := schemas.get('sample_product'):
         console.print(f"\n[bold blue]Sample Product:[/bold blue] {sample_product.get('title', 'Unknown')}")
         console.print(f"[blue]Schemas generated:[/blue] {', '.join(sample_product.get('schemas', {}).keys())}")
     
     # Show file size
-    try:
-        file_size = os.path.getsize(output_file)
-        console.print(f"[blue]File size:[/blue] {file_size:,} bytes")
-    except:
-        pass
\ No newline at end of file
+    console.print(f"[blue]File size:[/blue] {file_size:,} bytes")
\ No newline at end of file
@@ -4,30 +4,119 @@ Setup command for CLI - interactive configuration and credential management
 """
 
 import os
+import re
+import stat
+import tempfile
+import importlib.util
 import click
 from rich.console import Console
 from rich.prompt import Prompt, Confirm, IntPrompt
 from rich.panel import Panel
-from rich.table import Table
 from rich.text import Text
-from rich.progress import Progress, SpinnerColumn, TextColumn
-from dotenv import set_key, load_dotenv
+from dotenv import load_dotenv, dotenv_values
 from pathlib import Path
 import sys
-import yaml
-import json
-import requests
-from typing import Dict, Optional
+from dataclasses import asdict
+from functools import lru_cache
+from concurrent.futures import Future, ThreadPoolExecutor, as_completed
+from typing import Dict, List, Optional, Tuple
 
-# Add src to path
-sys.path.append(str(Path(__file__).parent.parent.parent / 'src'))
-
-from core.config import SchemaConfig
-from core.shopify_client import ShopifyClient
-from utils.exceptions import ConfigurationError
+from src.core.config import SchemaConfig
+from src.utils.exceptions import ConfigurationError
 
 console = Console()
 
+# Required packages checked by the doctor command, as (package name, import name)
+_REQUIRED_PACKAGES = (
+    ("requests", "requests"),
+    ("PyYAML", "yaml"),
+    ("python-dotenv", "dotenv"),
+)
+
+# Shop name from input like "my-store", "my-store.myshopify.com" or "https://my-store.myshopify.com/"
+_SHOP_DOMAIN_RE = re.compile(r'^(?:https?://)?([a-z0-9-]+)(?:\.myshopify\.com)?/?$')
+
+_WELCOME_TEXT = (
+    "[bold blue]🚀 Shopify Schema Generator Setup[/bold blue]\n"
+    "This wizard will help you configure the tool with your credentials and preferences."
+)
+
+_SHOPIFY_INSTRUCTIONS = """
+[bold blue]📋 How to get Shopify Admin API credentials:[/bold blue]
+
+1️⃣  Go to your Shopify admin dashboard
+2️⃣  Navigate to: [cyan]Settings → Apps and sales channels[/cyan]
+3️⃣  Click: [cyan]Develop apps[/cyan] (enable custom app development if needed)
+4️⃣  Click: [cyan]Create an app[/cyan]
+5️⃣  Configure Admin API access with these scopes:
+    • [green]read_products[/green] (required)
+    • [green]read_collections[/green] (recommended)
+    • [green]read_shop[/green] (required)
+6️⃣  Install the app and copy the access token
+
+[yellow]💡 Tip: Development stores from Shopify Partners are free and perfect for testing![/yellow]
+    """
+
+_NEXT_STEPS_TEMPLATE = """
+[bold cyan]🚀 Ready to generate schemas! Try these commands:[/bold cyan]
+
+[bold]Basic Usage:[/bold]
+  [green]python -m cli.main generate --shop-domain {shop_domain} --limit 10[/green]
+  [dim]Generate schemas for 10 products[/dim]
+
+[bold]With AI Enhancement:[/bold]
+  [green]python -m cli.main generate --shop-domain {shop_domain} --enable-ai[/green]
+  [dim]Use AI to enhance descriptions and generate FAQs[/dim]
+
+[bold]Analyze Existing Schemas:[/bold]
+  [green]python -m cli.main analyze --shop-domain {shop_domain} --product-handle HANDLE[/green]
+  [dim]Analyze current structured data on your store[/dim]
+
+[bold]Validate Generated Schemas:[/bold]
+  [green]python -m cli.main validate schemas.json --detailed --google-check[/green]
+  [dim]Validate schemas for compliance and Google compatibility[/dim]
+
+[bold]Web Interface:[/bold]
+  [green]python web/app.py[/green]
+  [dim]Start the web interface at http://localhost:5000[/dim]
+    """
+
+_TIPS_TEXT = """
+[bold yellow]💡 Pro Tips:[/bold yellow]
+
+• Use [cyan]--limit[/cyan] to test with fewer products first
+• Enable [cyan]--detailed[/cyan] validation to catch all issues  
+• Set up webhooks for real-time schema updates
+• Monitor Google Search Console for rich snippet performance
+• Consider running during off-peak hours for large stores
+    """
+
+def _interactive() -> bool:
+    """Whether a person can answer prompts, rather than piped input or none at all"""
+    return sys.stdin is not None and sys.stdin.isatty()
+
+def _confirm(prompt: str, default: bool = False) -> bool:
+    """Ask a yes/no question, taking the default once input is exhausted
+    
+    Like the other prompts, piped answers are read in order, so confirmations
+    stay in step with the questions around them.
+    """
+    if sys.stdin is None:
+        return default
+    try:
+        return Confirm.ask(prompt, default=default)
+    except EOFError:
+        console.print(f"[dim]({'yes' if default else 'no'}, no more input)[/dim]")
+        return default
+
+@lru_cache(maxsize=None)
+def _static_panel(markup: str, title: str, border_style: str, fit: bool = False) -> Panel:
+    """Build a panel for fixed markup, parsing the markup only once per process"""
+    body = Text.from_markup(markup)
+    if fit:
+        return Panel.fit(body, title=title, border_style=border_style)
+    return Panel(body, title=title, border_style=border_style)
+
 @click.command()
 @click.option('--interactive/--non-interactive', default=True, help='Run in interactive mode')
 @click.option('--config-file', help='Save configuration to specific YAML file')
@@ -37,12 +126,7 @@ console = Console()
 def setup(interactive, config_file, env_file, verify_credentials, advanced):
     """Setup configuration and credentials for the schema generator"""
     
-    console.print(Panel.fit(
-        "[bold blue]🚀 Shopify Schema Generator Setup[/bold blue]\n"
-        "This wizard will help you configure the tool with your credentials and preferences.",
-        title="✨ Welcome",
-        border_style="blue"
-    ))
+    console.print(_static_panel(_WELCOME_TEXT, "✨ Welcome", "blue", fit=True))
     
     if interactive:
         config = run_interactive_setup(verify_credentials, advanced)
@@ -64,13 +148,16 @@ def run_interactive_setup(verify_credentials: bool = True, advanced: bool = Fals
     # Step 1: Shopify Configuration
     console.print(f"\n[bold cyan]📊 Step 1: Shopify Store Configuration[/bold cyan]")
     
-    config_data.update(setup_shopify_credentials(verify_credentials))
+    config_data.update(setup_shopify_credentials())
     
     # Step 2: AI Features
     console.print(f"\n[bold cyan]🤖 Step 2: AI Features (Optional)[/bold cyan]")
     
     config_data.update(setup_ai_features())
     
+    # Shopify and OpenAI are independent services, so both credentials are tested together
+    config_data.update(verify_connections(config_data, verify_credentials))
+    
     # Step 3: Generation Settings
     console.print(f"\n[bold cyan]⚙️ Step 3: Generation Settings[/bold cyan]")
     
@@ -89,26 +176,32 @@ def run_interactive_setup(verify_credentials: bool = True, advanced: bool = Fals
         console.print(f"[red]❌ Error creating configuration: {e}[/red]")
         return None
 
-def setup_shopify_credentials(verify_credentials: bool = True) -> Dict:
+def setup_shopify_credentials(show_instructions: bool = True) -> Dict:
     """Setup Shopify API credentials"""
     
-    console.print("🏪 Let's connect to your Shopify store!")
-    console.print("[dim]You'll need Admin API credentials from your Shopify store.[/dim]\n")
-    
-    # Show instructions for getting credentials
-    show_shopify_instructions()
+    if show_instructions:
+        console.print("🏪 Let's connect to your Shopify store!")
+        console.print("[dim]You'll need Admin API credentials from your Shopify store.[/dim]\n")
+        
+        # Show instructions for getting credentials
+        show_shopify_instructions()
     
     while True:
-        shop_domain = Prompt.ask(
+        raw_domain = Prompt.ask(
             "\n[bold]Enter your shop domain[/bold]",
             default="",
             show_default=False
-        ).replace('.myshopify.com', '').strip()
+        ).strip()
         
-        if not shop_domain:
+        if not raw_domain:
             console.print("[red]❌ Shop domain is required[/red]")
             continue
         
+        shop_domain = normalize_shop_domain(raw_domain)
+        if not shop_domain:
+            console.print("[red]❌ Enter the shop name, e.g. my-store or my-store.myshopify.com[/red]")
+            continue
+        
         access_token = Prompt.ask(
             "[bold]Enter your Admin API access token[/bold]",
             password=True
@@ -118,21 +211,18 @@ def setup_shopify_credentials(verify_credentials: bool = True) -> Dict:
             console.print("[red]❌ Access token is required[/red]")
             continue
         
-        # Test credentials if requested
-        if verify_credentials:
-            if test_shopify_connection(shop_domain, access_token):
-                break
-            else:
-                if not Confirm.ask("\n[yellow]Connection failed. Continue anyway?[/yellow]"):
-                    continue
-        else:
-            break
+        break
     
     return {
         'shop_domain': shop_domain,
         'access_token': access_token
     }
 
+def normalize_shop_domain(raw_domain: str) -> str:
+    """Reduce a pasted shop name, domain or URL to the bare shop name, or '' if it isn't one"""
+    match = _SHOP_DOMAIN_RE.match(raw_domain.strip().lower())
+    return match.group(1) if match else ''
+
 def setup_ai_features() -> Dict:
     """Setup AI enhancement features"""
     
@@ -143,7 +233,7 @@ def setup_ai_features() -> Dict:
     console.print("   • Keyword extraction")
     console.print("   • Content optimization")
     
-    enable_ai = Confirm.ask("\n[bold]Enable AI-powered enhancements?[/bold]", default=False)
+    enable_ai = _confirm("\n[bold]Enable AI-powered enhancements?[/bold]", default=False)
     
     config = {'enable_ai_features': enable_ai}
     
@@ -159,13 +249,6 @@ def setup_ai_features() -> Dict:
         ).strip()
         
         config['openai_api_key'] = openai_key
-        
-        if openai_key:
-            # Test OpenAI connection
-            if test_openai_connection(openai_key):
-                console.print("[green]✅ OpenAI connection successful![/green]")
-            else:
-                console.print("[yellow]⚠️  OpenAI connection failed, but continuing...[/yellow]")
     else:
         config['openai_api_key'] = None
     
@@ -183,12 +266,12 @@ def setup_generation_settings(advanced: bool = False) -> Dict:
         show_default=True
     )
     
-    include_collections = Confirm.ask(
+    include_collections = _confirm(
         "[bold]Include collection schemas?[/bold]",
         default=True
     )
     
-    include_faq = Confirm.ask(
+    include_faq = _confirm(
         "[bold]Generate FAQ schemas?[/bold]", 
         default=True
     )
@@ -203,17 +286,17 @@ def setup_generation_settings(advanced: bool = False) -> Dict:
     if advanced:
         console.print("\n[bold blue]🔧 Advanced Settings:[/bold blue]")
         
-        include_variants = Confirm.ask(
+        include_variants = _confirm(
             "[bold]Include product variants in schemas?[/bold]",
             default=True
         )
         
-        include_reviews = Confirm.ask(
+        include_reviews = _confirm(
             "[bold]Attempt to include review data?[/bold]",
             default=False
         )
         
-        validate_schemas = Confirm.ask(
+        validate_schemas = _confirm(
             "[bold]Validate schemas after generation?[/bold]",
             default=True
         )
@@ -252,7 +335,7 @@ def setup_output_preferences(advanced: bool = False) -> Dict:
     }
     
     if advanced:
-        include_analysis = Confirm.ask(
+        include_analysis = _confirm(
             "[bold]Include schema analysis by default?[/bold]",
             default=False
         )
@@ -261,83 +344,145 @@ def setup_output_preferences(advanced: bool = False) -> Dict:
     
     return config
 
-def test_shopify_connection(shop_domain: str, access_token: str) -> bool:
-    """Test connection to Shopify API"""
+def verify_connections(config_data: Dict, verify_shopify: bool = True) -> Dict:
+    """Test the Shopify and OpenAI credentials concurrently, re-prompting for Shopify on failure"""
     
-    with console.status("[bold green]Testing Shopify connection..."):
-        try:
-            # Create temporary config and client
-            temp_config = SchemaConfig(
-                shop_domain=shop_domain,
-                access_token=access_token
-            )
+    shop_domain = config_data['shop_domain']
+    access_token = config_data['access_token']
+    openai_key = config_data.get('openai_api_key')
+    
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        while verify_shopify or openai_key:
+            checks = {}
+            if verify_shopify:
+                checks['Shopify'] = executor.submit(test_shopify_connection, shop_domain, access_token)
+            if openai_key:
+                checks['OpenAI'] = executor.submit(test_openai_connection, openai_key)
+            
+            results = wait_for_connection_checks(checks)
+            
+            # The OpenAI key is only tested once; a failure there never blocks setup
+            if openai_key:
+                if results['OpenAI']:
+                    console.print("[green]✅ OpenAI connection successful![/green]")
+                else:
+                    console.print("[yellow]⚠️  OpenAI connection failed, but continuing...[/yellow]")
+                openai_key = None
             
-            client = ShopifyClient(temp_config)
-            shop_info = client.get_shop_info()
+            if not verify_shopify or results['Shopify']:
+                break
+            if _confirm("\n[yellow]Connection failed. Continue anyway?[/yellow]"):
+                break
             
-            if shop_info and shop_info.get('name'):
-                console.print(f"[green]✅ Connected to: {shop_info['name']}[/green]")
-                console.print(f"[dim]   Domain: {shop_info.get('domain', 'N/A')}[/dim]")
-                console.print(f"[dim]   Currency: {shop_info.get('currency', 'N/A')}[/dim]")
-                console.print(f"[dim]   Country: {shop_info.get('country', 'N/A')}[/dim]")
-                return True
-            else:
-                console.print("[red]❌ Connection failed: No shop data received[/red]")
-                return False
-                
-        except Exception as e:
-            console.print(f"[red]❌ Connection failed: {e}[/red]")
+            # Asking for new credentials again would only loop on piped input
+            if not _interactive():
+                raise click.ClickException(
+                    "Could not connect to Shopify with the given credentials; "
+                    "check them or run setup in a terminal"
+                )
+            
+            credentials = setup_shopify_credentials(show_instructions=False)
+            shop_domain = credentials['shop_domain']
+            access_token = credentials['access_token']
+    
+    return {
+        'shop_domain': shop_domain,
+        'access_token': access_token
+    }
+
+def wait_for_connection_checks(checks: Dict[str, Future]) -> Dict[str, bool]:
+    """Show one progress line per running connection check and return their results"""
+    
+    from rich.progress import Progress, SpinnerColumn, TextColumn
+    
+    with Progress(
+        SpinnerColumn(),
+        TextColumn("[progress.description]{task.description}"),
+        console=console,
+        transient=True
+    ) as progress:
+        tasks = {
+            future: progress.add_task(f"Testing {name} connection...", total=1)
+            for name, future in checks.items()
+        }
+        
+        for future in as_completed(tasks):
+            progress.update(tasks[future], completed=1)
+    
+    return {name: future.result() for name, future in checks.items()}
+
+@lru_cache(maxsize=1)
+def _shared_session() -> 'requests.Session':
+    """One pooled HTTP session for every Shopify client created during setup"""
+    import requests
+    from requests.adapters import HTTPAdapter
+    
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=4, pool_maxsize=8)
+    session.mount('https://', adapter)
+    session.mount('http://', adapter)
+    return session
+
+@lru_cache(maxsize=8)
+def _get_client(shop_domain: str, access_token: str) -> 'ShopifyClient':
+    """Return a client per credential pair; all of them share one connection pool"""
+    from src.core.shopify_client import ShopifyClient
+    
+    return ShopifyClient(SchemaConfig(
+        shop_domain=shop_domain,
+        access_token=access_token
+    ), session=_shared_session())
+
+def test_shopify_connection(shop_domain: str, access_token: str) -> bool:
+    """Test connection to Shopify API"""
+    
+    try:
+        shop_info = _get_client(shop_domain, access_token).get_shop_info()
+        
+        if shop_info and shop_info.get('name'):
+            console.print(f"[green]✅ Connected to: {shop_info['name']}[/green]")
+            console.print(f"[dim]   Domain: {shop_info.get('domain', 'N/A')}[/dim]")
+            console.print(f"[dim]   Currency: {shop_info.get('currency', 'N/A')}[/dim]")
+            console.print(f"[dim]   Country: {shop_info.get('country', 'N/A')}[/dim]")
+            return True
+        else:
+            console.print("[red]❌ Connection failed: No shop data received[/red]")
             return False
+            
+    except Exception as e:
+        console.print(f"[red]❌ Connection failed: {e}[/red]")
+        return False
 
 def test_openai_connection(api_key: str) -> bool:
     """Test connection to OpenAI API"""
     
-    with console.status("[bold green]Testing OpenAI connection..."):
-        try:
-            from openai import OpenAI
-            
-            client = OpenAI(api_key=api_key)
-            
-            # Simple test request
-            response = client.chat.completions.create(
-                model="gpt-3.5-turbo",
-                messages=[{"role": "user", "content": "Hello"}],
-                max_tokens=5
-            )
-            
-            if response.choices and len(response.choices) > 0:
-                return True
-            else:
-                return False
-                
-        except Exception as e:
-            console.print(f"[red]❌ OpenAI connection failed: {e}[/red]")
+    try:
+        from openai import OpenAI
+        
+        client = OpenAI(api_key=api_key)
+        
+        # Listing models only checks the key, so it is fast and not billed
+        models = client.models.list()
+        
+        if models.data and len(models.data) > 0:
+            return True
+        else:
             return False
+            
+    except Exception as e:
+        console.print(f"[red]❌ OpenAI connection failed: {e}[/red]")
+        return False
 
 def show_shopify_instructions():
     """Show instructions for getting Shopify credentials"""
     
-    instructions = """
-[bold blue]📋 How to get Shopify Admin API credentials:[/bold blue]
-
-1️⃣  Go to your Shopify admin dashboard
-2️⃣  Navigate to: [cyan]Settings → Apps and sales channels[/cyan]
-3️⃣  Click: [cyan]Develop apps[/cyan] (enable custom app development if needed)
-4️⃣  Click: [cyan]Create an app[/cyan]
-5️⃣  Configure Admin API access with these scopes:
-    • [green]read_products[/green] (required)
-    • [green]read_collections[/green] (recommended)
-    • [green]read_shop[/green] (required)
-6️⃣  Install the app and copy the access token
-
-[yellow]💡 Tip: Development stores from Shopify Partners are free and perfect for testing![/yellow]
-    """
-    
-    console.print(Panel(instructions, title="🔑 Getting API Credentials", border_style="cyan"))
+    console.print(_static_panel(_SHOPIFY_INSTRUCTIONS, "🔑 Getting API Credentials", "cyan"))
 
 def save_configuration(config: SchemaConfig, config_file: Optional[str], env_file: str):
     """Save configuration to files"""
     
+    from rich.table import Table
+    
     console.print(f"\n[bold cyan]💾 Step 5: Save Configuration[/bold cyan]")
     
     save_methods = []
@@ -346,30 +491,21 @@ def save_configuration(config: SchemaConfig, config_file: Optional[str], env_fil
     save_methods.append("env")
     
     # Ask about YAML config file
-    if config_file or Confirm.ask("[bold]Save configuration to YAML file?[/bold]", default=True):
+    if config_file or _confirm("[bold]Save configuration to YAML file?[/bold]", default=True):
         save_methods.append("yaml")
         if not config_file:
             config_file = "config.yml"
     
-    with Progress(
-        SpinnerColumn(),
-        TextColumn("[progress.description]{task.description}"),
-        console=console,
-    ) as progress:
-        
-        task = progress.add_task("Saving configuration...", total=len(save_methods))
-        
-        # Save to .env file
-        if "env" in save_methods:
-            progress.update(task, description="Saving environment variables...")
-            save_env_config(config, env_file)
-            progress.advance(task)
-        
-        # Save to YAML file
-        if "yaml" in save_methods:
-            progress.update(task, description="Saving YAML configuration...")
-            save_yaml_config(config, config_file)
-            progress.advance(task)
+    # At most two quick local writes, so plain status lines instead of a live progress display
+    # Save to .env file
+    if "env" in save_methods:
+        console.print("[dim]Saving environment variables...[/dim]")
+        save_env_config(config, env_file)
+    
+    # Save to YAML file
+    if "yaml" in save_methods:
+        console.print("[dim]Saving YAML configuration...[/dim]")
+        save_yaml_config(config, config_file)
     
     # Display saved files
     console.print(f"\n[bold green]✅ Configuration saved successfully![/bold green]")
@@ -398,102 +534,113 @@ def save_configuration(config: SchemaConfig, config_file: Optional[str], env_fil
 def save_env_config(config: SchemaConfig, env_file: str):
     """Save configuration to .env file"""
     
-    # Load existing .env if it exists
-    if os.path.exists(env_file):
-        load_dotenv(env_file)
-    
     # Set configuration values
-    set_key(env_file, "SHOPIFY_SHOP_DOMAIN", config.shop_domain)
-    set_key(env_file, "SHOPIFY_ACCESS_TOKEN", config.access_token)
+    values = {
+        "SHOPIFY_SHOP_DOMAIN": config.shop_domain,
+        "SHOPIFY_ACCESS_TOKEN": config.access_token,
+    }
     
     if config.openai_api_key:
-        set_key(env_file, "OPENAI_API_KEY", config.openai_api_key)
+        values["OPENAI_API_KEY"] = config.openai_api_key
     
-    set_key(env_file, "ENABLE_AI_FEATURES", str(config.enable_ai_features).lower())
-    set_key(env_file, "MAX_PRODUCTS", str(config.max_products))
-    set_key(env_file, "INCLUDE_COLLECTIONS", str(config.include_collections).lower())
-    set_key(env_file, "INCLUDE_FAQ", str(config.include_faq).lower())
-    set_key(env_file, "OUTPUT_FORMAT", config.output_format)
+    values.update({
+        "ENABLE_AI_FEATURES": str(config.enable_ai_features).lower(),
+        "MAX_PRODUCTS": str(config.max_products),
+        "INCLUDE_COLLECTIONS": str(config.include_collections).lower(),
+        "INCLUDE_FAQ": str(config.include_faq).lower(),
+        "OUTPUT_FORMAT": config.output_format,
+    })
+    
+    write_env_values(env_file, values)
+
+def write_env_values(env_file: str, values: Dict[str, str]):
+    """Update or append keys in an env file with a single atomic write
+    
+    Existing keys are rewritten in place and every other line, including
+    comments, is kept as is. Values are quoted the same way as dotenv's set_key.
+    """
+    
+    lines = []
+    if os.path.exists(env_file):
+        with open(env_file, 'r') as f:
+            lines = f.read().splitlines()
+    
+    pending = dict(values)
+    for i, line in enumerate(lines):
+        stripped = line.strip()
+        if not stripped or stripped.startswith('#') or '=' not in stripped:
+            continue
+        
+        key = stripped.split('=', 1)[0].strip()
+        if key.startswith('export '):
+            key = key[len('export '):].strip()
+        
+        if key in pending:
+            lines[i] = _format_env_line(key, pending.pop(key))
+    
+    lines.extend(_format_env_line(key, value) for key, value in pending.items())
+    
+    # Write next to the target so the final rename stays on one filesystem. The
+    # file holds credentials, so keep its mode (owner-only for a new file)
+    env_path = Path(env_file)
+    try:
+        mode = stat.S_IMODE(os.stat(env_path).st_mode)
+    except FileNotFoundError:
+        mode = 0o600
+    
+    tmp_file = tempfile.NamedTemporaryFile('w', dir=env_path.parent, prefix=f".{env_path.name}.",
+                                           suffix='.tmp', delete=False)
+    tmp_path = tmp_file.name
+    try:
+        with tmp_file as f:
+            os.chmod(tmp_path, mode)
+            f.write('\n'.join(lines) + '\n')
+        os.replace(tmp_path, env_path)
+    finally:
+        if os.path.exists(tmp_path):
+            os.unlink(tmp_path)
+
+def _format_env_line(key: str, value: str) -> str:
+    escaped = value.replace("'", "\\'")
+    return f"{key}='{escaped}'"
 
 def save_yaml_config(config: SchemaConfig, config_file: str):
     """Save configuration to YAML file"""
     
-    config_dict = {
-        'shop_domain': config.shop_domain,
-        'access_token': config.access_token,
-        'api_version': config.api_version,
-        'openai_api_key': config.openai_api_key,
-        'enable_ai_features': config.enable_ai_features,
-        'max_products': config.max_products,
-        'include_collections': config.include_collections,
-        'include_faq': config.include_faq,
-        'include_variants': config.include_variants,
-        'include_reviews': config.include_reviews,
-        'output_format': config.output_format,
-        'validate_schemas': config.validate_schemas,
-        'include_analysis': config.include_analysis
-    }
+    import yaml
+    
+    # libyaml's C emitter when PyYAML was built with it
+    dumper = getattr(yaml, 'CSafeDumper', yaml.SafeDumper)
     
-    # Remove None values
-    config_dict = {k: v for k, v in config_dict.items() if v is not None}
+    # Every SchemaConfig field except unset (None) values
+    config_dict = {k: v for k, v in asdict(config).items() if v is not None}
     
     with open(config_file, 'w') as f:
-        yaml.dump(config_dict, f, default_flow_style=False, sort_keys=False)
+        yaml.dump(config_dict, f, Dumper=dumper, default_flow_style=False, sort_keys=False)
 
 def display_next_steps(config: SchemaConfig):
     """Display next steps after setup"""
     
     console.print(f"\n[bold green]🎉 Setup Complete![/bold green]")
     
-    next_steps = f"""
-[bold cyan]🚀 Ready to generate schemas! Try these commands:[/bold cyan]
-
-[bold]Basic Usage:[/bold]
-  [green]python -m cli.main generate --shop-domain {config.shop_domain} --limit 10[/green]
-  [dim]Generate schemas for 10 products[/dim]
-
-[bold]With AI Enhancement:[/bold]
-  [green]python -m cli.main generate --shop-domain {config.shop_domain} --enable-ai[/green]
-  [dim]Use AI to enhance descriptions and generate FAQs[/dim]
-
-[bold]Analyze Existing Schemas:[/bold]
-  [green]python -m cli.main analyze --shop-domain {config.shop_domain} --product-handle HANDLE[/green]
-  [dim]Analyze current structured data on your store[/dim]
-
-[bold]Validate Generated Schemas:[/bold]
-  [green]python -m cli.main validate schemas.json --detailed --google-check[/green]
-  [dim]Validate schemas for compliance and Google compatibility[/dim]
-
-[bold]Web Interface:[/bold]
-  [green]python web/app.py[/green]
-  [dim]Start the web interface at http://localhost:5000[/dim]
-    """
+    next_steps = _NEXT_STEPS_TEMPLATE.format_map({'shop_domain': config.shop_domain})
     
     console.print(Panel(next_steps, title="🎯 Next Steps", border_style="green"))
     
     # Show additional tips
-    tips = """
-[bold yellow]💡 Pro Tips:[/bold yellow]
-
-• Use [cyan]--limit[/cyan] to test with fewer products first
-• Enable [cyan]--detailed[/cyan] validation to catch all issues  
-• Set up webhooks for real-time schema updates
-• Monitor Google Search Console for rich snippet performance
-• Consider running during off-peak hours for large stores
-    """
-    
-    console.print(Panel(tips, title="💡 Tips & Best Practices", border_style="yellow"))
+    console.print(_static_panel(_TIPS_TEXT, "💡 Tips & Best Practices", "yellow"))
 
 def run_automated_setup() -> Optional[SchemaConfig]:
     """Run automated setup using environment variables"""
     
     console.print("[bold blue]🤖 Running automated setup...[/bold blue]")
     
-    # Load from environment
-    load_dotenv()
+    # Read .env once without touching os.environ; variables already set take precedence
+    env = {key: value for key, value in dotenv_values().items() if value is not None}
+    env.update(os.environ)
     
     required_vars = ['SHOPIFY_SHOP_DOMAIN', 'SHOPIFY_ACCESS_TOKEN']
-    missing_vars = [var for var in required_vars if not os.getenv(var)]
+    missing_vars = [var for var in required_vars if not env.get(var)]
     
     if missing_vars:
         console.print(f"[red]❌ Missing required environment variables: {', '.join(missing_vars)}[/red]")
@@ -501,7 +648,7 @@ def run_automated_setup() -> Optional[SchemaConfig]:
         return None
     
     try:
-        config = SchemaConfig.from_env()
+        config = SchemaConfig.from_mapping(env)
         console.print("[green]✅ Configuration loaded from environment[/green]")
         return config
     except Exception as e:
@@ -510,46 +657,46 @@ def run_automated_setup() -> Optional[SchemaConfig]:
 
 # Additional utility functions
 
-def check_system_requirements():
-    """Check if system has required dependencies"""
-    
-    console.print("[bold blue]🔍 Checking system requirements...[/bold blue]")
+def find_requirements() -> List[Tuple[str, str]]:
+    """Return (package, status) pairs for the required and optional dependencies"""
     
-    requirements = []
+    # find_spec only locates each module, so nothing (notably openai) is actually imported
+    requirements = [
+        (package, "✅" if importlib.util.find_spec(module) else "❌")
+        for package, module in _REQUIRED_PACKAGES
+    ]
     
-    try:
-        import requests
-        requirements.append(("requests", "✅"))
-    except ImportError:
-        requirements.append(("requests", "❌"))
-    
-    try:
-        import yaml
-        requirements.append(("PyYAML", "✅"))
-    except ImportError:
-        requirements.append(("PyYAML", "❌"))
-    
-    try:
-        from dotenv import load_dotenv
-        requirements.append(("python-dotenv", "✅"))
-    except ImportError:
-        requirements.append(("python-dotenv", "❌"))
-    
-    try:
-        import openai
+    if importlib.util.find_spec('openai'):
         requirements.append(("openai", "✅"))
-    except ImportError:
+    else:
         requirements.append(("openai (optional)", "⚠️"))
     
-    # Display requirements table
-    req_table = Table(title="📦 Dependencies")
-    req_table.add_column("Package", style="cyan")
-    req_table.add_column("Status", style="green")
+    return requirements
+
+def check_system_requirements(requirements: Optional[List[Tuple[str, str]]] = None):
+    """Check if system has required dependencies"""
+    
+    console.print("[bold blue]🔍 Checking system requirements...[/bold blue]")
     
-    for package, status in requirements:
-        req_table.add_row(package, status)
+    if requirements is None:
+        requirements = find_requirements()
     
-    console.print(req_table)
+    if console.is_terminal:
+        from rich.table import Table
+        
+        # Display requirements table
+        req_table = Table(title="📦 Dependencies")
+        req_table.add_column("Package", style="cyan")
+        req_table.add_column("Status", style="green")
+        
+        for package, status in requirements:
+            req_table.add_row(package, status)
+        
+        console.print(req_table)
+    else:
+        # Piped output (e.g. CI logs) gets plain lines without table layout
+        for package, status in requirements:
+            click.echo(f"{package}\t{status}")
     
     missing_required = [pkg for pkg, status in requirements if status == "❌"]
     if missing_required:
@@ -559,23 +706,41 @@ def check_system_requirements():
     
     return True
 
-def migrate_old_config():
+def _check_env_variables() -> Optional[str]:
+    """Load .env and return a description of the problem, or None when credentials are set"""
+    try:
+        load_dotenv()
+        if os.getenv('SHOPIFY_SHOP_DOMAIN') and os.getenv('SHOPIFY_ACCESS_TOKEN'):
+            return None
+        return "Missing required environment variables"
+    except Exception as e:
+        return f"Error loading environment: {e}"
+
+def _list_files(directory: str = '.') -> set:
+    """Names of the regular files in a directory, read with a single scandir"""
+    with os.scandir(directory) as entries:
+        return {entry.name for entry in entries if entry.is_file()}
+
+def migrate_old_config(existing_files: Optional[set] = None):
     """Migrate from old configuration format if exists"""
     
     old_config_files = ['.shopify_config', 'shopify_schema.conf', 'config.json']
     
+    if existing_files is None:
+        existing_files = _list_files()
+    
     for old_file in old_config_files:
-        if os.path.exists(old_file):
+        if old_file in existing_files:
             console.print(f"[yellow]⚠️  Found old configuration file: {old_file}[/yellow]")
             
-            if Confirm.ask(f"[bold]Migrate settings from {old_file}?[/bold]"):
+            if _confirm(f"[bold]Migrate settings from {old_file}?[/bold]"):
                 try:
                     # Attempt to load and migrate old config
                     # Implementation would depend on old format
                     console.print(f"[green]✅ Migrated settings from {old_file}[/green]")
                     
                     # Optionally remove old file
-                    if Confirm.ask(f"[bold]Remove old config file {old_file}?[/bold]"):
+                    if _confirm(f"[bold]Remove old config file {old_file}?[/bold]"):
                         os.remove(old_file)
                         console.print(f"[green]🗑️  Removed {old_file}[/green]")
                         
@@ -590,13 +755,20 @@ def doctor():
     
     issues_found = []
     
+    # The three checks are independent I/O, so run them together and report in a fixed order
+    with ThreadPoolExecutor(max_workers=3) as executor:
+        requirements_future = executor.submit(find_requirements)
+        files_future = executor.submit(_list_files)
+        env_future = executor.submit(_check_env_variables)
+    
     # Check system requirements
-    if not check_system_requirements():
+    if not check_system_requirements(requirements_future.result()):
         issues_found.append("Missing required dependencies")
     
     # Check configuration files
     config_files = ['.env', 'config.yml', 'config.yaml']
-    found_configs = [f for f in config_files if os.path.exists(f)]
+    existing_files = files_future.result()
+    found_configs = [f for f in config_files if f in existing_files]
     
     if not found_configs:
         issues_found.append("No configuration files found")
@@ -606,14 +778,11 @@ def doctor():
         console.print(f"[green]✅ Found configuration files: {', '.join(found_configs)}[/green]")
     
     # Test configuration loading
-    try:
-        load_dotenv()
-        if os.getenv('SHOPIFY_SHOP_DOMAIN') and os.getenv('SHOPIFY_ACCESS_TOKEN'):
-            console.print("[green]✅ Environment variables configured[/green]")
-        else:
-            issues_found.append("Missing required environment variables")
-    except Exception as e:
-        issues_found.append(f"Error loading environment: {e}")
+    env_issue = env_future.result()
+    if env_issue:
+        issues_found.append(env_issue)
+    else:
+        console.print("[green]✅ Environment variables configured[/green]")
     
     # Summary
     if issues_found:
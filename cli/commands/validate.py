@@ -3,27 +3,78 @@
 Validate command for CLI - comprehensive schema validation
 """
 
-import json
+import os
+import time
 import click
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import closing
+from functools import lru_cache, partial
+from itertools import chain, islice
 from rich.console import Console
-from rich.table import Table
-from rich.panel import Panel
-from rich.progress import track
-from rich.json import JSON
-from rich.text import Text
-import sys
-from pathlib import Path
-from typing import List, Dict, Any
-
-# Add src to path
-sys.path.append(str(Path(__file__).parent.parent.parent / 'src'))
-
-from validation.schema_validator import SchemaValidator
-from utils.constants import REQUIRED_PRODUCT_FIELDS, REQUIRED_ORGANIZATION_FIELDS, GOOGLE_RICH_RESULTS_REQUIREMENTS
-from utils.exceptions import ValidationError
+from types import GeneratorType
+from typing import TYPE_CHECKING, List, Dict, Any, Callable, Iterable, Iterator, Optional, Tuple
+
+from src.utils.helpers import (
+    JSON_DECODE_ERRORS, ijson, iter_json_items, iter_json_lines, load_json_bytes, write_json
+)
+
+if TYPE_CHECKING:
+    from src.validation.schema_validator import SchemaValidator
 
 console = Console()
 
+# A product validates in about 20us while starting a process pool takes 20-30ms,
+# and pickling a product to a worker and back costs as much as validating it; a
+# pool only pays off on catalogs well past the point its startup is recovered
+_PARALLEL_MIN_PRODUCTS = 2000
+
+# Products sent to a worker process per task, amortizing pickling and IPC
+_POOL_BATCH_SIZE = 64
+
+# Seconds between progress updates pushed to the bar, instead of one per item
+_PROGRESS_UPDATE_PERIOD = 0.2
+
+_STATUS_VALID = "✅ Valid"
+_STATUS_INVALID = "❌ Invalid"
+
+# Summary totals in the order per-product counts are returned
+_SUMMARY_KEYS = ('total_valid', 'total_invalid', 'total_warnings', 'total_errors')
+
+SummaryCounts = Tuple[int, int, int, int]
+
+# Product sub-schemas and the validator method that checks each
+_PRODUCT_SCHEMA_CHECKS = (
+    ('product', 'validate_product_schema'),
+    ('breadcrumb', 'validate_breadcrumb_schema'),
+    ('faq', 'validate_faq_schema')
+)
+
+@lru_cache(maxsize=1)
+def _get_validator() -> 'SchemaValidator':
+    """Return the shared validator, creating it on first use"""
+    from src.validation.schema_validator import SchemaValidator
+    return SchemaValidator()
+
+@lru_cache(maxsize=None)
+def _product_plan(schema_type: str) -> Tuple[Tuple[str, str], ...]:
+    """Return the (schema key, validator method) pairs to run on each product"""
+    return tuple(
+        (key, method_name) for key, method_name in _PRODUCT_SCHEMA_CHECKS
+        if key == 'product' or schema_type in ('all', key)
+    )
+
+def _track(sequence: Iterable, description: str, total: Optional[int] = None) -> Iterable:
+    """Show progress over ``sequence`` on a terminal; pass it through untouched otherwise"""
+    if not console.is_terminal:
+        return sequence
+    
+    from rich.progress import track
+    return track(
+        sequence, description=description, total=total,
+        console=console, update_period=_PROGRESS_UPDATE_PERIOD
+    )
+
 @click.command()
 @click.argument('schema_file', type=click.Path(exists=True))
 @click.option('--detailed', is_flag=True, help='Show detailed validation results')
@@ -32,15 +83,15 @@ console = Console()
 @click.option('--format', 'output_format', type=click.Choice(['table', 'json', 'text']), default='table', help='Output format')
 @click.option('--strict', is_flag=True, help='Strict validation mode (warnings become errors)')
 @click.option('--schema-type', type=click.Choice(['all', 'product', 'organization', 'breadcrumb', 'faq']), default='all', help='Validate specific schema types only')
-def validate(schema_file, detailed, google_check, output, output_format, strict, schema_type):
+@click.option('--quiet', '-q', is_flag=True, help='Skip displaying results; only save the report and set the exit status')
+def validate(schema_file, detailed, google_check, output, output_format, strict, schema_type, quiet):
     """Validate generated schemas for compliance and completeness"""
     
     console.print(f"[bold blue]🔍 Validating schemas from {schema_file}[/bold blue]\n")
     
     try:
-        with open(schema_file, 'r', encoding='utf-8') as f:
-            schemas = json.load(f)
-    except json.JSONDecodeError as e:
+        schemas = load_schema_bundle(schema_file)
+    except JSON_DECODE_ERRORS as e:
         console.print(f"[red]❌ Invalid JSON file: {e}[/red]")
         raise click.Abort()
     except Exception as e:
@@ -48,43 +99,97 @@ def validate(schema_file, detailed, google_check, output, output_format, strict,
         raise click.Abort()
     
     # Initialize validator
-    validator = SchemaValidator()
-    
-    # Run validation
-    validation_results = run_comprehensive_validation(
-        schemas, validator, schema_type, google_check, strict
-    )
-    
-    # Display results based on format
-    if output_format == 'table':
-        display_validation_table(validation_results, detailed)
-    elif output_format == 'json':
-        display_validation_json(validation_results)
-    else:  # text
-        display_validation_text(validation_results, detailed)
+    validator = _get_validator()
     
-    # Show summary
-    display_validation_summary(validation_results, google_check)
+    # Run validation; streamed sections are only parsed from here on
+    try:
+        validation_results = run_comprehensive_validation(
+            schemas, validator, schema_type, google_check, strict,
+            store_schema=bool(output) and output_format == 'json'
+        )
+    except JSON_DECODE_ERRORS as e:
+        console.print(f"[red]❌ Invalid JSON file: {e}[/red]")
+        raise click.Abort()
+    finally:
+        close_schema_bundle(schemas)
+    
+    failed = has_validation_errors(validation_results, strict)
+    
+    # A failing non-interactive run with a report only needs the report
+    if not quiet and not (output and failed and not console.is_terminal):
+        # Display results based on format
+        if output_format == 'table':
+            display_validation_table(validation_results, detailed)
+        elif output_format == 'json':
+            display_validation_json(validation_results)
+        else:  # text
+            display_validation_text(validation_results, detailed)
+        
+        # Show summary
+        display_validation_summary(validation_results, google_check)
     
     # Save report if requested
     if output:
         save_validation_report(validation_results, output, output_format)
     
     # Exit code based on results
-    if has_validation_errors(validation_results, strict):
+    if failed:
         console.print(f"\n[red]❌ Validation failed![/red]")
         raise click.Abort()
     else:
         console.print(f"\n[green]✅ Validation passed![/green]")
 
+def load_schema_bundle(schema_file: str) -> Dict:
+    """Load a generated schema file for validation
+    
+    A .jsonl file, as written by ``generate --output x.jsonl``, holds the package
+    metadata on its first line and one product package per following line; its
+    products are returned as a generator reading one line at a time. With ijson
+    installed, a .json file's products and collections are likewise generators
+    that parse one item at a time, so large exports are never held in memory
+    whole. Otherwise the file is parsed in one go with load_json_bytes.
+    """
+    if schema_file.endswith('.jsonl'):
+        with open(schema_file, 'rb') as f:
+            schemas = load_json_bytes(f.readline())
+        schemas['products'] = iter_json_lines(schema_file, skip=1)
+        return schemas
+    
+    if ijson is None:
+        with open(schema_file, 'rb') as f:
+            return load_json_bytes(f.read())
+    
+    schemas = {
+        'products': iter_json_items(schema_file, 'products.item'),
+        'collections': iter_json_items(schema_file, 'collections.item')
+    }
+    # Close the parser (and its file) now rather than whenever it is collected
+    with closing(iter_json_items(schema_file, 'organization')) as items:
+        organization = next(items, None)
+    if organization is not None:
+        schemas['organization'] = organization
+    return schemas
+
+def close_schema_bundle(schemas: Dict):
+    """Close the streamed sections of a schema bundle, releasing their files if unread"""
+    for section in schemas.values():
+        if isinstance(section, GeneratorType):
+            section.close()
+
 def run_comprehensive_validation(
     schemas: Dict, 
-    validator: SchemaValidator, 
+    validator: 'SchemaValidator', 
     schema_type: str, 
     google_check: bool,
-    strict: bool
+    strict: bool,
+    store_schema: bool = True
 ) -> Dict:
-    """Run comprehensive validation on all schemas"""
+    """Run comprehensive validation on all schemas
+    
+    With ``store_schema`` off, product and collection results omit their
+    ``schema_data``; only a saved JSON report reads it back. The organization
+    always keeps it, as the results table shows its name.
+    """
     
     results = {
         'file_info': {
@@ -104,19 +209,10 @@ def run_comprehensive_validation(
         'google_compatibility': []
     }
     
-    from datetime import datetime
-    start_time = datetime.now()
-    
-    # Count total schemas
-    total_count = 0
-    if 'organization' in schemas and (schema_type in ['all', 'organization']):
-        total_count += 1
-    if 'products' in schemas and (schema_type in ['all', 'product']):
-        total_count += len(schemas['products'])
-    if 'collections' in schemas and (schema_type in ['all', 'collection']):
-        total_count += len(schemas['collections'])
+    start_time = time.perf_counter()
     
-    results['file_info']['total_schemas'] = total_count
+    # strict is fixed for the run, so pick the matching summary update once
+    update_summary = _update_summary_strict if strict else _update_summary_lax
     
     # Validate organization schema
     if 'organization' in schemas and schema_type in ['all', 'organization']:
@@ -125,7 +221,7 @@ def run_comprehensive_validation(
         org_result['schema_data'] = schemas['organization']
         results['organization'] = org_result
         
-        _update_summary(results['summary'], org_result, strict)
+        update_summary(results['summary'], org_result)
         
         # Google validation for organization
         if google_check:
@@ -137,56 +233,38 @@ def run_comprehensive_validation(
     # Validate product schemas
     if 'products' in schemas and schema_type in ['all', 'product']:
         products = schemas['products']
+        plan = _product_plan(schema_type)
+        total = len(products) if hasattr(products, '__len__') else None
         
-        for product in track(products, description="Validating products..."):
-            product_result = {
-                'product_id': product.get('product_id'),
-                'title': product.get('title', 'Unknown Product'),
-                'handle': product.get('handle', ''),
-                'schemas': {}
-            }
-            
-            # Validate each schema type in the product
-            product_schemas = product.get('schemas', {})
-            
-            # Product schema
-            if 'product' in product_schemas:
-                schema_data = product_schemas['product']
-                validation = validator.validate_product_schema(schema_data)
-                validation['schema_data'] = schema_data
-                product_result['schemas']['product'] = validation
-                _update_summary(results['summary'], validation, strict)
-                
-                # Google validation
-                if google_check:
-                    google_result = validator.validate_against_google_requirements(schema_data)
-                    google_result['schema_type'] = 'Product'
-                    google_result['schema_name'] = product.get('title', 'Product')
-                    results['google_compatibility'].append(google_result)
-            
-            # Breadcrumb schema
-            if 'breadcrumb' in product_schemas and schema_type in ['all', 'breadcrumb']:
-                schema_data = product_schemas['breadcrumb']
-                validation = validator.validate_breadcrumb_schema(schema_data)
-                validation['schema_data'] = schema_data
-                product_result['schemas']['breadcrumb'] = validation
-                _update_summary(results['summary'], validation, strict)
-            
-            # FAQ schema
-            if 'faq' in product_schemas and schema_type in ['all', 'faq']:
-                schema_data = product_schemas['faq']
-                validation = validator.validate_faq_schema(schema_data)
-                validation['schema_data'] = schema_data
-                product_result['schemas']['faq'] = validation
-                _update_summary(results['summary'], validation, strict)
-            
-            results['products'].append(product_result)
+        # Streamed products have no length, so peek far enough to pick serial or pooled
+        products = iter(products)
+        head = list(islice(products, _PARALLEL_MIN_PRODUCTS))
+        products = chain(head, products)
+        
+        if len(head) < _PARALLEL_MIN_PRODUCTS:
+            outcomes = map(
+                partial(_validate_one_product, plan=plan, google_check=google_check,
+                        strict=strict, store_schema=store_schema, validator=validator),
+                products
+            )
+            outcomes = _track(outcomes, description="Validating products...", total=len(head))
+            _merge_product_outcomes(results, outcomes)
+        else:
+            outcomes = _validate_in_pool(
+                products,
+                partial(_validate_product_batch, plan=plan, google_check=google_check,
+                        strict=strict, store_schema=store_schema)
+            )
+            outcomes = _track(outcomes, description="Validating products...", total=total)
+            _merge_product_outcomes(results, outcomes)
     
     # Validate collection schemas
     if 'collections' in schemas and schema_type in ['all', 'collection']:
         collections = schemas.get('collections', [])
+        append_collection = results['collections'].append
+        valid = invalid = warnings = errors = 0
         
-        for collection in track(collections, description="Validating collections..."):
+        for collection in _track(collections, description="Validating collections..."):
             # Handle both old format (direct schema) and new format (with metadata)
             if collection.get('@type') == 'CollectionPage':
                 # Old format: collection is the schema directly
@@ -224,23 +302,137 @@ def run_comprehensive_validation(
                 collection_result['errors'].append("No schema data found")
                 collection_result['valid'] = False
             
-            collection_result['schema_data'] = schema_data
-            results['collections'].append(collection_result)
-            _update_summary(results['summary'], collection_result, strict)
+            if store_schema:
+                collection_result['schema_data'] = schema_data
+            append_collection(collection_result)
+            
+            if collection_result['valid']:
+                valid += 1
+            else:
+                invalid += 1
+            errors += len(collection_result['errors'])
+        
+        # Collection checks only ever produce errors, never warnings
+        _add_summary_counts(results['summary'], (valid, invalid, warnings, errors))
     
     # Calculate validation time
-    end_time = datetime.now()
-    results['file_info']['validation_time'] = (end_time - start_time).total_seconds()
+    results['file_info']['validation_time'] = time.perf_counter() - start_time
     results['file_info']['processed_schemas'] = (
         (1 if results['organization'] else 0) +
         len(results['products']) +
         len(results['collections'])
     )
+    results['file_info']['total_schemas'] = results['file_info']['processed_schemas']
     
     return results
 
+def _validate_one_product(
+    product: Dict,
+    plan: Tuple[Tuple[str, str], ...],
+    google_check: bool,
+    strict: bool,
+    store_schema: bool = True,
+    validator: Optional['SchemaValidator'] = None
+) -> Tuple[Dict, SummaryCounts, List[Dict]]:
+    """Validate one product's schemas, returning its result, summary counts and Google entries
+    
+    ``plan`` comes from _product_plan, so the per-product work is a single walk
+    over the schema checks that apply to this run.
+    """
+    
+    # Worker processes fall back to their own shared validator
+    if validator is None:
+        validator = _get_validator()
+    
+    valid = invalid = warnings = errors = 0
+    # Warnings also count as errors in strict mode
+    warning_error_weight = 1 if strict else 0
+    google_entries = []
+    product_result = {
+        'product_id': product.get('product_id'),
+        'title': product.get('title', 'Unknown Product'),
+        'handle': product.get('handle', ''),
+        'schemas': {}
+    }
+    
+    product_schemas = product.get('schemas', {})
+    
+    for key, method_name in plan:
+        schema_data = product_schemas.get(key)
+        if schema_data is None:
+            continue
+        
+        validation = getattr(validator, method_name)(schema_data)
+        if store_schema:
+            validation['schema_data'] = schema_data
+        product_result['schemas'][key] = validation
+        
+        if validation.get('valid'):
+            valid += 1
+        else:
+            invalid += 1
+        warning_count = len(validation.get('warnings', []))
+        warnings += warning_count
+        errors += len(validation.get('errors', [])) + warning_count * warning_error_weight
+        
+        # Google validation
+        if google_check and key == 'product':
+            google_result = validator.validate_against_google_requirements(schema_data)
+            google_result['schema_type'] = 'Product'
+            google_result['schema_name'] = product.get('title', 'Product')
+            google_entries.append(google_result)
+    
+    return product_result, (valid, invalid, warnings, errors), google_entries
+
+def _validate_product_batch(products: List[Dict], **options) -> List[Tuple[Dict, SummaryCounts, List[Dict]]]:
+    """Validate a batch of products in a worker process"""
+    return [_validate_one_product(product, **options) for product in products]
+
+def _validate_in_pool(products: Iterable[Dict],
+                      validate_batch: Callable[[List[Dict]], List]) -> Iterator[Tuple[Dict, SummaryCounts, List[Dict]]]:
+    """Validate batches of products on a process pool, yielding outcomes in product order"""
+    products = iter(products)
+    workers = os.cpu_count() or 1
+    
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        pending = deque()
+        while batch := list(islice(products, _POOL_BATCH_SIZE)):
+            pending.append(executor.submit(validate_batch, batch))
+            
+            # Keep every process busy without reading the whole file ahead
+            if len(pending) >= 2 * workers:
+                yield from pending.popleft().result()
+        
+        while pending:
+            yield from pending.popleft().result()
+
+def _merge_product_outcomes(results: Dict, outcomes: Iterable[Tuple[Dict, SummaryCounts, List[Dict]]]):
+    """Fold per-product validation outcomes into the run results"""
+    
+    append_product = results['products'].append
+    extend_google = results['google_compatibility'].extend
+    valid = invalid = warnings = errors = 0
+    
+    for product_result, (p_valid, p_invalid, p_warnings, p_errors), google_entries in outcomes:
+        append_product(product_result)
+        valid += p_valid
+        invalid += p_invalid
+        warnings += p_warnings
+        errors += p_errors
+        if google_entries:
+            extend_google(google_entries)
+    
+    _add_summary_counts(results['summary'], (valid, invalid, warnings, errors))
+
+def _add_summary_counts(summary: Dict, counts: SummaryCounts):
+    """Add (valid, invalid, warnings, errors) totals to the summary in one update"""
+    
+    for key, count in zip(_SUMMARY_KEYS, counts):
+        summary[key] += count
+
 def display_validation_table(results: Dict, detailed: bool = False):
     """Display validation results in table format"""
+    from rich.table import Table
     
     # Main results table
     table = Table(title="📋 Schema Validation Results")
@@ -250,44 +442,45 @@ def display_validation_table(results: Dict, detailed: bool = False):
     table.add_column("Errors", style="red", min_width=6)
     table.add_column("Warnings", style="yellow", min_width=8)
     
+    # Build every row in one pass, then hand them to the table
+    rows = []
+    
     # Organization
     if results['organization']:
         org = results['organization']
-        status = "✅ Valid" if org['valid'] else "❌ Invalid"
-        table.add_row(
+        rows.append((
             "Organization",
             org.get('schema_data', {}).get('name', 'Organization')[:20],
-            status,
+            _STATUS_VALID if org['valid'] else _STATUS_INVALID,
             str(len(org.get('errors', []))),
             str(len(org.get('warnings', [])))
-        )
+        ))
     
     # Products
     for product in results['products']:
+        product_name = _truncate_name(product['title'])
         for schema_type, validation in product['schemas'].items():
-            status = "✅ Valid" if validation['valid'] else "❌ Invalid"
-            product_name = product['title'][:20] + ("..." if len(product['title']) > 20 else "")
-            
-            table.add_row(
+            rows.append((
                 f"Product ({schema_type})",
                 product_name,
-                status,
+                _STATUS_VALID if validation['valid'] else _STATUS_INVALID,
                 str(len(validation.get('errors', []))),
                 str(len(validation.get('warnings', [])))
-            )
+            ))
     
     # Collections
     for collection in results['collections']:
-        status = "✅ Valid" if collection['valid'] else "❌ Invalid"
-        collection_name = collection['title'][:20] + ("..." if len(collection['title']) > 20 else "")
-        
-        table.add_row(
+        rows.append((
             "Collection",
-            collection_name,
-            status,
+            _truncate_name(collection['title']),
+            _STATUS_VALID if collection['valid'] else _STATUS_INVALID,
             str(len(collection.get('errors', []))),
             str(len(collection.get('warnings', [])))
-        )
+        ))
+    
+    add_row = table.add_row
+    for row in rows:
+        add_row(*row)
     
     console.print(table)
     
@@ -295,47 +488,54 @@ def display_validation_table(results: Dict, detailed: bool = False):
     if detailed:
         display_detailed_errors(results)
 
+def _truncate_name(name: str, width: int = 20) -> str:
+    """Shorten a name to fit the results table's Name column"""
+    return name[:width] + ("..." if len(name) > width else "")
+
 def display_detailed_errors(results: Dict):
     """Display detailed error information"""
     
-    console.print(f"\n[bold blue]📝 Detailed Validation Issues[/bold blue]")
+    # Collected and printed in one call rather than one render per line
+    lines = ["\n[bold blue]📝 Detailed Validation Issues[/bold blue]"]
     
     # Organization errors
     if results['organization'] and (results['organization'].get('errors') or results['organization'].get('warnings')):
-        console.print(f"\n[bold cyan]🏢 Organization Schema Issues:[/bold cyan]")
-        _display_schema_issues(results['organization'])
+        lines.append("\n[bold cyan]🏢 Organization Schema Issues:[/bold cyan]")
+        lines.extend(_schema_issue_lines(results['organization']))
     
     # Product errors
     for product in results['products']:
-        has_issues = any(
-            schema.get('errors') or schema.get('warnings') 
-            for schema in product['schemas'].values()
-        )
+        # One pass finds the schemas with issues and whether there are any
+        issues = [
+            (schema_type, validation)
+            for schema_type, validation in product['schemas'].items()
+            if validation.get('errors') or validation.get('warnings')
+        ]
         
-        if has_issues:
-            console.print(f"\n[bold cyan]📦 Product: {product['title']}[/bold cyan]")
-            for schema_type, validation in product['schemas'].items():
-                if validation.get('errors') or validation.get('warnings'):
-                    console.print(f"  [blue]{schema_type.title()} Schema:[/blue]")
-                    _display_schema_issues(validation, indent="    ")
+        if issues:
+            lines.append(f"\n[bold cyan]📦 Product: {product['title']}[/bold cyan]")
+            for schema_type, validation in issues:
+                lines.append(f"  [blue]{schema_type.title()} Schema:[/blue]")
+                lines.extend(_schema_issue_lines(validation, indent="    "))
     
     # Collection errors
     for collection in results['collections']:
         if collection.get('errors') or collection.get('warnings'):
-            console.print(f"\n[bold cyan]📁 Collection: {collection['title']}[/bold cyan]")
-            _display_schema_issues(collection)
-
-def _display_schema_issues(validation: Dict, indent: str = "  "):
-    """Display errors and warnings for a schema"""
+            lines.append(f"\n[bold cyan]📁 Collection: {collection['title']}[/bold cyan]")
+            lines.extend(_schema_issue_lines(collection))
     
-    for error in validation.get('errors', []):
-        console.print(f"{indent}[red]❌ {error}[/red]")
+    console.print("\n".join(lines))
+
+def _schema_issue_lines(validation: Dict, indent: str = "  ") -> List[str]:
+    """Format the errors and warnings for a schema as console markup lines"""
     
-    for warning in validation.get('warnings', []):
-        console.print(f"{indent}[yellow]⚠️  {warning}[/yellow]")
+    lines = [f"{indent}[red]❌ {error}[/red]" for error in validation.get('errors', [])]
+    lines.extend(f"{indent}[yellow]⚠️  {warning}[/yellow]" for warning in validation.get('warnings', []))
+    return lines
 
 def display_validation_json(results: Dict):
     """Display validation results in JSON format"""
+    from rich.json import JSON
     
     # Create a clean JSON structure for output
     clean_results = {
@@ -376,44 +576,44 @@ def display_validation_json(results: Dict):
 def display_validation_text(results: Dict, detailed: bool = False):
     """Display validation results in plain text format"""
     
-    console.print("SCHEMA VALIDATION REPORT")
-    console.print("=" * 50)
-    
     # Summary
     summary = results['summary']
-    console.print(f"Total Valid: {summary['total_valid']}")
-    console.print(f"Total Invalid: {summary['total_invalid']}")
-    console.print(f"Total Errors: {summary['total_errors']}")
-    console.print(f"Total Warnings: {summary['total_warnings']}")
-    console.print()
+    lines = [
+        "SCHEMA VALIDATION REPORT",
+        "=" * 50,
+        f"Total Valid: {summary['total_valid']}",
+        f"Total Invalid: {summary['total_invalid']}",
+        f"Total Errors: {summary['total_errors']}",
+        f"Total Warnings: {summary['total_warnings']}",
+        ""
+    ]
     
     # Individual results
     if results['organization']:
         org = results['organization']
         status = "VALID" if org['valid'] else "INVALID"
-        console.print(f"Organization Schema: {status}")
-        if detailed and (org.get('errors') or org.get('warnings')):
-            for error in org.get('errors', []):
-                console.print(f"  ERROR: {error}")
-            for warning in org.get('warnings', []):
-                console.print(f"  WARNING: {warning}")
-        console.print()
+        lines.append(f"Organization Schema: {status}")
+        if detailed:
+            lines.extend(f"  ERROR: {error}" for error in org.get('errors', []))
+            lines.extend(f"  WARNING: {warning}" for warning in org.get('warnings', []))
+        lines.append("")
     
     # Products
     for product in results['products']:
-        console.print(f"Product: {product['title']}")
+        lines.append(f"Product: {product['title']}")
         for schema_type, validation in product['schemas'].items():
             status = "VALID" if validation['valid'] else "INVALID"
-            console.print(f"  {schema_type.title()} Schema: {status}")
-            if detailed and (validation.get('errors') or validation.get('warnings')):
-                for error in validation.get('errors', []):
-                    console.print(f"    ERROR: {error}")
-                for warning in validation.get('warnings', []):
-                    console.print(f"    WARNING: {warning}")
-        console.print()
+            lines.append(f"  {schema_type.title()} Schema: {status}")
+            if detailed:
+                lines.extend(f"    ERROR: {error}" for error in validation.get('errors', []))
+                lines.extend(f"    WARNING: {warning}" for warning in validation.get('warnings', []))
+        lines.append("")
+    
+    console.print("\n".join(lines))
 
 def display_validation_summary(results: Dict, google_check: bool):
     """Display validation summary"""
+    from rich.panel import Panel
     
     summary = results['summary']
     file_info = results['file_info']
@@ -442,55 +642,62 @@ def display_validation_summary(results: Dict, google_check: bool):
         
         console.print(Panel(google_text, title="🔍 Google Rich Results Compatibility", border_style="green"))
 
+def _format_text_report(results: Dict) -> str:
+    """Render the plain-text validation report as a single string"""
+    
+    summary = results['summary']
+    lines = [
+        "SHOPIFY SCHEMA VALIDATION REPORT",
+        "=" * 50,
+        "",
+        "SUMMARY:",
+        f"  Valid Schemas: {summary['total_valid']}",
+        f"  Invalid Schemas: {summary['total_invalid']}",
+        f"  Total Errors: {summary['total_errors']}",
+        f"  Total Warnings: {summary['total_warnings']}",
+        ""
+    ]
+    
+    # Organization results
+    if results['organization']:
+        org = results['organization']
+        lines.append("ORGANIZATION SCHEMA:")
+        lines.append(f"  Status: {'VALID' if org['valid'] else 'INVALID'}")
+        lines.extend(f"  ERROR: {error}" for error in org.get('errors', []))
+        lines.extend(f"  WARNING: {warning}" for warning in org.get('warnings', []))
+        lines.append("")
+    
+    # Product results
+    for product in results['products']:
+        lines.append(f"PRODUCT: {product['title']}")
+        for schema_type, validation in product['schemas'].items():
+            lines.append(f"  {schema_type.upper()} SCHEMA: {'VALID' if validation['valid'] else 'INVALID'}")
+            lines.extend(f"    ERROR: {error}" for error in validation.get('errors', []))
+            lines.extend(f"    WARNING: {warning}" for warning in validation.get('warnings', []))
+        lines.append("")
+    
+    lines.append("")
+    return "\n".join(lines)
+
 def save_validation_report(results: Dict, output_path: str, output_format: str):
     """Save validation report to file"""
     
     try:
-        with open(output_path, 'w', encoding='utf-8') as f:
-            if output_format == 'json':
-                json.dump(results, f, indent=2, ensure_ascii=False, default=str)
-            else:
-                # Save as text report
-                f.write("SHOPIFY SCHEMA VALIDATION REPORT\n")
-                f.write("=" * 50 + "\n\n")
-                
-                # Write summary
-                summary = results['summary']
-                f.write(f"SUMMARY:\n")
-                f.write(f"  Valid Schemas: {summary['total_valid']}\n")
-                f.write(f"  Invalid Schemas: {summary['total_invalid']}\n")
-                f.write(f"  Total Errors: {summary['total_errors']}\n")
-                f.write(f"  Total Warnings: {summary['total_warnings']}\n\n")
-                
-                # Write detailed results
-                if results['organization']:
-                    org = results['organization']
-                    f.write(f"ORGANIZATION SCHEMA:\n")
-                    f.write(f"  Status: {'VALID' if org['valid'] else 'INVALID'}\n")
-                    for error in org.get('errors', []):
-                        f.write(f"  ERROR: {error}\n")
-                    for warning in org.get('warnings', []):
-                        f.write(f"  WARNING: {warning}\n")
-                    f.write("\n")
-                
-                # Write product results
-                for product in results['products']:
-                    f.write(f"PRODUCT: {product['title']}\n")
-                    for schema_type, validation in product['schemas'].items():
-                        f.write(f"  {schema_type.upper()} SCHEMA: {'VALID' if validation['valid'] else 'INVALID'}\n")
-                        for error in validation.get('errors', []):
-                            f.write(f"    ERROR: {error}\n")
-                        for warning in validation.get('warnings', []):
-                            f.write(f"    WARNING: {warning}\n")
-                    f.write("\n")
+        if output_format == 'json':
+            with open(output_path, 'wb') as f:
+                write_json(f, results)
+        else:
+            report = _format_text_report(results)
+            with open(output_path, 'w', encoding='utf-8') as f:
+                f.write(report)
         
         console.print(f"[green]💾 Validation report saved to {output_path}[/green]")
         
     except Exception as e:
         console.print(f"[red]❌ Error saving report: {e}[/red]")
 
-def _update_summary(summary: Dict, validation: Dict, strict: bool):
-    """Update summary statistics"""
+def _update_summary_lax(summary: Dict, validation: Dict):
+    """Update summary statistics, keeping warnings apart from errors"""
     
     if validation.get('valid'):
         summary['total_valid'] += 1
@@ -499,10 +706,18 @@ def _update_summary(summary: Dict, validation: Dict, strict: bool):
     
     summary['total_errors'] += len(validation.get('errors', []))
     summary['total_warnings'] += len(validation.get('warnings', []))
+
+def _update_summary_strict(summary: Dict, validation: Dict):
+    """Update summary statistics, counting warnings as errors too"""
+    
+    if validation.get('valid'):
+        summary['total_valid'] += 1
+    else:
+        summary['total_invalid'] += 1
     
-    # In strict mode, warnings count as errors
-    if strict:
-        summary['total_errors'] += len(validation.get('warnings', []))
+    warning_count = len(validation.get('warnings', []))
+    summary['total_errors'] += len(validation.get('errors', [])) + warning_count
+    summary['total_warnings'] += warning_count
 
 def has_validation_errors(results: Dict, strict: bool) -> bool:
     """Check if there are validation errors"""
@@ -4,13 +4,36 @@
 Command Line Interface for Shopify Schema Generator
 """
 
+import importlib
 import click
-from cli.commands.generate import generate
-from cli.commands.analyze import analyze
-from cli.commands.validate import validate
-from cli.commands.setup import setup
 
-@click.group()
+# Subcommands, each defined by the function of the same name in cli/commands/<name>.py,
+# with the first line of its docstring so --help does not import every command
+_LAZY_COMMANDS = {
+    'generate': 'Generate structured data schemas for a Shopify store',
+    'analyze': 'Analyze existing structured data for a specific product',
+    'validate': 'Validate generated schemas for compliance and completeness',
+    'setup': 'Setup configuration and credentials for the schema generator',
+}
+
+class LazyGroup(click.Group):
+    """Click group that imports each subcommand module only when it is run"""
+    
+    def list_commands(self, ctx):
+        return list(_LAZY_COMMANDS)
+    
+    def get_command(self, ctx, cmd_name):
+        if cmd_name not in _LAZY_COMMANDS:
+            return None
+        module = importlib.import_module(f'.commands.{cmd_name}', package='cli')
+        return getattr(module, cmd_name)
+    
+    def format_commands(self, ctx, formatter):
+        rows = list(_LAZY_COMMANDS.items())
+        with formatter.section('Commands'):
+            formatter.write_dl(rows)
+
+@click.group(cls=LazyGroup)
 @click.version_option(version='1.0.0')
 def cli():
     """Shopify Structured Data Generator CLI
@@ -19,11 +42,5 @@ def cli():
     """
     pass
 
-# Add commands to CLI group
-cli.add_command(generate)
-cli.add_command(analyze)
-cli.add_command(validate)
-cli.add_command(setup)
-
 if __name__ == '__main__':
-    cli()
\ No newline at end of file
+    cli()
@@ -0,0 +1,175 @@
+# src/ai/batch.py
+"""
+Submit many OpenAI chat requests at once through the Batch API
+"""
+
+import time
+import logging
+from concurrent.futures import Future
+from typing import Dict, List, Optional
+
+from src.ai.enhancer import AIEnhancer, ChatRequest
+from src.utils.helpers import dump_json_bytes, load_json_bytes
+from src.utils.exceptions import AIEnhancementError
+
+logger = logging.getLogger(__name__)
+
+_CHAT_COMPLETIONS_ENDPOINT = "/v1/chat/completions"
+
+# Batch states after which no more output will arrive
+_FINAL_BATCH_STATES = frozenset({'completed', 'failed', 'expired', 'cancelled'})
+
+class AIBatchEnhancer:
+    """Queue chat requests and run them as one OpenAI batch
+    
+    Batches cost half as much as synchronous requests and are not subject to
+    the per-minute limits, at the price of completing asynchronously (within
+    the completion window). Responses to temperature 0 requests are written to
+    the enhancer's cache, so the enhancer's own methods pick them up later.
+    """
+    
+    def __init__(self, enhancer: AIEnhancer, poll_interval: float = 30.0, completion_window: str = "24h"):
+        """
+        Initialize batch enhancer
+        
+        Args:
+            enhancer: Enhancer whose client, model and cache are used
+            poll_interval: Seconds between batch status checks
+            completion_window: Batch completion window requested from OpenAI
+        """
+        self.enhancer = enhancer
+        self.poll_interval = poll_interval
+        self.completion_window = completion_window
+        
+        self._requests: List[Dict] = []
+        self._futures: Dict[str, Future] = {}
+        self._cache_keys: Dict[str, str] = {}
+    
+    def queue(self, custom_id: str, request: ChatRequest) -> Future:
+        """
+        Queue a chat request for the next flush
+        
+        Args:
+            custom_id: Caller's identifier for the request, unique within the batch
+            request: The request to send; model defaults to the enhancer's model
+        
+        Returns:
+            Future resolved with the response text (or None) once flushed
+        """
+        if custom_id in self._futures:
+            raise AIEnhancementError(f"Duplicate batch request id: {custom_id}")
+        
+        future = Future()
+        
+        # Cached deterministic responses never need to be submitted
+        if request.temperature == 0:
+            cache_key = self.enhancer.cache_key(request)
+            cached = self.enhancer.cache.get(cache_key)
+            if cached is not None:
+                future.set_result(cached)
+                return future
+            self._cache_keys[custom_id] = cache_key
+        
+        self._requests.append({
+            "custom_id": custom_id,
+            "method": "POST",
+            "url": _CHAT_COMPLETIONS_ENDPOINT,
+            "body": self.enhancer.request_body(request)
+        })
+        self._futures[custom_id] = future
+        return future
+    
+    def queue_product_analysis(self, products: List[Dict]) -> Dict[str, Future]:
+        """
+        Queue the deterministic per-product requests made by the enhancer
+        
+        The requests come from the enhancer's analysis_requests, so after a flush
+        categorize_product, extract_product_attributes and generate_keywords
+        are served from the cache instead of calling the API one product at a time.
+        
+        Returns:
+            Futures keyed by "<product id>:<category|attributes|keywords>"
+        """
+        futures = {}
+        
+        for index, product in enumerate(products):
+            product_id = product.get('id', index)
+            for kind, request in self.enhancer.analysis_requests(product).items():
+                custom_id = f"{product_id}:{kind}"
+                futures[custom_id] = self.queue(custom_id, request)
+        
+        return futures
+    
+    def flush(self) -> Dict[str, Optional[str]]:
+        """
+        Submit queued requests as one batch and wait for it to finish
+        
+        Returns:
+            Response text (None for failed requests) keyed by custom_id
+        """
+        if not self._requests:
+            return {}
+        
+        requests, futures, cache_keys = self._requests, self._futures, self._cache_keys
+        self._requests, self._futures, self._cache_keys = [], {}, {}
+        
+        try:
+            output = self._run_batch(requests)
+        except Exception as e:
+            for future in futures.values():
+                future.set_exception(e)
+            raise
+        
+        results = {}
+        for line in output.splitlines():
+            if not line.strip():
+                continue
+            record = load_json_bytes(line)
+            custom_id = record.get('custom_id')
+            if custom_id not in futures:
+                continue
+            
+            content = self._response_content(record)
+            if content is not None and custom_id in cache_keys:
+                self.enhancer.cache.set(cache_keys[custom_id], content)
+            results[custom_id] = content
+        
+        for custom_id, future in futures.items():
+            future.set_result(results.setdefault(custom_id, None))
+        
+        return results
+    
+    def _run_batch(self, requests: List[Dict]) -> bytes:
+        """Upload requests, wait for the batch to complete and return its output JSONL"""
+        
+        client = self.enhancer.client
+        payload = b"".join(dump_json_bytes(request, indent=False) + b"\n" for request in requests)
+        
+        batch_file = client.files.create(file=("requests.jsonl", payload), purpose="batch")
+        batch = client.batches.create(
+            input_file_id=batch_file.id,
+            endpoint=_CHAT_COMPLETIONS_ENDPOINT,
+            completion_window=self.completion_window
+        )
+        logger.info(f"Submitted OpenAI batch {batch.id} with {len(requests)} requests")
+        
+        while batch.status not in _FINAL_BATCH_STATES:
+            time.sleep(self.poll_interval)
+            batch = client.batches.retrieve(batch.id)
+        
+        if batch.status != 'completed' or not batch.output_file_id:
+            raise AIEnhancementError(f"OpenAI batch {batch.id} ended with status '{batch.status}'")
+        
+        return client.files.content(batch.output_file_id).content
+    
+    def _response_content(self, record: Dict) -> Optional[str]:
+        """Extract the message text from one line of batch output"""
+        
+        response = record.get('response') or {}
+        if record.get('error') or response.get('status_code') != 200:
+            logger.warning(f"Batch request {record.get('custom_id')} failed: {record.get('error')}")
+            return None
+        
+        choices = (response.get('body') or {}).get('choices') or []
+        content = choices[0].get('message', {}).get('content') if choices else None
+        return content.strip() if content else None
@@ -0,0 +1,101 @@
+# src/ai/cache.py
+"""
+Content-addressed cache for deterministic OpenAI responses
+"""
+
+import os
+import json
+import time
+import hashlib
+import logging
+import tempfile
+from pathlib import Path
+from typing import Dict, Optional, Any
+
+from src.utils.helpers import dump_json_bytes, load_json_bytes
+
+logger = logging.getLogger(__name__)
+
+# Cached responses are reused for a week
+DEFAULT_TTL = 7 * 24 * 3600
+
+def default_cache_dir() -> Path:
+    """Return the per-user directory for cached OpenAI responses"""
+    base = os.environ.get('XDG_CACHE_HOME') or Path.home() / '.cache'
+    return Path(base) / 'shopify-schema' / 'openai'
+
+class MemoryBackend:
+    """Keep cache entries in a dict for the life of the process"""
+    
+    def __init__(self):
+        self._entries: Dict[str, Dict] = {}
+    
+    def get(self, key: str) -> Optional[Dict]:
+        return self._entries.get(key)
+    
+    def set(self, key: str, entry: Dict) -> None:
+        self._entries[key] = entry
+
+class DiskBackend:
+    """Keep cache entries as one JSON file per key, so runs can share them"""
+    
+    def __init__(self, directory: Optional[Path] = None):
+        self.directory = Path(directory).expanduser() if directory else default_cache_dir()
+    
+    def _path(self, key: str) -> Path:
+        return self.directory / key[:2] / f"{key}.json"
+    
+    def get(self, key: str) -> Optional[Dict]:
+        try:
+            with open(self._path(key), 'rb') as f:
+                return load_json_bytes(f.read())
+        except (OSError, ValueError):
+            return None
+    
+    def set(self, key: str, entry: Dict) -> None:
+        # Best effort: a failed write only costs a future cache miss
+        path = self._path(key)
+        tmp_path = None
+        try:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            # Each writer gets its own temp file, so threads and processes storing
+            # the same key never interleave writes before the atomic replace
+            fd, tmp_path = tempfile.mkstemp(dir=path.parent, prefix=f".{key}.", suffix='.tmp')
+            with os.fdopen(fd, 'wb') as f:
+                f.write(dump_json_bytes(entry, indent=False))
+            os.replace(tmp_path, path)
+        except OSError as e:
+            logger.debug(f"Could not write OpenAI cache entry: {e}")
+            if tmp_path is not None and os.path.exists(tmp_path):
+                os.unlink(tmp_path)
+
+class LLMCache:
+    """Cache OpenAI responses keyed by a hash of everything that shapes them"""
+    
+    def __init__(self, backend: Any = None, ttl: float = DEFAULT_TTL):
+        """
+        Initialize the cache
+        
+        Args:
+            backend: Storage backend with get/set (defaults to DiskBackend)
+            ttl: Seconds a cached response stays valid
+        """
+        self.backend = backend if backend is not None else DiskBackend()
+        self.ttl = ttl
+    
+    @staticmethod
+    def make_key(**request: Any) -> str:
+        """Return the SHA-256 of a request's parameters"""
+        payload = json.dumps(request, sort_keys=True, ensure_ascii=False)
+        return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+    
+    def get(self, key: str) -> Optional[str]:
+        """Return the cached response for key, if it has not expired"""
+        entry = self.backend.get(key)
+        if entry and time.time() - entry.get('ts', 0) < self.ttl:
+            return entry.get('value')
+        return None
+    
+    def set(self, key: str, value: str) -> None:
+        """Store a response under key"""
+        self.backend.set(key, {'ts': time.time(), 'value': value})
@@ -3,24 +3,203 @@
 AI-powered enhancement features for schema generation using OpenAI
 """
 
+import os
 import json
 import logging
-from typing import Dict, List, Optional, Any
+from typing import Callable, Dict, List, Optional, Any, Tuple
 import openai
 from openai import OpenAI
 import time
 import re
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from functools import lru_cache
 
 from src.utils.constants import AI_PROMPTS, CATEGORY_MAPPING
-from src.utils.helpers import clean_html, truncate_text
+from src.utils.helpers import clean_html, load_json_bytes, match_category, truncate_text
 from src.utils.exceptions import AIEnhancementError
+from src.ai.cache import LLMCache
+from src.ai.rate_limiter import RateLimiter
+
+try:
+    import tiktoken
+except ImportError:  # optional, token counts are estimated from characters instead
+    tiktoken = None
 
 logger = logging.getLogger(__name__)
 
+_SYSTEM_PROMPT = "You are a helpful SEO and e-commerce expert."
+
+# Cheaper model for categorization and titles when the OpenAI API is used
+_DEFAULT_SMALL_MODEL = "gpt-4o-mini"
+
+_VALID_CATEGORIES = frozenset(CATEGORY_MAPPING.values())
+# Sorted so the categorization prompt, and therefore its cache key, is stable across runs
+_CATEGORY_NAMES = ', '.join(sorted(_VALID_CATEGORIES))
+
+# Invariant instructions live in the system message, so every request of a kind
+# starts with the same prefix (which OpenAI's prompt caching keys on) and the
+# user message carries only the product data
+_CATEGORY_SYSTEM_PROMPT = (
+    f"{_SYSTEM_PROMPT}\n"
+    f"Categorize the product into one of these categories: {_CATEGORY_NAMES}\n"
+    "Return only the category name, nothing else."
+)
+
+# Categories no other category starts with, so a streamed answer can stop at them
+_UNAMBIGUOUS_CATEGORIES = frozenset(
+    category for category in _VALID_CATEGORIES
+    if not any(other != category and other.startswith(category) for other in _VALID_CATEGORIES)
+)
+
+# Product families whose AI category and keywords are remembered within a run
+_FINGERPRINT_CACHE_SIZE = 1024
+
+def _category_complete(text: str) -> bool:
+    """Whether a streamed categorization answer is complete"""
+    return '\n' in text.lstrip() or text.strip() in _UNAMBIGUOUS_CATEGORIES
+
+# System message for requests covering several numbered products
+_JSON_ARRAY_SYSTEM_PROMPT = f"{_SYSTEM_PROMPT}\nReturn only a JSON array where {{}}."
+_CATEGORY_ARRAY_SYSTEM_PROMPT = _JSON_ARRAY_SYSTEM_PROMPT.format(
+    f"element i is the category for product i, chosen from: {_CATEGORY_NAMES}"
+)
+
+# Response budgets for the deterministic (temperature 0) requests
+_CATEGORY_MAX_TOKENS = 50
+_ATTRIBUTES_MAX_TOKENS = 300
+_KEYWORDS_MAX_TOKENS = 200
+
+# JSON mode: the model may only answer with a valid JSON object
+_JSON_OBJECT_FORMAT = {"type": "json_object"}
+
+# Collapses runs of whitespace when fingerprinting product titles
+_WHITESPACE_RE = re.compile(r'\s+')
+
+# Sentences worth sending for attribute extraction: those naming an attribute or a measurement
+_SENTENCE_SPLIT_RE = re.compile(r'(?<=[.!?])\s+')
+_ATTRIBUTE_HINT_RE = re.compile(
+    r'\b(?:size|sizes|colou?rs?|materials?|made of|weight|weighs|length|width|height|dimensions?'
+    r'|warranty|care|wash|compatible|\d+(?:\.\d+)?\s?(?:cm|mm|in|kg|g|oz|lbs?|ml|l))\b',
+    re.IGNORECASE
+)
+
+def _attribute_sentences(description: str) -> str:
+    """Keep the sentences of a description that hint at attributes, or all of it if none do"""
+    sentences = [
+        sentence for sentence in _SENTENCE_SPLIT_RE.split(description)
+        if _ATTRIBUTE_HINT_RE.search(sentence)
+    ]
+    return ' '.join(sentences) if sentences else description
+
+# Basic keyword extraction
+_WORD_RE = re.compile(r'\b\w{3,}\b')
+_STOP_WORDS = frozenset({
+    'the', 'and', 'for', 'with', 'this', 'that', 'from', 'they',
+    'you', 'are', 'was', 'will', 'have', 'has', 'had'
+})
+
+# Rough characters per token, used when tiktoken is not installed
+_CHARS_PER_TOKEN = 4
+
+# Description budgets, in tokens, for each prompt
+_CATEGORY_DESCRIPTION_TOKENS = 50
+_KEYWORDS_DESCRIPTION_TOKENS = 75
+_ENHANCE_DESCRIPTION_TOKENS = 75
+_FAQ_DESCRIPTION_TOKENS = 125
+
+@lru_cache(maxsize=None)
+def _encoding_for(model: str) -> Any:
+    """Return the tiktoken encoding for model, or None if it is unavailable
+    
+    Encodings are loaded on first use and shared by every enhancer.
+    """
+    if tiktoken is None:
+        return None
+    
+    try:
+        try:
+            return tiktoken.encoding_for_model(model)
+        except KeyError:
+            return tiktoken.get_encoding("cl100k_base")
+    except Exception as e:  # encodings are downloaded on first use
+        logger.debug(f"tiktoken encoding unavailable, estimating tokens from characters: {e}")
+        return None
+
+def _count_tokens(text: str, encoding: Any = None) -> int:
+    """Count tokens in text, or estimate them without an encoding"""
+    if encoding is None:
+        return len(text) // _CHARS_PER_TOKEN
+    return len(encoding.encode(text))
+
+def _truncate_tokens(text: str, max_tokens: int, encoding: Any = None, suffix: str = "...") -> str:
+    """Truncate text to at most max_tokens tokens with suffix"""
+    if encoding is None:
+        return truncate_text(text, max_tokens * _CHARS_PER_TOKEN, suffix)
+    
+    tokens = encoding.encode(text)
+    if len(tokens) <= max_tokens:
+        return text
+    return encoding.decode(tokens[:max_tokens]).rstrip() + suffix
+
+@dataclass(frozen=True)
+class ProductContext:
+    """Product fields used by the AI prompts, cleaned and truncated once per product"""
+    
+    __slots__ = ('title', 'description', 'category_description', 'keywords_description',
+                 'faq_description', 'category', 'vendor', 'tags_csv')
+    
+    title: str
+    description: str
+    category_description: str
+    keywords_description: str
+    faq_description: str
+    category: str
+    vendor: str
+    tags_csv: str
+    
+    @classmethod
+    def from_product(cls, product: Dict, encoding: Any = None, small_encoding: Any = None) -> 'ProductContext':
+        """Build the context for a Shopify product, truncating with encoding's tokens if given
+        
+        The category description goes to the small model, so it is truncated with
+        small_encoding when given.
+        """
+        description = clean_html(product.get('body_html', ''))
+        return cls(
+            title=product.get('title', ''),
+            description=description,
+            category_description=_truncate_tokens(
+                description, _CATEGORY_DESCRIPTION_TOKENS, small_encoding or encoding
+            ),
+            keywords_description=_truncate_tokens(description, _KEYWORDS_DESCRIPTION_TOKENS, encoding),
+            faq_description=_truncate_tokens(description, _FAQ_DESCRIPTION_TOKENS, encoding),
+            category=product.get('product_type', ''),
+            vendor=product.get('vendor', ''),
+            tags_csv=', '.join(product.get('tags', [])[:5])
+        )
+
+@dataclass(frozen=True)
+class ChatRequest:
+    """One chat completion request, independent of how it is sent"""
+    
+    prompt: str
+    max_tokens: int = 150
+    temperature: float = 0.7
+    response_format: Optional[Dict] = None
+    system: str = _SYSTEM_PROMPT
+    model: Optional[str] = None
+
 class AIEnhancer:
     """AI-powered content enhancement using OpenAI"""
     
-    def __init__(self, api_key: str, model: str = "gpt-3.5-turbo", max_retries: int = 3):
+    def __init__(self, api_key: str, model: str = "gpt-3.5-turbo", max_retries: int = 3,
+                 cache: Optional[LLMCache] = None, requests_per_minute: Optional[float] = 60,
+                 tokens_per_minute: Optional[float] = None, max_concurrent: int = 8,
+                 base_url: Optional[str] = None, small_model: Optional[str] = None,
+                 reuse_generated: bool = False):
         """
         Initialize AI enhancer
         
@@ -28,17 +207,43 @@ class AIEnhancer:
             api_key: OpenAI API key
             model: OpenAI model to use (gpt-3.5-turbo, gpt-4, etc.)
             max_retries: Maximum number of retries for failed requests
+            cache: Response cache (defaults to an on-disk cache)
+            requests_per_minute: Request budget shared by all threads using this enhancer
+                (None or 0 for no request limit)
+            tokens_per_minute: Token budget shared by all threads (None for no token limit)
+            max_concurrent: Maximum requests in flight at once
+            base_url: API endpoint, e.g. a local batching proxy (defaults to OPENAI_BASE_URL,
+                then the OpenAI API)
+            small_model: Cheaper model for categorization and titles (defaults to gpt-4o-mini,
+                or to model when base_url points elsewhere, as that endpoint may not serve it)
+            reuse_generated: Reuse cached descriptions, FAQs and titles for unchanged
+                products instead of generating new ones each run; off by default, as
+                the cached copy would otherwise be returned unchanged for up to the
+                cache's lifetime
         """
         if not api_key:
             raise AIEnhancementError("OpenAI API key is required")
         
-        self.client = OpenAI(api_key=api_key)
+        base_url = base_url or os.getenv('OPENAI_BASE_URL') or None
+        self.client = OpenAI(api_key=api_key, base_url=base_url)
         self.model = model
+        self.small_model = small_model or (model if base_url else _DEFAULT_SMALL_MODEL)
         self.max_retries = max_retries
+        self.cache = cache if cache is not None else LLMCache()
+        self.reuse_generated = reuse_generated
         
-        # Rate limiting
+        # Rate limiting; the limiter is thread-safe so one enhancer can serve a thread pool
+        self.rate_limiter = RateLimiter(requests_per_minute, tokens_per_minute)
+        self.max_concurrent = max_concurrent
+        self._in_flight = threading.BoundedSemaphore(max_concurrent)
         self.last_request_time = 0
-        self.min_request_interval = 1.0  # Minimum seconds between requests
+        # Average seconds between requests
+        self.min_request_interval = 60.0 / requests_per_minute if requests_per_minute else 0.0
+        
+        # AI results shared by near-duplicate products (variants listed separately) within a
+        # run, oldest evicted first; the lock keeps concurrent writers from racing evictions
+        self._fingerprint_cache: 'OrderedDict[Tuple, Any]' = OrderedDict()
+        self._fingerprint_lock = threading.Lock()
         
         logger.info(f"AI Enhancer initialized with model: {model}")
     
@@ -65,7 +270,7 @@ class AIEnhancer:
             # Prepare context
             context = {
                 'title': product.get('title', ''),
-                'description': truncate_text(clean_desc, 300),
+                'description': _truncate_tokens(clean_desc, _ENHANCE_DESCRIPTION_TOKENS, self._model_encoding()),
                 'category': product.get('product_type', ''),
                 'vendor': product.get('vendor', ''),
                 'tags': ', '.join(product.get('tags', [])[:5])
@@ -73,7 +278,7 @@ class AIEnhancer:
             
             prompt = AI_PROMPTS['DESCRIPTION_ENHANCEMENT'].format(**context)
             
-            response = self._make_openai_request(prompt, max_tokens=250)
+            response = self._make_openai_request(prompt, max_tokens=250, cacheable=self.reuse_generated)
             
             if response:
                 enhanced = response.strip()
@@ -92,34 +297,57 @@ class AIEnhancer:
         # Fallback to cleaned original
         return truncate_text(clean_html(description), max_length)
     
-    def generate_faq_schema(self, product: Dict) -> Dict:
+    def enhance_products_batch(self, products: List[Dict], max_length: int = 200) -> List[str]:
+        """
+        Enhance several products' descriptions concurrently
+        
+        Requests overlap on up to max_concurrent threads while the shared rate
+        limiter keeps the combined rate within budget.
+        
+        Args:
+            products: Product data dictionaries
+            max_length: Maximum length for each enhanced description
+            
+        Returns:
+            Enhanced descriptions, in the same order as products
+        """
+        if not products:
+            return []
+        
+        with ThreadPoolExecutor(max_workers=min(self.max_concurrent, len(products))) as executor:
+            return list(executor.map(
+                lambda product: self.enhance_description(product.get('body_html', ''), product, max_length),
+                products
+            ))
+    
+    def generate_faq_schema(self, product: Dict, context: Optional[ProductContext] = None) -> Dict:
         """
         Generate FAQ schema using AI
         
         Args:
             product: Product data dictionary
+            context: Precomputed prompt fields for product
             
         Returns:
             FAQ schema dictionary
         """
         try:
-            # Prepare context
-            description = clean_html(product.get('body_html', ''))
-            context = {
-                'title': product.get('title', ''),
-                'description': truncate_text(description, 500),
-                'category': product.get('product_type', ''),
-                'vendor': product.get('vendor', '')
-            }
-            
-            prompt = AI_PROMPTS['FAQ_GENERATION'].format(**context)
-            
-            response = self._make_openai_request(prompt, max_tokens=400)
+            context = context or self._product_context(product)
+            prompt = AI_PROMPTS['FAQ_GENERATION'].format(
+                title=context.title,
+                description=context.faq_description,
+                category=context.category,
+                vendor=context.vendor
+            )
+            
+            response = self._make_openai_request(
+                prompt, max_tokens=400, cacheable=self.reuse_generated, response_format=_JSON_OBJECT_FORMAT
+            )
             
             if response:
                 # Try to parse JSON response
                 try:
-                    faq_data = json.loads(response)
+                    faq_data = load_json_bytes(response)
                     questions = faq_data.get('questions', [])
                     
                     if questions and len(questions) > 0:
@@ -152,12 +380,13 @@ class AIEnhancer:
         # Fallback to basic FAQ
         return self._generate_basic_faq(product)
     
-    def categorize_product(self, product: Dict) -> str:
+    def categorize_product(self, product: Dict, context: Optional[ProductContext] = None) -> str:
         """
         Categorize product using AI
         
         Args:
             product: Product data dictionary
+            context: Precomputed prompt fields for product
             
         Returns:
             Product category string
@@ -168,28 +397,19 @@ class AIEnhancer:
             if basic_category != 'Other':
                 return basic_category
             
-            # Use AI for unknown categories
-            description = clean_html(product.get('body_html', ''))
-            
-            prompt = f"""
-            Categorize this product into one of these categories:
-            {', '.join(set(CATEGORY_MAPPING.values()))}
-            
-            Product: {product.get('title', '')}
-            Type: {product.get('product_type', '')}
-            Description: {truncate_text(description, 200)}
-            Tags: {', '.join(product.get('tags', [])[:5])}
+            fingerprint = self._fingerprint('category', product)
+            cached = self._fingerprint_cache.get(fingerprint)
+            if cached is not None:
+                return cached
             
-            Return only the category name, nothing else.
-            """
-            
-            response = self._make_openai_request(prompt, max_tokens=50)
+            # Use AI for unknown categories
+            response = self._send(self._category_request(product, context), stop_when=_category_complete)
             
             if response:
                 category = response.strip()
                 # Validate it's one of our known categories
-                valid_categories = set(CATEGORY_MAPPING.values())
-                if category in valid_categories:
+                if category in _VALID_CATEGORIES:
+                    self._remember(fingerprint, category)
                     return category
         
         except Exception as e:
@@ -198,28 +418,27 @@ class AIEnhancer:
         # Fallback to basic categorization
         return self._basic_categorization(product)
     
-    def extract_product_attributes(self, product: Dict) -> Dict:
+    def extract_product_attributes(self, product: Dict, context: Optional[ProductContext] = None) -> Dict:
         """
         Extract structured attributes from product description using AI
         
         Args:
             product: Product data dictionary
+            context: Precomputed prompt fields for product
             
         Returns:
             Dictionary of extracted attributes
         """
         try:
-            description = clean_html(product.get('body_html', ''))
-            if len(description) < 50:
+            request = self._attributes_request(product, context)
+            if request is None:
                 return {}
             
-            prompt = AI_PROMPTS['ATTRIBUTE_EXTRACTION'].format(description=description)
-            
-            response = self._make_openai_request(prompt, max_tokens=300)
+            response = self._send(request)
             
             if response:
                 try:
-                    attributes = json.loads(response)
+                    attributes = load_json_bytes(response)
                     # Clean up empty values
                     return {k: v for k, v in attributes.items() if v}
                 except json.JSONDecodeError:
@@ -230,34 +449,32 @@ class AIEnhancer:
         
         return {}
     
-    def generate_keywords(self, product: Dict, max_keywords: int = 15) -> List[str]:
+    def generate_keywords(self, product: Dict, max_keywords: int = 15,
+                          context: Optional[ProductContext] = None) -> List[str]:
         """
         Generate relevant SEO keywords using AI
         
         Args:
             product: Product data dictionary
             max_keywords: Maximum number of keywords to return
+            context: Precomputed prompt fields for product
             
         Returns:
             List of relevant keywords
         """
         try:
-            description = clean_html(product.get('body_html', ''))
-            
-            context = {
-                'title': product.get('title', ''),
-                'description': truncate_text(description, 300),
-                'category': product.get('product_type', '')
-            }
+            fingerprint = self._fingerprint('keywords', product)
+            cached = self._fingerprint_cache.get(fingerprint)
+            if cached is not None:
+                return cached[:max_keywords]
             
-            prompt = AI_PROMPTS['KEYWORD_EXTRACTION'].format(**context)
-            
-            response = self._make_openai_request(prompt, max_tokens=200)
+            response = self._send(self._keywords_request(product, context))
             
             if response:
                 # Parse comma-separated keywords
                 keywords = [k.strip().lower() for k in response.split(',')]
                 keywords = [k for k in keywords if k and len(k) > 2]
+                self._remember(fingerprint, keywords)
                 return keywords[:max_keywords]
         
         except Exception as e:
@@ -266,6 +483,186 @@ class AIEnhancer:
         # Fallback to basic keyword extraction
         return self._extract_basic_keywords(product, max_keywords)
     
+    def categorize_products_batch(self, products: List[Dict], k: int = 20) -> List[str]:
+        """
+        Categorize several products, asking the AI about up to k of them per request
+        
+        Args:
+            products: Product data dictionaries
+            k: Maximum products per request
+            
+        Returns:
+            Categories, in the same order as products
+        """
+        categories = [self._basic_categorization(product) for product in products]
+        unknown = [i for i, category in enumerate(categories) if category == 'Other']
+        
+        # Reuse answers cached by categorize_product, e.g. warmed by an AIBatchEnhancer flush
+        for i in unknown:
+            cached = self.cache.get(self.cache_key(self._category_request(products[i])))
+            if cached in _VALID_CATEGORIES:
+                categories[i] = cached
+        unknown = [i for i in unknown if categories[i] == 'Other']
+        
+        for start in range(0, len(unknown), k):
+            indices = unknown[start:start + k]
+            lines = [
+                f"{n}: title={products[i].get('title', '')} type={products[i].get('product_type', '')} "
+                f"tags={', '.join(products[i].get('tags', [])[:5])}"
+                for n, i in enumerate(indices)
+            ]
+            answers = self._request_json_array(
+                _CATEGORY_ARRAY_SYSTEM_PROMPT, lines,
+                max_tokens=_CATEGORY_MAX_TOKENS // 2 * len(indices), model=self.small_model
+            )
+            
+            if answers is None:
+                for i in indices:
+                    categories[i] = self.categorize_product(products[i])
+                continue
+            
+            for i, answer in zip(indices, answers):
+                if isinstance(answer, str) and answer.strip() in _VALID_CATEGORIES:
+                    categories[i] = answer.strip()
+        
+        return categories
+    
+    def analysis_requests(self, product: Dict, context: Optional[ProductContext] = None) -> Dict[str, ChatRequest]:
+        """
+        Build the deterministic requests the enhancer makes to analyze a product
+        
+        These are the requests of categorize_product, extract_product_attributes
+        and generate_keywords, so responses cached under their cache_key are
+        picked up by those methods.
+        
+        Args:
+            product: Product data dictionary
+            context: Precomputed prompt fields for product
+            
+        Returns:
+            Requests keyed by 'category', 'attributes' and 'keywords', leaving out
+            those the enhancer would answer without the API
+        """
+        context = context or self._product_context(product)
+        requests = {}
+        
+        # categorize_product only asks the API when basic mapping fails
+        if self._basic_categorization(product) == 'Other':
+            requests['category'] = self._category_request(product, context)
+        
+        attributes_request = self._attributes_request(product, context)
+        if attributes_request is not None:
+            requests['attributes'] = attributes_request
+        
+        requests['keywords'] = self._keywords_request(product, context)
+        return requests
+    
+    def request_body(self, request: ChatRequest) -> Dict:
+        """Return the chat completion parameters sent for a request"""
+        return self._chat_request(
+            request.prompt, request.max_tokens, request.temperature,
+            request.response_format, request.system, request.model
+        )
+    
+    def cache_key(self, request: ChatRequest) -> str:
+        """Return the key a request's response is cached under"""
+        return self._cache_key(
+            request.prompt, request.max_tokens, request.temperature,
+            request.response_format, request.system, request.model
+        )
+    
+    def _request_json_array(self, system: str, lines: List[str], max_tokens: int,
+                            model: Optional[str] = None) -> Optional[List]:
+        """
+        Ask for one JSON array covering several numbered products
+        
+        Sharing a request amortizes the prompt and the round trip across products.
+        
+        Returns:
+            The parsed array, or None if the request failed or the array does not
+            have one element per line
+        """
+        prompt = "Products:\n" + "\n".join(lines)
+        
+        try:
+            response = self._make_openai_request(
+                prompt, max_tokens=max_tokens, temperature=0, system=system, model=model
+            )
+            answers = load_json_bytes(response) if response else None
+        except Exception as e:
+            logger.warning(f"Batched AI request failed: {e}")
+            return None
+        
+        if not isinstance(answers, list) or len(answers) != len(lines):
+            logger.warning("Batched AI response did not match the products; retrying individually")
+            return None
+        
+        return answers
+    
+    def _product_context(self, product: Dict) -> ProductContext:
+        """Build a product's prompt fields, truncated with this enhancer's tokenizer"""
+        return ProductContext.from_product(
+            product, self._model_encoding(), self._model_encoding(self.small_model)
+        )
+    
+    def _model_encoding(self, model: Optional[str] = None) -> Any:
+        """Return the tokenizer of model (defaults to the enhancer's model), or None"""
+        return _encoding_for(model or self.model)
+    
+    def _fingerprint(self, kind: str, product: Dict) -> Tuple:
+        """Identify a product family: products differing only in description or variants match"""
+        return (
+            kind,
+            _WHITESPACE_RE.sub(' ', product.get('title', '').lower().strip()),
+            product.get('vendor', ''),
+            product.get('product_type', ''),
+            tuple(sorted(product.get('tags', [])))
+        )
+    
+    def _remember(self, fingerprint: Tuple, result: Any):
+        """Share a product family's AI result, evicting the oldest beyond _FINGERPRINT_CACHE_SIZE"""
+        with self._fingerprint_lock:
+            self._fingerprint_cache[fingerprint] = result
+            if len(self._fingerprint_cache) > _FINGERPRINT_CACHE_SIZE:
+                self._fingerprint_cache.popitem(last=False)
+    
+    def _category_request(self, product: Dict, context: Optional[ProductContext] = None) -> ChatRequest:
+        """Build the categorization request for a product"""
+        
+        context = context or self._product_context(product)
+        
+        prompt = f"""
+            Product: {context.title}
+            Type: {context.category}
+            Description: {context.category_description}
+            Tags: {context.tags_csv}
+            """
+        return ChatRequest(prompt, max_tokens=_CATEGORY_MAX_TOKENS, temperature=0,
+                           system=_CATEGORY_SYSTEM_PROMPT, model=self.small_model)
+    
+    def _attributes_request(self, product: Dict, context: Optional[ProductContext] = None) -> Optional[ChatRequest]:
+        """Build the attribute extraction request, or None if the description is too short"""
+        
+        context = context or self._product_context(product)
+        if len(context.description) < 50:
+            return None
+        
+        prompt = AI_PROMPTS['ATTRIBUTE_EXTRACTION'].format(description=_attribute_sentences(context.description))
+        return ChatRequest(prompt, max_tokens=_ATTRIBUTES_MAX_TOKENS, temperature=0,
+                           response_format=_JSON_OBJECT_FORMAT)
+    
+    def _keywords_request(self, product: Dict, context: Optional[ProductContext] = None) -> ChatRequest:
+        """Build the keyword extraction request for a product"""
+        
+        context = context or self._product_context(product)
+        
+        prompt = AI_PROMPTS['KEYWORD_EXTRACTION'].format(
+            title=context.title,
+            description=context.keywords_description,
+            category=context.category
+        )
+        return ChatRequest(prompt, max_tokens=_KEYWORDS_MAX_TOKENS, temperature=0)
+    
     def optimize_title_for_seo(self, product: Dict, max_length: int = 60) -> str:
         """
         Optimize product title for SEO
@@ -297,7 +694,11 @@ class AIEnhancer:
             Return only the optimized title, nothing else.
             """
             
-            response = self._make_openai_request(prompt, max_tokens=100)
+            # Stop reading once the title is too long to be used
+            response = self._make_openai_request(
+                prompt, max_tokens=100, cacheable=self.reuse_generated, model=self.small_model,
+                stop_when=lambda text: len(text.strip()) > max_length
+            )
             
             if response and len(response.strip()) <= max_length:
                 return response.strip()
@@ -308,7 +709,20 @@ class AIEnhancer:
         # Fallback to truncated original
         return truncate_text(original_title, max_length)
     
-    def _make_openai_request(self, prompt: str, max_tokens: int = 150, temperature: float = 0.7) -> Optional[str]:
+    def _send(self, request: ChatRequest, stop_when: Optional[Callable[[str], bool]] = None) -> Optional[str]:
+        """Make a built request through _make_openai_request"""
+        return self._make_openai_request(
+            request.prompt, max_tokens=request.max_tokens, temperature=request.temperature,
+            response_format=request.response_format, system=request.system, model=request.model,
+            stop_when=stop_when
+        )
+    
+    def _make_openai_request(self, prompt: str, max_tokens: int = 150, temperature: float = 0.7,
+                             cacheable: Optional[bool] = None,
+                             response_format: Optional[Dict] = None,
+                             system: str = _SYSTEM_PROMPT,
+                             model: Optional[str] = None,
+                             stop_when: Optional[Callable[[str], bool]] = None) -> Optional[str]:
         """
         Make a request to OpenAI API with rate limiting and error handling
         
@@ -316,30 +730,46 @@ class AIEnhancer:
             prompt: The prompt to send
             max_tokens: Maximum tokens in response
             temperature: Creativity level (0-1)
+            cacheable: Whether to reuse a cached response (defaults to temperature == 0).
+                The key covers the whole prompt, so any change to the product misses.
+            response_format: Response format constraint, e.g. JSON mode
+            system: System message holding the request's invariant instructions
+            model: Model for this request (defaults to the enhancer's model)
+            stop_when: Stream the response and stop reading once this returns True
+                for the text so far
             
         Returns:
             Response text or None if failed
         """
-        # Rate limiting
-        self._wait_for_rate_limit()
+        if cacheable is None:
+            cacheable = temperature == 0
+        
+        cache_key = None
+        if cacheable:
+            cache_key = self._cache_key(prompt, max_tokens, temperature, response_format, system, model)
+            cached = self.cache.get(cache_key)
+            if cached is not None:
+                return cached
+        
+        # Rate limiting, budgeting the prompt's tokens plus the response allowance
+        self._wait_for_rate_limit(_count_tokens(system + prompt, self._model_encoding(model)) + max_tokens)
         
         for attempt in range(self.max_retries):
             try:
-                response = self.client.chat.completions.create(
-                    model=self.model,
-                    messages=[
-                        {"role": "system", "content": "You are a helpful SEO and e-commerce expert."},
-                        {"role": "user", "content": prompt}
-                    ],
-                    max_tokens=max_tokens,
-                    temperature=temperature,
-                    timeout=30
-                )
+                request = self._chat_request(prompt, max_tokens, temperature, response_format, system, model)
+                with self._in_flight:
+                    if stop_when is None:
+                        response = self.client.chat.completions.create(**request, timeout=30)
+                        content = response.choices[0].message.content if response.choices else None
+                    else:
+                        stream = self.client.chat.completions.create(**request, stream=True, timeout=30)
+                        content = self._read_stream(stream, stop_when)
                 
-                if response.choices and len(response.choices) > 0:
-                    content = response.choices[0].message.content
-                    if content:
-                        return content.strip()
+                if content:
+                    content = content.strip()
+                    if cache_key:
+                        self.cache.set(cache_key, content)
+                    return content
                 
             except openai.RateLimitError:
                 wait_time = 2 ** attempt  # Exponential backoff
@@ -360,15 +790,52 @@ class AIEnhancer:
         
         return None
     
-    def _wait_for_rate_limit(self):
-        """Ensure minimum interval between requests"""
-        current_time = time.time()
-        time_since_last = current_time - self.last_request_time
-        
-        if time_since_last < self.min_request_interval:
-            wait_time = self.min_request_interval - time_since_last
-            time.sleep(wait_time)
-        
+    def _read_stream(self, stream, stop_when: Callable[[str], bool]) -> str:
+        """Accumulate streamed content until stop_when is satisfied or the stream ends"""
+        text = ''
+        try:
+            for chunk in stream:
+                if chunk.choices and chunk.choices[0].delta.content:
+                    text += chunk.choices[0].delta.content
+                    if stop_when(text):
+                        break
+        finally:
+            stream.close()
+        return text
+    
+    def _chat_request(self, prompt: str, max_tokens: int, temperature: float,
+                      response_format: Optional[Dict] = None, system: str = _SYSTEM_PROMPT,
+                      model: Optional[str] = None) -> Dict:
+        """Build the chat completion parameters for a prompt"""
+        request = {
+            "model": model or self.model,
+            "messages": [
+                {"role": "system", "content": system},
+                {"role": "user", "content": prompt}
+            ],
+            "max_tokens": max_tokens,
+            "temperature": temperature
+        }
+        if response_format is not None:
+            request["response_format"] = response_format
+        return request
+    
+    def _cache_key(self, prompt: str, max_tokens: int, temperature: float,
+                   response_format: Optional[Dict] = None, system: str = _SYSTEM_PROMPT,
+                   model: Optional[str] = None) -> str:
+        """Return the response cache key for a request"""
+        request = dict(
+            model=model or self.model, system=system, prompt=prompt,
+            max_tokens=max_tokens, temperature=temperature
+        )
+        # Only constrained requests carry the format, so existing entries stay valid
+        if response_format is not None:
+            request['response_format'] = response_format
+        return LLMCache.make_key(**request)
+    
+    def _wait_for_rate_limit(self, estimated_tokens: int = 0):
+        """Wait until the request and token budgets allow another request"""
+        self.rate_limiter.acquire(estimated_tokens)
         self.last_request_time = time.time()
     
     def _generate_description_from_product(self, product: Dict, max_length: int = 200) -> str:
@@ -392,7 +859,7 @@ class AIEnhancer:
             Return only the description, nothing else.
             """
             
-            response = self._make_openai_request(prompt, max_tokens=150)
+            response = self._make_openai_request(prompt, max_tokens=150, cacheable=self.reuse_generated)
             
             if response and len(response) >= 20:
                 return truncate_text(response, max_length)
@@ -448,46 +915,24 @@ class AIEnhancer:
     def _basic_categorization(self, product: Dict) -> str:
         """Basic categorization without AI"""
         
-        product_type = product.get('product_type', '').lower()
-        tags = [tag.lower() for tag in product.get('tags', [])]
-        title = product.get('title', '').lower()
-        
-        # Combine all text for matching
-        text_to_match = f"{product_type} {' '.join(tags)} {title}"
-        
-        # Check category mapping
-        for key, category in CATEGORY_MAPPING.items():
-            if key in text_to_match:
-                return category
-        
-        return 'Other'
+        category = match_category(
+            product.get('product_type', ''), *product.get('tags', []), product.get('title', '')
+        )
+        return category or 'Other'
     
     def _extract_basic_keywords(self, product: Dict, max_keywords: int = 15) -> List[str]:
         """Extract basic keywords without AI"""
         
-        keywords = set()
-        
-        # Add from title
-        title_words = re.findall(r'\b\w{3,}\b', product.get('title', '').lower())
-        keywords.update(title_words)
-        
-        # Add from product type
-        if product.get('product_type'):
-            type_words = re.findall(r'\b\w{3,}\b', product.get('product_type', '').lower())
-            keywords.update(type_words)
-        
-        # Add from tags
-        for tag in product.get('tags', []):
-            tag_words = re.findall(r'\b\w{3,}\b', tag.lower())
-            keywords.update(tag_words)
+        # Words from title, product type and tags, matched in one pass
+        text = ' '.join([product.get('title', ''), product.get('product_type') or '', *product.get('tags', [])])
+        keywords = set(_WORD_RE.findall(text.lower()))
         
         # Add vendor
         if product.get('vendor'):
             keywords.add(product.get('vendor', '').lower())
         
         # Filter out common stop words
-        stop_words = {'the', 'and', 'for', 'with', 'this', 'that', 'from', 'they', 'you', 'are', 'was', 'will', 'have', 'has', 'had'}
-        keywords = [k for k in keywords if k not in stop_words and len(k) > 2]
+        keywords = [k for k in keywords if k not in _STOP_WORDS and len(k) > 2]
         
         return list(keywords)[:max_keywords]
     
@@ -495,7 +940,11 @@ class AIEnhancer:
         """Get usage statistics (placeholder for monitoring)"""
         return {
             "model": self.model,
+            "small_model": self.small_model,
             "max_retries": self.max_retries,
             "min_request_interval": self.min_request_interval,
+            "requests_per_minute": self.rate_limiter.requests_per_minute,
+            "tokens_per_minute": self.rate_limiter.tokens_per_minute,
+            "max_concurrent": self.max_concurrent,
             "last_request_time": self.last_request_time
         }
@@ -0,0 +1,83 @@
+# src/ai/rate_limiter.py
+"""
+Thread-safe request and token rate limiting for OpenAI calls
+"""
+
+import time
+import threading
+from typing import Optional
+
+class RateLimiter:
+    """Token bucket limiting requests, and optionally tokens, per minute
+    
+    Each bucket holds a minute's allowance and refills continuously, so short
+    bursts go through immediately while sustained throughput stays within
+    min(RPM, TPM / tokens per request). Safe to share between threads; callers
+    that must wait sleep outside the lock so others can proceed.
+    """
+    
+    def __init__(self, requests_per_minute: Optional[float] = 60, tokens_per_minute: Optional[float] = None):
+        """
+        Initialize rate limiter
+        
+        Args:
+            requests_per_minute: Requests allowed per minute (None or 0 for no request limit)
+            tokens_per_minute: Tokens allowed per minute (None or 0 for no token limit)
+        """
+        self.requests_per_minute = requests_per_minute
+        self.tokens_per_minute = tokens_per_minute
+        
+        self._requests_available = float(requests_per_minute or 0)
+        self._tokens_available = float(tokens_per_minute or 0)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+    
+    def _refill(self, now: float):
+        elapsed = now - self._updated
+        self._updated = now
+        
+        if self.requests_per_minute:
+            self._requests_available = min(
+                self.requests_per_minute,
+                self._requests_available + elapsed * self.requests_per_minute / 60
+            )
+        if self.tokens_per_minute:
+            self._tokens_available = min(
+                self.tokens_per_minute,
+                self._tokens_available + elapsed * self.tokens_per_minute / 60
+            )
+    
+    def acquire(self, tokens: int = 0) -> float:
+        """
+        Block until one request (and ``tokens`` tokens) may be sent
+        
+        Args:
+            tokens: Estimated tokens the request will use
+        
+        Returns:
+            Seconds spent waiting
+        """
+        # A single request larger than the whole budget waits for a full bucket
+        if self.tokens_per_minute:
+            tokens = min(tokens, self.tokens_per_minute)
+        else:
+            tokens = 0
+        
+        waited = 0.0
+        while True:
+            with self._lock:
+                self._refill(time.monotonic())
+                
+                wait = 0.0
+                if self.requests_per_minute:
+                    wait = (1 - self._requests_available) * 60 / self.requests_per_minute
+                if tokens:
+                    wait = max(wait, (tokens - self._tokens_available) * 60 / self.tokens_per_minute)
+                
+                if wait <= 0:
+                    self._requests_available -= 1
+                    self._tokens_available -= tokens
+                    return waited
+            
+            time.sleep(wait)
+            waited += wait
@@ -4,11 +4,39 @@ Configuration management for Shopify Schema Generator
 """
 
 import os
-import yaml
-from dataclasses import dataclass, asdict
-from typing import Optional, Dict, Any
+from copy import deepcopy
+from dataclasses import dataclass, asdict, field
+from functools import lru_cache
+from typing import Optional, Dict, Any, Mapping
 from pathlib import Path
 
+from src.utils.helpers import dump_json_bytes, load_json_bytes
+
+try:
+    import tomllib
+except ImportError:  # Python < 3.11, TOML config files are unsupported
+    tomllib = None
+
+# Parsed config files, keyed by path and modification time
+_CONFIG_CACHE_SIZE = 8
+
+@lru_cache(maxsize=_CONFIG_CACHE_SIZE)
+def _load_config_data(path: str, mtime_ns: int) -> Dict[str, Any]:
+    """Parse a JSON, TOML or YAML config file; mtime_ns invalidates the cache on edits"""
+    suffix = Path(path).suffix.lower()
+    
+    with open(path, 'rb') as f:
+        if suffix == '.json':
+            return load_json_bytes(f.read())
+        
+        if suffix == '.toml':
+            if tomllib is None:
+                raise ValueError("TOML configuration files require Python 3.11 or newer")
+            return tomllib.load(f)
+        
+        import yaml
+        return yaml.load(f, Loader=getattr(yaml, 'CSafeLoader', yaml.SafeLoader))
+
 @dataclass
 class SchemaConfig:
     """Configuration for schema generation"""
@@ -21,6 +49,8 @@ class SchemaConfig:
     # AI settings
     openai_api_key: Optional[str] = None
     enable_ai_features: bool = False
+    # Cheaper model for categorization and titles (None for the enhancer's default)
+    openai_small_model: Optional[str] = field(default_factory=lambda: os.getenv('OPENAI_SMALL_MODEL'))
     
     # Generation settings
     max_products: int = 250
@@ -36,26 +66,40 @@ class SchemaConfig:
     
     @classmethod
     def from_file(cls, config_path: str) -> 'SchemaConfig':
-        """Load configuration from YAML file"""
-        with open(config_path, 'r') as f:
-            config_data = yaml.safe_load(f)
-        return cls(**config_data)
+        """Load configuration from a YAML, JSON (.json) or TOML (.toml) file"""
+        path = os.path.abspath(config_path)
+        # The cached data is shared between loads, so each config gets its own copy
+        return cls(**deepcopy(_load_config_data(path, os.stat(path).st_mtime_ns)))
     
     @classmethod
     def from_env(cls) -> 'SchemaConfig':
         """Load configuration from environment variables"""
+        return cls.from_mapping(os.environ)
+    
+    @classmethod
+    def from_mapping(cls, env: Mapping[str, str]) -> 'SchemaConfig':
+        """Load configuration from a mapping of environment variable names to values"""
         return cls(
-            shop_domain=os.getenv('SHOPIFY_SHOP_DOMAIN', ''),
-            access_token=os.getenv('SHOPIFY_ACCESS_TOKEN', ''),
-            openai_api_key=os.getenv('OPENAI_API_KEY'),
-            enable_ai_features=os.getenv('ENABLE_AI_FEATURES', 'false').lower() == 'true',
-            max_products=int(os.getenv('MAX_PRODUCTS', '250')),
+            shop_domain=env.get('SHOPIFY_SHOP_DOMAIN', ''),
+            access_token=env.get('SHOPIFY_ACCESS_TOKEN', ''),
+            openai_api_key=env.get('OPENAI_API_KEY'),
+            enable_ai_features=env.get('ENABLE_AI_FEATURES', 'false').lower() == 'true',
+            openai_small_model=env.get('OPENAI_SMALL_MODEL'),
+            max_products=int(env.get('MAX_PRODUCTS', '250')),
         )
     
     def to_file(self, config_path: str):
-        """Save configuration to YAML file"""
+        """Save configuration to a YAML file, or JSON if the path ends in .json"""
+        if config_path.lower().endswith('.json'):
+            with open(config_path, 'wb') as f:
+                f.write(dump_json_bytes(asdict(self)))
+            return
+        
+        import yaml
+        
         with open(config_path, 'w') as f:
-            yaml.dump(asdict(self), f, default_flow_style=False)
+            yaml.dump(asdict(self), f, Dumper=getattr(yaml, 'CSafeDumper', yaml.SafeDumper),
+                      default_flow_style=False)
     
     @property
     def base_url(self) -> str:
@@ -5,25 +5,72 @@ Main schema generation logic
 
 import json
 import re
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from itertools import islice
 from datetime import datetime, timedelta
-from typing import Dict, List, Optional
+from typing import BinaryIO, Callable, Dict, Iterator, List, Optional, Tuple
 import logging
 
 from .shopify_client import ShopifyClient
 from .config import SchemaConfig
-from utils.helpers import clean_html, generate_price_valid_until
-from utils.constants import CATEGORY_MAPPING, REQUIRED_PRODUCT_FIELDS
+from src.utils.helpers import clean_html, generate_price_valid_until, dump_json_bytes, match_category
+from src.utils.constants import AVAILABILITY_MAPPING, REQUIRED_PRODUCT_FIELDS
 
 logger = logging.getLogger(__name__)
 
+# Products whose AI and review calls may be in flight at once
+_DEFAULT_MAX_WORKERS = 8
+
+# Catalog sizes from which one bulk export beats paging through the REST API; the
+# export covers the whole catalog, so it is only used when all of it is generated
+_BULK_EXPORT_MIN_PRODUCTS = 2500
+
+# Offer availability indexed by whether the variant is in stock
+_AVAILABILITY = (AVAILABILITY_MAPPING['out_of_stock'], AVAILABILITY_MAPPING['in_stock'])
+
+# Products sent to a worker process per task, amortizing pickling and IPC
+_PROCESS_BATCH_SIZE = 32
+
+# Products whose AI descriptions and categories are requested together, ahead of their packages
+_AI_BATCH_SIZE = 20
+
+# Generator and shop data of the current worker process, set by _init_worker
+_worker_state = None
+
+def _init_worker(config: SchemaConfig, shop_info: Dict, collections: List[Dict]):
+    """Set up a worker process once, so shop data is not pickled with every task"""
+    global _worker_state
+    _worker_state = (SchemaGenerator(config), shop_info, collections)
+
+def _generate_product_packages(products: List[Dict]) -> List[Dict]:
+    """Generate the schema packages of a batch of products in a worker process"""
+    generator, shop_info, collections = _worker_state
+    return [generator._generate_product_package(product, shop_info, collections) for product in products]
+
 class SchemaGenerator:
     """Main class for generating structured data schemas from Shopify stores"""
     
-    def __init__(self, config: SchemaConfig, ai_enhancer=None, review_integrator=None):
+    def __init__(self, config: SchemaConfig, ai_enhancer=None, review_integrator=None,
+                 max_workers: int = _DEFAULT_MAX_WORKERS, processes: int = 1):
         self.config = config
         self.client = ShopifyClient(config)
         self.ai_enhancer = ai_enhancer
         self.review_integrator = review_integrator
+        self.max_workers = max_workers
+        self.processes = processes
+        
+        # Storefront URLs shared by every product, breadcrumb and collection schema
+        self._shop_url = f"https://{config.shop_domain}.myshopify.com"
+        self._product_url_prefix = self._shop_url + "/products/"
+        self._collection_url_prefix = self._shop_url + "/collections/"
+        
+        # (shop_info, offer fields) shared by every offer generated for that shop
+        self._offer_fields = None
+        # (collections, {collection id: (position, collection)}) for breadcrumb lookups
+        self._collection_index = None
+        # AI results requested for a batch of products, keyed by Shopify product id until used
+        self._ai_prefetched: Dict[int, Dict] = {}
     
     def generate_complete_schema_package(self) -> Dict:
         """Generate complete schema package for entire shop"""
@@ -36,11 +83,130 @@ class SchemaGenerator:
         collections = self.client.get_collections() if self.config.include_collections else []
         
         # Initialize result structure
+        schemas = self.generate_package_metadata(shop_info, collections, start_time)
+        
+        # Process products
+        schemas["products"] = list(self.iter_product_schemas(shop_info, collections))
+        schemas["total_products"] = product_count = len(schemas["products"])
+        
+        generation_time = (datetime.now() - start_time).total_seconds()
+        logger.info(f"Schema generation complete! Processed {product_count} products in {generation_time:.2f} seconds")
+        
+        return schemas
+    
+    def write_schema_package(self, fp: BinaryIO, shop_info: Optional[Dict] = None,
+                             on_product: Optional[Callable[[int, Dict], None]] = None) -> Dict:
+        """
+        Generate the complete schema package and stream it to a binary file
+        
+        Product packages are serialized and written one at a time instead of
+        being collected in memory first.
+        
+        Args:
+            fp: Binary file object to write the JSON package to
+            shop_info: Shop information, fetched from Shopify if not provided
+            on_product: Called with the running count and package after each product
+            
+        Returns:
+            The package without its product list, plus the first product
+            package under ``sample_product``
+        """
+        logger.info("Starting streamed schema generation...")
+        start_time = datetime.now()
+        
+        shop_info = shop_info if shop_info is not None else self.client.get_shop_info()
+        collections = self.client.get_collections() if self.config.include_collections else []
+        
+        schemas = self.generate_package_metadata(shop_info, collections, start_time)
+        del schemas["total_products"]
+        
+        # Write the package object member by member, leaving it open for the product list
+        fp.write(b'{')
+        for key, value in schemas.items():
+            fp.write(b'\n  ' + dump_json_bytes(key) + b': ' + dump_json_bytes(value).replace(b'\n', b'\n  ') + b',')
+        fp.write(b'\n  "products": [')
+        
+        product_count = 0
+        sample_product = None
+        for product_schemas in self.iter_product_schemas(shop_info, collections):
+            fp.write(b',\n    ' if product_count else b'\n    ')
+            fp.write(dump_json_bytes(product_schemas).replace(b'\n', b'\n    '))
+            
+            if sample_product is None:
+                sample_product = product_schemas
+            product_count += 1
+            
+            if on_product:
+                on_product(product_count, product_schemas)
+        
+        fp.write(b'\n  ]' if product_count else b']')
+        fp.write(b',\n  "total_products": %d\n}' % product_count)
+        
+        schemas["total_products"] = product_count
+        schemas["sample_product"] = sample_product
+        
+        generation_time = (datetime.now() - start_time).total_seconds()
+        logger.info(f"Schema generation complete! Processed {product_count} products in {generation_time:.2f} seconds")
+        
+        return schemas
+    
+    def stream_schema_package(self, fp: BinaryIO, shop_info: Optional[Dict] = None,
+                              on_product: Optional[Callable[[int, Dict], None]] = None) -> Dict:
+        """
+        Generate the schema package as JSON Lines and stream it to a binary file
+        
+        The first line holds the package metadata and every following line one
+        product package, so neither writing nor reading the file needs the whole
+        catalog in memory.
+        
+        Args:
+            fp: Binary file object to write the JSON Lines to
+            shop_info: Shop information, fetched from Shopify if not provided
+            on_product: Called with the running count and package after each product
+            
+        Returns:
+            The package metadata with ``total_products``, plus the first product
+            package under ``sample_product``
+        """
+        logger.info("Starting JSON Lines schema generation...")
+        start_time = datetime.now()
+        
+        shop_info = shop_info if shop_info is not None else self.client.get_shop_info()
+        collections = self.client.get_collections() if self.config.include_collections else []
+        
+        schemas = self.generate_package_metadata(shop_info, collections, start_time)
+        del schemas["total_products"]
+        
+        fp.write(dump_json_bytes(schemas, indent=False) + b'\n')
+        
+        product_count = 0
+        sample_product = None
+        for product_schemas in self.iter_product_schemas(shop_info, collections):
+            fp.write(dump_json_bytes(product_schemas, indent=False) + b'\n')
+            
+            if sample_product is None:
+                sample_product = product_schemas
+            product_count += 1
+            
+            if on_product:
+                on_product(product_count, product_schemas)
+        
+        schemas["total_products"] = product_count
+        schemas["sample_product"] = sample_product
+        
+        generation_time = (datetime.now() - start_time).total_seconds()
+        logger.info(f"Schema generation complete! Processed {product_count} products in {generation_time:.2f} seconds")
+        
+        return schemas
+    
+    def generate_package_metadata(self, shop_info: Dict, collections: List[Dict],
+                                  start_time: Optional[datetime] = None) -> Dict:
+        """Generate every part of the schema package except the product list"""
+        
         schemas = {
             "organization": self.generate_organization_schema(shop_info),
-            "products": [],
             "collections": [],
-            "generated_at": start_time.isoformat(),
+            "generated_at": (start_time or datetime.now()).isoformat(),
             "shop_domain": self.config.shop_domain,
             "total_products": 0,
             "config": {
@@ -50,16 +216,6 @@ class SchemaGenerator:
             }
         }
         
-        # Process products
-        product_count = 0
-        for product in self.client.get_products(self.config.max_products):
-            logger.info(f"Processing product {product_count + 1}: {product['title']}")
-            
-            product_schemas = self._generate_product_package(product, shop_info, collections)
-            schemas["products"].append(product_schemas)
-            
-            product_count += 1
-        
         # Process collections
         if self.config.include_collections:
             for collection in collections:
@@ -71,12 +227,103 @@ class SchemaGenerator:
                     "schema": collection_schema
                 })
         
-        schemas["total_products"] = product_count
+        return schemas
+    
+    def iter_product_schemas(self, shop_info: Dict, collections: List[Dict]) -> Iterator[Dict]:
+        """
+        Yield the schema package for each product as it is fetched, in catalog order
+        
+        When AI or review calls make packages wait on the network, several products
+        are generated at once on a thread pool, with a bounded number in flight, and
+        AI descriptions and categories are requested a batch of products at a time.
+        Otherwise, with ``processes`` above one, batches of products are generated
+        on a process pool so the CPU-bound work uses several cores.
+        """
+        # Dates, shop details and collections are refreshed per package
+        self._offer_fields = None
+        self._collection_index = None
+        self._ai_prefetched.clear()
+        
+        # The product count is only worth requesting when the limit allows a bulk export
+        if (self.config.max_products >= _BULK_EXPORT_MIN_PRODUCTS
+                and _BULK_EXPORT_MIN_PRODUCTS <= self.client.get_product_count() <= self.config.max_products):
+            products = self.client.bulk_export_products(self.config.max_products)
+        else:
+            products = self.client.get_products(self.config.max_products)
+        
+        if not self._waits_on_network() and self.processes > 1:
+            yield from self._iter_product_schemas_in_processes(products, shop_info, collections)
+            return
         
-        generation_time = (datetime.now() - start_time).total_seconds()
-        logger.info(f"Schema generation complete! Processed {product_count} products in {generation_time:.2f} seconds")
+        if self.ai_enhancer and self.config.enable_ai_features:
+            products = self._prefetch_ai_results(products)
+        
+        if not self._waits_on_network() or self.max_workers <= 1:
+            for product_count, product in enumerate(products, 1):
+                logger.info(f"Processing product {product_count}: {product['title']}")
+                yield self._generate_product_package(product, shop_info, collections)
+            return
+        
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            pending = deque()
+            for product_count, product in enumerate(products, 1):
+                logger.info(f"Processing product {product_count}: {product['title']}")
+                pending.append(executor.submit(self._generate_product_package, product, shop_info, collections))
+                
+                # Keep the pool busy without buffering the whole catalog
+                if len(pending) >= 2 * self.max_workers:
+                    yield pending.popleft().result()
+            
+            while pending:
+                yield pending.popleft().result()
+    
+    def _iter_product_schemas_in_processes(self, products: Iterator[Dict], shop_info: Dict,
+                                           collections: List[Dict]) -> Iterator[Dict]:
+        """Generate product packages in batches on a process pool, yielding them in order"""
+        products = iter(products)
+        product_count = 0
         
-        return schemas
+        with ProcessPoolExecutor(max_workers=self.processes, initializer=_init_worker,
+                                 initargs=(self.config, shop_info, collections)) as executor:
+            pending = deque()
+            while batch := list(islice(products, _PROCESS_BATCH_SIZE)):
+                product_count += len(batch)
+                logger.info(f"Processing products {product_count - len(batch) + 1}-{product_count}")
+                pending.append(executor.submit(_generate_product_packages, batch))
+                
+                # Keep every process busy without buffering the whole catalog
+                if len(pending) >= 2 * self.processes:
+                    yield from pending.popleft().result()
+            
+            while pending:
+                yield from pending.popleft().result()
+    
+    def _prefetch_ai_results(self, products: Iterator[Dict]) -> Iterator[Dict]:
+        """Pass products through, requesting their AI results a batch at a time first"""
+        products = iter(products)
+        while batch := list(islice(products, _AI_BATCH_SIZE)):
+            prefetched = [self._ai_prefetched.setdefault(product['id'], {}) for product in batch]
+            
+            try:
+                for results, description in zip(prefetched, self.ai_enhancer.enhance_products_batch(batch)):
+                    results['description'] = description
+            except Exception as e:
+                logger.warning(f"AI batch enhancement failed: {e}")
+            
+            try:
+                for results, category in zip(prefetched, self.ai_enhancer.categorize_products_batch(batch)):
+                    results['category'] = category
+            except Exception as e:
+                logger.warning(f"AI batch categorization failed: {e}")
+            
+            yield from batch
+    
+    def _waits_on_network(self) -> bool:
+        """Whether generating a product package makes network calls"""
+        return bool(
+            (self.ai_enhancer and self.config.enable_ai_features)
+            or (self.review_integrator and self.config.include_reviews)
+        )
     
     def _generate_product_package(self, product: Dict, shop_info: Dict, collections: List[Dict]) -> Dict:
         """Generate complete schema package for a single product"""
@@ -106,6 +353,8 @@ class SchemaGenerator:
     def generate_product_schema(self, product: Dict, shop_info: Dict) -> Dict:
         """Generate comprehensive Product schema markup"""
         
+        prefetched = self._ai_prefetched.pop(product.get('id'), {})
+        
         # Clean and prepare basic data
         clean_description = clean_html(product.get('body_html', ''))
         images = [img['src'] for img in product.get('images', [])]
@@ -120,25 +369,33 @@ class SchemaGenerator:
             images = None
         
         # Enhance description with AI if available
-        if self.ai_enhancer and self.config.enable_ai_features:
+        if 'description' in prefetched:
+            clean_description = prefetched['description']
+        elif self.ai_enhancer and self.config.enable_ai_features:
             try:
                 clean_description = self.ai_enhancer.enhance_description(clean_description, product)
             except Exception as e:
                 logger.warning(f"AI description enhancement failed: {e}")
         
+        # Categorize with AI if available, preferring the batch's answer
+        if 'category' in prefetched:
+            category = prefetched['category']
+        else:
+            category = self._categorize_product(product)
+        
         # Base schema structure
         schema = {
             "@context": "https://schema.org/",
             "@type": "Product",
             "name": product['title'],
             "description": clean_description,
-            "url": f"https://{self.config.shop_domain}.myshopify.com/products/{product['handle']}",
+            "url": self._product_url_prefix + product['handle'],
             "brand": {
                 "@type": "Brand",
                 "name": product.get('vendor', shop_info.get('name', 'Unknown'))
             },
             "offers": self._generate_offers(variants, shop_info),
-            "category": self._categorize_product(product)
+            "category": category
         }
         
         # Add image only if available
@@ -197,30 +454,31 @@ class SchemaGenerator:
                 "@type": "ListItem",
                 "position": 1,
                 "name": "Home",
-                "item": f"https://{self.config.shop_domain}.myshopify.com"
+                "item": self._shop_url
             }
         ]
         
         # Add collection breadcrumbs if product belongs to collections
-        product_collection_ids = [coll['id'] for coll in product.get('collections', [])]
-        if product_collection_ids and collections:
-            # Find the first matching collection
-            for collection in collections:
-                if collection['id'] in product_collection_ids:
-                    breadcrumbs.append({
-                        "@type": "ListItem",
-                        "position": len(breadcrumbs) + 1,
-                        "name": collection['title'],
-                        "item": f"https://{self.config.shop_domain}.myshopify.com/collections/{collection['handle']}"
-                    })
-                    break
+        product_collections = product.get('collections', [])
+        if product_collections and collections:
+            # Find the matching collection that comes first in the shop's list
+            index = self._collections_by_id(collections)
+            matches = [index[coll['id']] for coll in product_collections if coll['id'] in index]
+            if matches:
+                _, collection = min(matches, key=lambda match: match[0])
+                breadcrumbs.append({
+                    "@type": "ListItem",
+                    "position": len(breadcrumbs) + 1,
+                    "name": collection['title'],
+                    "item": self._collection_url_prefix + collection['handle']
+                })
         
         # Add product
         breadcrumbs.append({
             "@type": "ListItem",
             "position": len(breadcrumbs) + 1,
             "name": product['title'],
-            "item": f"https://{self.config.shop_domain}.myshopify.com/products/{product['handle']}"
+            "item": self._product_url_prefix + product['handle']
         })
         
         return {
@@ -271,22 +529,16 @@ class SchemaGenerator:
     def _generate_offers(self, variants: List[Dict], shop_info: Dict) -> List[Dict]:
         """Generate offer schemas for product variants"""
         offers = []
+        currency, price_valid_until, seller = self._shop_offer_fields(shop_info)
         
         for variant in variants:
             offer = {
                 "@type": "Offer",
                 "price": variant.get('price', '0'),
-                "priceCurrency": shop_info.get('currency', 'USD'),
-                "availability": (
-                    "https://schema.org/InStock" 
-                    if variant.get('inventory_quantity', 0) > 0 
-                    else "https://schema.org/OutOfStock"
-                ),
-                "priceValidUntil": generate_price_valid_until(),
-                "seller": {
-                    "@type": "Organization",
-                    "name": shop_info.get('name', 'Store')
-                }
+                "priceCurrency": currency,
+                "availability": _AVAILABILITY[(variant.get('inventory_quantity') or 0) > 0],
+                "priceValidUntil": price_valid_until,
+                "seller": seller
             }
             
             # Add SKU only if it's not null/empty
@@ -297,6 +549,28 @@ class SchemaGenerator:
         
         return offers
     
+    def _shop_offer_fields(self, shop_info: Dict) -> Tuple[str, str, Dict]:
+        """Currency, price validity date and seller shared by all offers of a shop"""
+        cached = self._offer_fields
+        if cached is None or cached[0] is not shop_info:
+            fields = (
+                shop_info.get('currency', 'USD'),
+                generate_price_valid_until(),
+                {"@type": "Organization", "name": shop_info.get('name', 'Store')}
+            )
+            self._offer_fields = cached = (shop_info, fields)
+        return cached[1]
+    
+    def _collections_by_id(self, collections: List[Dict]) -> Dict:
+        """Position and collection for each collection id, built once per collection list"""
+        cached = self._collection_index
+        if cached is None or cached[0] is not collections:
+            index = {}
+            for position, collection in enumerate(collections):
+                index.setdefault(collection['id'], (position, collection))
+            self._collection_index = cached = (collections, index)
+        return cached[1]
+    
     def _categorize_product(self, product: Dict) -> str:
         """Categorize product using mapping or AI"""
         
@@ -306,21 +580,12 @@ class SchemaGenerator:
             except Exception as e:
                 logger.warning(f"AI categorization failed: {e}")
         
-        # Fallback to basic mapping
-        product_type = product.get('product_type', '').lower()
-        tags = [tag.lower() for tag in product.get('tags', [])]
-        
-        # Check product type first
-        for key, category in CATEGORY_MAPPING.items():
-            if key in product_type:
+        # Fallback to basic mapping, checking product type first, then tags in order
+        for text in (product.get('product_type', ''), *product.get('tags', [])):
+            category = match_category(text)
+            if category:
                 return category
         
-        # Check tags
-        for tag in tags:
-            for key, category in CATEGORY_MAPPING.items():
-                if key in tag:
-                    return category
-        
         return 'Other'
     
     def _extract_product_properties(self, product: Dict) -> Dict:
@@ -354,11 +619,7 @@ class SchemaGenerator:
                 "offers": {
                     "@type": "Offer",
                     "price": variant.get('price', '0'),
-                    "availability": (
-                        "https://schema.org/InStock" 
-                        if variant.get('inventory_quantity', 0) > 0 
-                        else "https://schema.org/OutOfStock"
-                    )
+                    "availability": _AVAILABILITY[(variant.get('inventory_quantity') or 0) > 0]
                 }
             }
             
@@ -452,10 +713,10 @@ class SchemaGenerator:
             "@type": "CollectionPage",
             "name": collection['title'],
             "description": clean_html(collection.get('body_html', '')),
-            "url": f"https://{self.config.shop_domain}.myshopify.com/collections/{collection['handle']}",
+            "url": self._collection_url_prefix + collection['handle'],
             "isPartOf": {
                 "@type": "WebSite",
                 "name": shop_info.get('name', ''),
-                "url": f"https://{self.config.shop_domain}.myshopify.com"
+                "url": self._shop_url
             }
         }
\ No newline at end of file
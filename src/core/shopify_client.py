@@ -6,11 +6,59 @@ Shopify API client with rate limiting and error handling
 import requests
 import time
 import logging
+import threading
 from typing import Dict, List, Optional, Generator
-from urllib.parse import urljoin
+
+from src.utils.constants import SHOPIFY_COLLECTION_FIELDS, SHOPIFY_PRODUCT_FIELDS
+from src.utils.helpers import load_json_bytes
 
 logger = logging.getLogger(__name__)
 
+# Shopify's leaky bucket: requests that may burst, and requests restored per second
+_BUCKET_SIZE = 40
+_LEAK_RATE = 2.0
+
+# GraphQL Admin API cost bucket (points that may burst, points restored per second),
+# corrected from each response's throttle status, and the cost assumed per query
+_GRAPHQL_BUCKET_SIZE = 1000.0
+_GRAPHQL_RESTORE_RATE = 50.0
+_GRAPHQL_QUERY_COST = 10
+
+# Path segment preceding the API version in Shopify admin URLs
+_API_PATH = '/admin/api/'
+
+# Bulk operation exporting the product fields the schema generator uses
+_BULK_PRODUCTS_QUERY = """
+{
+  products {
+    edges {
+      node {
+        id handle title bodyHtml vendor productType tags
+        images { edges { node { url } } }
+        variants { edges { node { id title sku price inventoryQuantity weight weightUnit } } }
+      }
+    }
+  }
+}
+"""
+
+_BULK_RUN_MUTATION = """
+mutation($query: String!) {
+  bulkOperationRunQuery(query: $query) {
+    bulkOperation { id status }
+    userErrors { field message }
+  }
+}
+"""
+
+_BULK_STATUS_QUERY = "{ currentBulkOperation { id status errorCode objectCount url } }"
+
+# Bulk operation states after which no more output will arrive
+_FINAL_BULK_STATES = frozenset({'COMPLETED', 'FAILED', 'CANCELED', 'EXPIRED'})
+
+# GraphQL weight units as REST spells them
+_WEIGHT_UNITS = {'GRAMS': 'g', 'KILOGRAMS': 'kg', 'OUNCES': 'oz', 'POUNDS': 'lb'}
+
 class ShopifyAPIError(Exception):
     """Custom exception for Shopify API errors"""
     pass
@@ -18,44 +66,120 @@ class ShopifyAPIError(Exception):
 class ShopifyClient:
     """Shopify API client with built-in rate limiting and pagination"""
     
-    def __init__(self, config):
+    def __init__(self, config, session: Optional[requests.Session] = None):
         self.config = config
-        self.session = requests.Session()
-        self.session.headers.update({
+        self._url_prefix = config.base_url.rstrip('/')
+        headers = {
             'X-Shopify-Access-Token': config.access_token,
             'Content-Type': 'application/json'
-        })
-        self.rate_limit_remaining = 40  # Shopify's bucket size
-        self.rate_limit_reset_time = time.time()
+        }
+        
+        if session is None:
+            self.session = requests.Session()
+            self.session.headers.update(headers)
+            self._request_headers = None
+        else:
+            # A shared session may serve other shops, so credentials go on each request instead
+            self.session = session
+            self._request_headers = headers
+        self.rate_limit_remaining = _BUCKET_SIZE
+        self._bucket_size = _BUCKET_SIZE
+        self._bucket_updated = time.monotonic()
+        self._bucket_lock = threading.Lock()
+        
+        # GraphQL is throttled by query cost, separately from the REST bucket
+        self.graphql_points_available = _GRAPHQL_BUCKET_SIZE
+        self._graphql_bucket_size = _GRAPHQL_BUCKET_SIZE
+        self._graphql_restore_rate = _GRAPHQL_RESTORE_RATE
+        self._graphql_updated = self._bucket_updated
+    
+    def _wait_for_rate_limit(self):
+        """Reserve a request in Shopify's leaky bucket, sleeping until it has room
+        
+        The bucket is mirrored locally and refilled at Shopify's leak rate, so
+        requests are paced to the sustained rate instead of running into 429s.
+        """
+        with self._bucket_lock:
+            now = time.monotonic()
+            self.rate_limit_remaining = min(
+                self._bucket_size,
+                self.rate_limit_remaining + (now - self._bucket_updated) * _LEAK_RATE
+            )
+            self._bucket_updated = now
+            
+            wait = (1 - self.rate_limit_remaining) / _LEAK_RATE
+            self.rate_limit_remaining -= 1
+        
+        if wait > 0:
+            logger.debug(f"Shopify rate limit reached, waiting {wait:.2f} seconds")
+            time.sleep(wait)
     
     def _handle_rate_limit(self, response):
-        """Handle Shopify's leaky bucket rate limiting"""
+        """Correct the local bucket with the usage Shopify reports"""
         if 'X-Shopify-Shop-Api-Call-Limit' in response.headers:
             current, limit = map(int, response.headers['X-Shopify-Shop-Api-Call-Limit'].split('/'))
-            self.rate_limit_remaining = limit - current
             
-            # If we're close to the limit, wait a bit
-            if self.rate_limit_remaining < 5:
-                logger.warning("Approaching rate limit, waiting 2 seconds...")
-                time.sleep(2)
+            # Other apps share the bucket, so never assume more room than Shopify reports
+            with self._bucket_lock:
+                self._bucket_size = limit
+                self.rate_limit_remaining = min(self.rate_limit_remaining, limit - current)
+    
+    def _wait_for_graphql_cost(self, cost: float):
+        """Reserve cost points in Shopify's GraphQL bucket, sleeping until it has room"""
+        with self._bucket_lock:
+            now = time.monotonic()
+            self.graphql_points_available = min(
+                self._graphql_bucket_size,
+                self.graphql_points_available + (now - self._graphql_updated) * self._graphql_restore_rate
+            )
+            self._graphql_updated = now
+            
+            wait = (cost - self.graphql_points_available) / self._graphql_restore_rate
+            self.graphql_points_available -= cost
+        
+        if wait > 0:
+            logger.debug(f"Shopify GraphQL cost limit reached, waiting {wait:.2f} seconds")
+            time.sleep(wait)
+    
+    def _handle_graphql_cost(self, response: Dict):
+        """Correct the local GraphQL bucket with the throttle status Shopify reports"""
+        status = response.get('extensions', {}).get('cost', {}).get('throttleStatus')
+        if status:
+            with self._bucket_lock:
+                self._graphql_bucket_size = status['maximumAvailable']
+                self._graphql_restore_rate = status['restoreRate']
+                self.graphql_points_available = min(self.graphql_points_available, status['currentlyAvailable'])
     
     def _make_request(self, method: str, endpoint: str, **kwargs) -> Dict:
         """Make a request to the Shopify API with error handling"""
+        return self._send_request(method, endpoint, **kwargs).json()
+    
+    def _send_request(self, method: str, endpoint: str, rest_limited: bool = True, **kwargs) -> requests.Response:
+        """Make a request to the Shopify API and return the ``requests.Response``
+        
+        The response has already passed ``raise_for_status``; callers decode
+        the JSON body themselves.
+        
+        GraphQL requests pass ``rest_limited=False``, as they are throttled by
+        query cost instead of the REST leaky bucket.
+        """
         
         # Ensure proper URL building 
         if not endpoint.startswith('/'):
             endpoint = '/' + endpoint
         
-        url = f"{self.config.base_url}{endpoint}"  # This should now be correct
+        url = self._url_prefix + endpoint
         
         try:
-            response = self.session.request(method, url, **kwargs)
+            if rest_limited:
+                self._wait_for_rate_limit()
+            response = self.session.request(method, url, headers=self._request_headers, **kwargs)
             self._handle_rate_limit(response)
             
             if response.status_code == 429:
                 retry_after = int(response.headers.get('Retry-After', 2))
                 time.sleep(retry_after)
-                return self._make_request(method, endpoint, **kwargs)
+                return self._send_request(method, endpoint, rest_limited, **kwargs)
             
             response.raise_for_status()
             
@@ -63,7 +187,7 @@ class ShopifyClient:
             if 'application/json' not in response.headers.get('content-type', ''):
                 raise ShopifyAPIError(f"Non-JSON response: {response.text[:100]}...")
             
-            return response.json()
+            return response
             
         except requests.RequestException as e:
             raise ShopifyAPIError(f"API request failed: {e}")
@@ -72,14 +196,18 @@ class ShopifyClient:
         """Get shop information"""
         return self._make_request('GET', '/shop.json').get('shop', {})
     
+    def get_product_count(self) -> int:
+        """Get the number of products in the shop"""
+        return self._make_request('GET', '/products/count.json').get('count', 0)
+    
     def get_products(self, limit: int = 250) -> Generator[Dict, None, None]:
         """Get products with pagination"""
-        params = {'limit': min(limit, 250)}
+        params = {'limit': min(limit, 250), 'fields': ','.join(SHOPIFY_PRODUCT_FIELDS)}
         endpoint = '/products.json'
         
         while endpoint and limit > 0:
-            response = self._make_request('GET', endpoint, params=params)
-            products = response.get('products', [])
+            response = self._send_request('GET', endpoint, params=params)
+            products = response.json().get('products', [])
             
             for product in products[:limit]:
                 yield product
@@ -87,20 +215,133 @@ class ShopifyClient:
                 if limit <= 0:
                     return
             
-            # Handle pagination
-            link_header = self.session.head(urljoin(self.config.base_url, endpoint)).headers.get('Link', '')
-            next_endpoint = self._parse_next_link(link_header)
-            endpoint = next_endpoint
-            params = {}  # Clear params for subsequent requests
+            # Handle pagination; the page's own response carries the next link
+            endpoint = self._parse_next_link(response.headers.get('Link', ''))
+            params = {}  # Next links already carry limit and fields
+    
+    def bulk_export_products(self, limit: Optional[int] = None, poll_interval: float = 5.0) -> Generator[Dict, None, None]:
+        """
+        Export products with a GraphQL bulk operation
+        
+        Shopify runs the query in the background and writes every product to one
+        JSONL file, so large catalogs take a single job instead of one request per
+        page. Products are yielded in REST shape as the file is streamed.
+        
+        The export always covers the whole catalog; limit only stops reading the
+        file early, so for a limit well below the shop's product count paging
+        with get_products is cheaper.
+        
+        Args:
+            limit: Maximum number of products to yield (None for all)
+            poll_interval: Seconds between bulk operation status checks
+        """
+        result = self._graphql(_BULK_RUN_MUTATION, {'query': _BULK_PRODUCTS_QUERY})['bulkOperationRunQuery']
+        if result.get('userErrors'):
+            raise ShopifyAPIError(f"Bulk operation rejected: {result['userErrors']}")
+        
+        operation = result['bulkOperation']
+        while operation['status'] not in _FINAL_BULK_STATES:
+            time.sleep(poll_interval)
+            operation = self._graphql(_BULK_STATUS_QUERY)['currentBulkOperation']
+        
+        if operation['status'] != 'COMPLETED':
+            raise ShopifyAPIError(
+                f"Bulk operation {operation['id']} ended with status {operation['status']}"
+                f" ({operation.get('errorCode')})"
+            )
+        
+        if not operation.get('url'):  # Shops without products produce no file
+            return
+        
+        # The signed download URL must not receive the shop's access token
+        try:
+            with requests.get(operation['url'], stream=True, timeout=60) as response:
+                response.raise_for_status()
+                yield from self._iter_bulk_products(response.iter_lines(), limit)
+        except requests.RequestException as e:
+            raise ShopifyAPIError(f"Bulk operation download failed: {e}")
+    
+    def _iter_bulk_products(self, lines, limit: Optional[int] = None) -> Generator[Dict, None, None]:
+        """Reassemble bulk JSONL lines, where images and variants follow their product, into products"""
+        product = None
+        count = 0
+        
+        for line in lines:
+            if not line:
+                continue
+            node = load_json_bytes(line)
+            
+            if '__parentId' not in node:
+                if product is not None:
+                    yield product
+                    count += 1
+                    if limit is not None and count >= limit:
+                        return
+                product = self._rest_product(node)
+            elif product is None or node['__parentId'] != product['admin_graphql_api_id']:
+                logger.debug(f"Skipping bulk export line without its product: {node.get('__parentId')}")
+            elif 'url' in node:
+                product['images'].append({'src': node['url']})
+            else:
+                product['variants'].append(self._rest_variant(node))
+        
+        if product is not None and (limit is None or count < limit):
+            yield product
+    
+    def _rest_product(self, node: Dict) -> Dict:
+        """Convert a bulk export product node to the REST product shape"""
+        return {
+            'id': int(node['id'].rsplit('/', 1)[-1]),
+            'admin_graphql_api_id': node['id'],
+            'handle': node.get('handle', ''),
+            'title': node.get('title', ''),
+            'body_html': node.get('bodyHtml') or '',
+            'vendor': node.get('vendor', ''),
+            'product_type': node.get('productType', ''),
+            'tags': node.get('tags', []),
+            'images': [],
+            'variants': []
+        }
+    
+    def _rest_variant(self, node: Dict) -> Dict:
+        """Convert a bulk export variant node to the REST variant shape"""
+        return {
+            'id': int(node['id'].rsplit('/', 1)[-1]),
+            'title': node.get('title', ''),
+            'sku': node.get('sku'),
+            'price': node.get('price', '0'),
+            'inventory_quantity': node.get('inventoryQuantity') or 0,
+            'weight': node.get('weight'),
+            'weight_unit': _WEIGHT_UNITS.get(node.get('weightUnit'), 'g')
+        }
+    
+    def _graphql(self, query: str, variables: Optional[Dict] = None, cost: float = _GRAPHQL_QUERY_COST) -> Dict:
+        """Run a GraphQL Admin API query and return its data, pacing queries by cost"""
+        while True:
+            self._wait_for_graphql_cost(cost)
+            response = self._make_request(
+                'POST', '/graphql.json', rest_limited=False, json={'query': query, 'variables': variables or {}}
+            )
+            self._handle_graphql_cost(response)
+            
+            errors = response.get('errors')
+            # The bucket now reflects Shopify's, so the next wait covers the shortfall
+            if errors and all(error.get('extensions', {}).get('code') == 'THROTTLED' for error in errors):
+                continue
+            if errors:
+                raise ShopifyAPIError(f"GraphQL request failed: {errors}")
+            return response.get('data', {})
     
     def get_collections(self) -> List[Dict]:
         """Get all collections (both custom and smart collections)"""
+        params = {'fields': ','.join(SHOPIFY_COLLECTION_FIELDS)}
+        
         try:
             all_collections = []
             
             # Try to get custom collections
             try:
-                custom_response = self._make_request('GET', '/custom_collections.json')
+                custom_response = self._make_request('GET', '/custom_collections.json', params=params)
                 custom_collections = custom_response.get('custom_collections', [])
                 all_collections.extend(custom_collections)
             except ShopifyAPIError:
@@ -108,7 +349,7 @@ class ShopifyClient:
             
             # Try to get smart collections  
             try:
-                smart_response = self._make_request('GET', '/smart_collections.json')
+                smart_response = self._make_request('GET', '/smart_collections.json', params=params)
                 smart_collections = smart_response.get('smart_collections', [])
                 all_collections.extend(smart_collections)
             except ShopifyAPIError:
@@ -126,14 +367,18 @@ class ShopifyClient:
         return self._make_request('GET', endpoint).get('metafields', [])
     
     def _parse_next_link(self, link_header: str) -> Optional[str]:
-        """Parse pagination link from Link header"""
+        """Parse the next page's endpoint, relative to the versioned API URL, from a Link header"""
         if not link_header:
             return None
         
-        import re
-        match = re.search(r'<([^>]+)>; rel="next"', link_header)
-        if match:
-            # Extract just the path from the full URL
-            full_url = match.group(1)
-            return full_url.split('/admin/api/')[1] if '/admin/api/' in full_url else None
-        return None
\ No newline at end of file
+        # The next link is the <url> immediately preceding rel="next"
+        rel = link_header.rfind('rel="next"')
+        start = link_header.rfind('<', 0, rel) + 1 if rel != -1 else 0
+        end = link_header.find('>', start) if start else -1
+        if end == -1:
+            return None
+        
+        # Keep the path after the API version, which the client's URL prefix already holds
+        api = link_header.find(_API_PATH, start, end)
+        path = link_header.find('/', api + len(_API_PATH), end) if api != -1 else -1
+        return link_header[path:end] if path != -1 else None
\ No newline at end of file
@@ -57,6 +57,14 @@ CATEGORY_MAPPING = {
     'industrial': 'Industrial & Scientific'
 }
 
+# Shopify REST fields the generator reads; fetching only these shrinks each page
+SHOPIFY_PRODUCT_FIELDS = [
+    'id', 'handle', 'title', 'body_html', 'vendor', 'product_type',
+    'tags', 'images', 'variants'
+]
+
+SHOPIFY_COLLECTION_FIELDS = ['id', 'handle', 'title', 'body_html']
+
 # Required fields for different schema types
 REQUIRED_PRODUCT_FIELDS = [
     'name',
@@ -5,24 +5,45 @@ Utility functions for the schema generator
 
 import re
 import html
+import json
 from datetime import datetime, timedelta
-from typing import Dict, List, Optional, Any
+from functools import lru_cache
+from itertools import islice
+from typing import Dict, List, Optional, Any, BinaryIO, Iterator
 from bs4 import BeautifulSoup
 
+from .constants import CATEGORY_MAPPING
+
+try:
+    import orjson
+except ImportError:  # optional, stdlib json is used instead
+    orjson = None
+
+try:
+    import ijson
+except ImportError:  # optional, JSON files are loaded whole instead
+    ijson = None
+
+try:
+    import lxml.etree
+    import lxml.html
+except ImportError:  # optional, BeautifulSoup's pure Python parser is used instead
+    lxml = None
+
+# Errors raised for malformed JSON, whether parsed whole or streamed
+JSON_DECODE_ERRORS = (json.JSONDecodeError,) + ((ijson.JSONError,) if ijson is not None else ())
+
+# Product HTML is cleaned by the generator and by several AI prompts; parse each body once
+_CLEAN_HTML_CACHE_SIZE = 1024
+
+@lru_cache(maxsize=_CLEAN_HTML_CACHE_SIZE)
 def clean_html(html_content: str) -> str:
     """Clean HTML content to extract plain text"""
     if not html_content:
         return ""
     
     # Parse HTML and extract text
-    soup = BeautifulSoup(html_content, 'html.parser')
-    
-    # Remove script and style elements
-    for script in soup(["script", "style"]):
-        script.decompose()
-    
-    # Get text and clean up whitespace
-    text = soup.get_text()
+    text = _html_text(html_content)
     
     # Clean up whitespace
     lines = (line.strip() for line in text.splitlines())
@@ -34,6 +55,23 @@ def clean_html(html_content: str) -> str:
     
     return text.strip()
 
+def _html_text(html_content: str) -> str:
+    """Text of an HTML fragment without its script and style elements"""
+    if lxml is not None:
+        try:
+            document = lxml.html.fromstring(html_content)
+        except (lxml.etree.ParserError, ValueError):  # e.g. whitespace only
+            pass
+        else:
+            for element in list(document.iter('script', 'style')):
+                element.drop_tree()
+            return document.text_content()
+    
+    soup = BeautifulSoup(html_content, 'html.parser')
+    for script in soup(["script", "style"]):
+        script.decompose()
+    return soup.get_text()
+
 def generate_price_valid_until(months: int = 6) -> str:
     """Generate a price valid until date"""
     future_date = datetime.now() + timedelta(days=30 * months)
@@ -133,6 +171,29 @@ def extract_materials(text: str) -> List[str]:
     
     return found_materials
 
+# Category keys in mapping order; earlier keys take precedence
+_CATEGORY_KEYS = tuple(CATEGORY_MAPPING.items())
+_CATEGORY_MATCH_CACHE_SIZE = 4096
+
+@lru_cache(maxsize=_CATEGORY_MATCH_CACHE_SIZE)
+def _category_key_index(text: str) -> int:
+    """Index of the first category key contained in text, or len(_CATEGORY_KEYS)"""
+    for index, (key, _) in enumerate(_CATEGORY_KEYS):
+        if key in text:
+            return index
+    return len(_CATEGORY_KEYS)
+
+def match_category(*texts: str) -> Optional[str]:
+    """
+    Return the category of the earliest CATEGORY_MAPPING key found in any of texts
+    
+    Product types and tags repeat across a catalog, so each distinct text is
+    scanned once. Keys contain no spaces, so matching texts separately finds
+    the same key as matching them joined with spaces.
+    """
+    index = min((_category_key_index(text.lower()) for text in texts if text), default=len(_CATEGORY_KEYS))
+    return _CATEGORY_KEYS[index][1] if index < len(_CATEGORY_KEYS) else None
+
 def validate_url(url: str) -> bool:
     """Validate if a string is a valid URL"""
     if not url:
@@ -186,4 +247,52 @@ def generate_sku(product_title: str, variant_title: str = None, fallback: str =
     sku = re.sub(r'[^a-zA-Z0-9\-]', '', sku.replace(' ', '-'))
     sku = re.sub(r'-+', '-', sku).strip('-').upper()
     
-    return sku if sku else fallback or 'UNKNOWN-SKU'
\ No newline at end of file
+    return sku if sku else fallback or 'UNKNOWN-SKU'
+
+def dump_json_bytes(data: Any, indent: bool = True) -> bytes:
+    """Serialize data to UTF-8 encoded JSON, using orjson when it is installed"""
+    if orjson is not None:
+        option = orjson.OPT_NON_STR_KEYS | (orjson.OPT_INDENT_2 if indent else 0)
+        return orjson.dumps(data, option=option, default=str)
+    
+    return json.dumps(data, indent=2 if indent else None, ensure_ascii=False, default=str).encode('utf-8')
+
+def load_json_bytes(data: bytes) -> Any:
+    """Parse UTF-8 encoded JSON, using orjson when it is installed"""
+    if orjson is not None:
+        return orjson.loads(data)
+    
+    return json.loads(data)
+
+def write_json(fp: BinaryIO, data: Any) -> None:
+    """Write data as indented UTF-8 JSON to a binary file
+    
+    Without orjson the stdlib encoder's chunks are written as they are produced,
+    so the serialized document is never held in memory as a single string.
+    """
+    if orjson is not None:
+        fp.write(dump_json_bytes(data))
+        return
+    
+    encoder = json.JSONEncoder(indent=2, ensure_ascii=False, default=str)
+    for chunk in encoder.iterencode(data):
+        fp.write(chunk.encode('utf-8'))
+
+def iter_json_items(path: str, prefix: str) -> Iterator[Any]:
+    """Yield the items found at an ijson prefix (e.g. 'products.item') in a JSON file
+    
+    The file is parsed incrementally, so only the item being yielded is held in
+    memory. Requires ijson; callers should check ``ijson is not None`` first.
+    """
+    with open(path, 'rb') as f:
+        yield from ijson.items(f, prefix, use_float=True)
+
+def iter_json_lines(path: str, skip: int = 0) -> Iterator[Any]:
+    """Yield the value on each non-blank line of a JSON Lines file, after the first skip lines
+    
+    Only the line being yielded is held in memory; ijson is not needed.
+    """
+    with open(path, 'rb') as f:
+        for line in islice(f, skip, None):
+            if line.strip():
+                yield load_json_bytes(line)
@@ -3,27 +3,58 @@
 Schema validation logic for structured data
 """
 
+import re
 import json
 import requests
 from bs4 import BeautifulSoup
-from typing import Dict, List, Optional, Any
+from collections import OrderedDict
+from typing import Dict, List, Optional, Any, Tuple
 import logging
 from urllib.parse import urljoin
 
-from utils.constants import (
+from src.utils.constants import (
     REQUIRED_PRODUCT_FIELDS, 
     REQUIRED_ORGANIZATION_FIELDS,
     GOOGLE_RICH_RESULTS_REQUIREMENTS,
     SCHEMA_TYPES
 )
-from utils.exceptions import ValidationError
+from src.utils.exceptions import ValidationError
 
 logger = logging.getLogger(__name__)
 
+# Google requirements flattened once per schema type: (required, recommended, image requirements)
+_GOOGLE_RULES = {
+    schema_type: (
+        tuple(requirements.get('required', [])),
+        tuple(requirements.get('recommended', [])),
+        requirements.get('image_requirements', {})
+    )
+    for schema_type, requirements in GOOGLE_RICH_RESULTS_REQUIREMENTS.items()
+}
+
+# Field lists checked on every schema, built once instead of per call
+_PRODUCT_REQUIRED_FIELDS = tuple(REQUIRED_PRODUCT_FIELDS)
+_PRODUCT_RECOMMENDED_FIELDS = ('brand', 'sku', 'description', 'category')
+_ORGANIZATION_REQUIRED_FIELDS = tuple(REQUIRED_ORGANIZATION_FIELDS)
+_ORGANIZATION_RECOMMENDED_FIELDS = ('description', 'contactPoint', 'address', 'sameAs')
+_REQUIRED_OFFER_FIELDS = ('price', 'priceCurrency', 'availability')
+
+# Distinct Google requirement signatures remembered per validator
+_GOOGLE_CACHE_SIZE = 256
+
+_URL_PATTERN = re.compile(
+    r'^https?://'  # http:// or https://
+    r'(?:(?:[A-Z0-9](?:[A-Z0-9-]{0,61}[A-Z0-9])?\.)+[A-Z]{2,6}\.?|'  # domain...
+    r'localhost|'  # localhost...
+    r'\d{1,3}\.\d{1,3}\.\d{1,3}\.\d{1,3})'  # ...or ip
+    r'(?::\d+)?'  # optional port
+    r'(?:/?|[/?]\S+)$', re.IGNORECASE)
+
 class SchemaValidator:
     """Validate schemas against various standards and requirements"""
     
     def __init__(self):
+        self._google_cache: 'OrderedDict[Tuple, Dict]' = OrderedDict()
         self.session = requests.Session()
         self.session.headers.update({
             'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'
@@ -45,16 +76,14 @@ class SchemaValidator:
             result['valid'] = False
         
         # Check required fields
-        for field in REQUIRED_PRODUCT_FIELDS:
-            if field not in schema or not schema[field]:
+        for field in _PRODUCT_REQUIRED_FIELDS:
+            if not schema.get(field):
                 result['errors'].append(f"Missing required field: {field}")
                 result['valid'] = False
         
         # Validate offers
         if 'offers' in schema:
-            offers_validation = self._validate_offers(schema['offers'])
-            if not offers_validation['valid']:
-                result['errors'].extend(offers_validation['errors'])
+            if not self._validate_offers(schema['offers'], result['errors']):
                 result['valid'] = False
         
         # Validate images
@@ -64,9 +93,8 @@ class SchemaValidator:
                 result['warnings'].extend(image_validation['warnings'])
         
         # Check for recommended fields
-        recommended_fields = ['brand', 'sku', 'description', 'category']
-        for field in recommended_fields:
-            if field not in schema or not schema[field]:
+        for field in _PRODUCT_RECOMMENDED_FIELDS:
+            if not schema.get(field):
                 result['warnings'].append(f"Recommended field missing: {field}")
         
         return result
@@ -87,8 +115,8 @@ class SchemaValidator:
             result['valid'] = False
         
         # Check required fields
-        for field in REQUIRED_ORGANIZATION_FIELDS:
-            if field not in schema or not schema[field]:
+        for field in _ORGANIZATION_REQUIRED_FIELDS:
+            if not schema.get(field):
                 result['errors'].append(f"Missing required field: {field}")
                 result['valid'] = False
         
@@ -99,8 +127,7 @@ class SchemaValidator:
                 result['valid'] = False
         
         # Check for recommended fields
-        recommended_fields = ['description', 'contactPoint', 'address', 'sameAs']
-        for field in recommended_fields:
+        for field in _ORGANIZATION_RECOMMENDED_FIELDS:
             if field not in schema:
                 result['warnings'].append(f"Recommended field missing: {field}")
         
@@ -260,39 +287,42 @@ class SchemaValidator:
             logger.error(f"Error analyzing structured data: {e}")
             return {"error": f"Analysis failed: {e}"}
     
-    def _validate_offers(self, offers: Any) -> Dict:
-        """Validate offers data"""
+    def _validate_offers(self, offers: Any, errors: List[str]) -> bool:
+        """Validate offers data, appending problems to the caller's error list
         
-        result = {'valid': True, 'errors': []}
+        Returns whether the offers are valid. Writing into the caller's list
+        avoids building a throwaway result dict for every product.
+        """
+        
+        valid = True
         
         if not isinstance(offers, list):
             offers = [offers]
         
         for i, offer in enumerate(offers):
             if not isinstance(offer, dict):
-                result['errors'].append(f"Offer {i+1} must be an object")
-                result['valid'] = False
+                errors.append(f"Offer {i+1} must be an object")
+                valid = False
                 continue
             
             if offer.get('@type') != 'Offer':
-                result['errors'].append(f"Offer {i+1} must have @type 'Offer'")
-                result['valid'] = False
+                errors.append(f"Offer {i+1} must have @type 'Offer'")
+                valid = False
             
             # Check required offer fields
-            required_offer_fields = ['price', 'priceCurrency', 'availability']
-            for field in required_offer_fields:
+            for field in _REQUIRED_OFFER_FIELDS:
                 if field not in offer:
-                    result['errors'].append(f"Offer {i+1} missing required field: {field}")
-                    result['valid'] = False
+                    errors.append(f"Offer {i+1} missing required field: {field}")
+                    valid = False
             
             # Validate availability URL
             if 'availability' in offer:
                 availability = offer['availability']
                 if isinstance(availability, str) and not availability.startswith('https://schema.org/'):
-                    result['errors'].append(f"Offer {i+1} availability should use schema.org URL")
-                    result['valid'] = False
+                    errors.append(f"Offer {i+1} availability should use schema.org URL")
+                    valid = False
         
-        return result
+        return valid
     
     def _validate_images(self, images: Any) -> Dict:
         """Validate image data"""
@@ -386,16 +416,7 @@ class SchemaValidator:
         if not url or not isinstance(url, str):
             return False
         
-        import re
-        url_pattern = re.compile(
-            r'^https?://'  # http:// or https://
-            r'(?:(?:[A-Z0-9](?:[A-Z0-9-]{0,61}[A-Z0-9])?\.)+[A-Z]{2,6}\.?|'  # domain...
-            r'localhost|'  # localhost...
-            r'\d{1,3}\.\d{1,3}\.\d{1,3}\.\d{1,3})'  # ...or ip
-            r'(?::\d+)?'  # optional port
-            r'(?:/?|[/?]\S+)$', re.IGNORECASE)
-        
-        return url_pattern.match(url) is not None
+        return _URL_PATTERN.match(url) is not None
     
     def _get_current_timestamp(self) -> str:
         """Get current timestamp in ISO format"""
@@ -403,39 +424,68 @@ class SchemaValidator:
         return datetime.now().isoformat()
 
     def validate_against_google_requirements(self, schema: Dict) -> Dict:
-        """Validate schema against Google Rich Results requirements"""
+        """Validate schema against Google Rich Results requirements
         
-        result = {
-            'valid': True,
-            'errors': [],
-            'warnings': [],
-            'eligible_for_rich_results': True
-        }
+        The outcome depends only on the schema type, which required and
+        recommended fields are missing, and whether an image is present. Results
+        are memoized on that signature, since products built from the same
+        template nearly always share it.
+        """
         
         schema_type = self._get_schema_type(schema)
+        rules = _GOOGLE_RULES.get(schema_type)
         
-        if schema_type in GOOGLE_RICH_RESULTS_REQUIREMENTS:
-            requirements = GOOGLE_RICH_RESULTS_REQUIREMENTS[schema_type]
-            
-            # Check required fields
-            for field in requirements.get('required', []):
-                if field not in schema or not schema[field]:
-                    result['errors'].append(f"Google requires field: {field}")
-                    result['valid'] = False
-                    result['eligible_for_rich_results'] = False
-            
-            # Check recommended fields
-            for field in requirements.get('recommended', []):
-                if field not in schema or not schema[field]:
-                    result['warnings'].append(f"Google recommends field: {field}")
-            
-            # Special validation for Product images
-            if schema_type == 'Product' and 'image' in schema:
-                image_reqs = requirements.get('image_requirements', {})
-                if image_reqs:
-                    result['warnings'].append(
-                        f"Ensure images meet Google requirements: "
-                        f"min {image_reqs.get('min_width', 160)}x{image_reqs.get('min_height', 90)} pixels"
-                    )
-        
-        return result
\ No newline at end of file
+        if not rules:
+            return {
+                'valid': True,
+                'errors': [],
+                'warnings': [],
+                'eligible_for_rich_results': True
+            }
+        
+        required, recommended, image_reqs = rules
+        signature = (
+            schema_type,
+            tuple(field for field in required if not schema.get(field)),
+            tuple(field for field in recommended if not schema.get(field)),
+            'image' in schema
+        )
+        
+        cached = self._google_cache.get(signature)
+        if cached is None:
+            cached = self._build_google_result(signature, image_reqs)
+            self._google_cache[signature] = cached
+            if len(self._google_cache) > _GOOGLE_CACHE_SIZE:
+                self._google_cache.popitem(last=False)
+        else:
+            self._google_cache.move_to_end(signature)
+        
+        # Callers annotate the result, so hand out a copy
+        return {**cached, 'errors': list(cached['errors']), 'warnings': list(cached['warnings'])}
+    
+    def _build_google_result(self, signature: Tuple, image_reqs: Dict) -> Dict:
+        """Build the Google requirements result for a schema signature"""
+        
+        schema_type, missing_required, missing_recommended, has_image = signature
+        valid = not missing_required
+        
+        warnings = [f"Google recommends field: {field}" for field in missing_recommended]
+        
+        # Special validation for Product images
+        if schema_type == 'Product' and has_image and image_reqs:
+            warnings.append(
+                f"Ensure images meet Google requirements: "
+                f"min {image_reqs.get('min_width', 160)}x{image_reqs.get('min_height', 90)} pixels"
+            )
+        
+        return {
+            'valid': valid,
+            'errors': [f"Google requires field: {field}" for field in missing_required],
+            'warnings': warnings,
+            'eligible_for_rich_results': valid
+        }
+    
+    def validate_against_google_requirements_bulk(self, schemas: List[Dict]) -> List[Dict]:
+        """Validate several schemas against Google Rich Results requirements in one pass"""
+        
+        return [self.validate_against_google_requirements(schema) for schema in schemas]
\ No newline at end of file
@@ -7,16 +7,16 @@ import pytest
 import json
 import os
 from unittest.mock import Mock, patch
-from pathlib import Path
-import sys
-
-# Add src to path
-sys.path.insert(0, str(Path(__file__).parent.parent / 'src'))
 
 from src.core.config import SchemaConfig
 from src.core.shopify_client import ShopifyClient
 from src.core.generator import SchemaGenerator
 
+@pytest.fixture(autouse=True)
+def isolated_cache_dir(tmp_path, monkeypatch):
+    """Keep on-disk caches written during tests out of the user's cache directory"""
+    monkeypatch.setenv('XDG_CACHE_HOME', str(tmp_path / 'cache'))
+
 @pytest.fixture
 def sample_config():
     """Sample configuration for testing"""
@@ -117,7 +117,7 @@ def mock_shopify_client(sample_shop_info, sample_product, sample_collection):
 @pytest.fixture
 def mock_openai_client():
     """Mock OpenAI client for testing"""
-    with patch('ai.enhancer.OpenAI') as mock_openai:
+    with patch('src.ai.enhancer.OpenAI') as mock_openai:
         mock_client = Mock()
         mock_response = Mock()
         mock_response.choices = [Mock()]
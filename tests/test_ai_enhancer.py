@@ -4,10 +4,15 @@ Tests for AI enhancer
 """
 
 import pytest
-from unittest.mock import Mock, patch
+from unittest.mock import MagicMock, Mock, patch
 import json
-from src.ai.enhancer import AIEnhancer
+import os
+import re
+from src.ai.enhancer import AIEnhancer, ChatRequest, ProductContext, _count_tokens, _truncate_tokens
+from src.ai.cache import LLMCache, MemoryBackend, DiskBackend
+from src.ai.rate_limiter import RateLimiter
 from src.utils.exceptions import AIEnhancementError
+from src.utils.helpers import truncate_text
 
 class TestAIEnhancer:
     """Test AIEnhancer class"""
@@ -20,6 +25,27 @@ class TestAIEnhancer:
         assert enhancer.max_retries == 3
         assert enhancer.min_request_interval == 1.0
     
+    @patch('src.ai.enhancer.OpenAI')
+    def test_enhancer_base_url_from_environment(self, mock_openai, monkeypatch):
+        """Test OPENAI_BASE_URL points the client at another endpoint"""
+        monkeypatch.setenv('OPENAI_BASE_URL', 'http://localhost:3030/v1')
+        
+        AIEnhancer("test-key")
+        assert mock_openai.call_args.kwargs['base_url'] == 'http://localhost:3030/v1'
+        
+        AIEnhancer("test-key", base_url='http://proxy/v1')
+        assert mock_openai.call_args.kwargs['base_url'] == 'http://proxy/v1'
+    
+    @patch('src.ai.enhancer.OpenAI')
+    def test_small_model_defaults_to_model_on_custom_endpoint(self, mock_openai, monkeypatch):
+        """Test only the OpenAI API gets gpt-4o-mini when no small model is configured"""
+        monkeypatch.delenv('OPENAI_BASE_URL', raising=False)
+        
+        assert AIEnhancer("test-key", model="gpt-4o").small_model == "gpt-4o-mini"
+        assert AIEnhancer("test-key", model="llama3", base_url='http://proxy/v1').small_model == "llama3"
+        assert AIEnhancer("test-key", model="llama3", base_url='http://proxy/v1',
+                          small_model="llama3:8b").small_model == "llama3:8b"
+    
     def test_enhancer_initialization_without_key(self):
         """Test initialization without API key raises error"""
         # Test that the exception is raised with the correct message
@@ -101,6 +127,10 @@ class TestAIEnhancer:
         assert first_question['name'] == "What is this product?"
         assert first_question['acceptedAnswer']['@type'] == "Answer"
         assert first_question['acceptedAnswer']['text'] == "This is a test product."
+        
+        # FAQ requests use JSON mode so the reply always parses
+        request = mock_client.chat.completions.create.call_args.kwargs
+        assert request['response_format'] == {"type": "json_object"}
     
     @patch('src.ai.enhancer.OpenAI')
     def test_generate_faq_schema_invalid_json(self, mock_openai, sample_product):
@@ -124,10 +154,14 @@ class TestAIEnhancer:
     def test_categorize_product_ai(self, mock_openai, sample_product):
         """Test AI-powered product categorization"""
         mock_client = Mock()
-        mock_response = Mock()
-        mock_response.choices = [Mock()]
-        mock_response.choices[0].message.content = "Electronics"
-        mock_client.chat.completions.create.return_value = mock_response
+        # Streamed answer; reading stops as soon as a complete category arrives
+        chunks = [
+            Mock(choices=[Mock(delta=Mock(content=text))])
+            for text in ["Electr", "onics", " and more"]
+        ]
+        stream = MagicMock()
+        stream.__iter__.return_value = iter(chunks)
+        mock_client.chat.completions.create.return_value = stream
         mock_openai.return_value = mock_client
         
         # Product that doesn't match basic categorization
@@ -143,6 +177,17 @@ class TestAIEnhancer:
         
         # Mocked openai response returns "Electronics" because electronic is in the body_html and therefore included in the AI 
         assert category == "Electronics"
+        
+        # The category list is part of the stable system prefix, not the product message
+        system, user = mock_client.chat.completions.create.call_args.kwargs['messages']
+        assert 'Electronics' in system['content']
+        assert 'Electronics' not in user['content']
+        assert 'Weird Gadget' in user['content']
+        
+        # Categorization runs on the cheaper model
+        assert mock_client.chat.completions.create.call_args.kwargs['model'] == enhancer.small_model == "gpt-4o-mini"
+        assert mock_client.chat.completions.create.call_args.kwargs['stream'] is True
+        stream.close.assert_called_once()
     
     @patch('src.ai.enhancer.OpenAI')
     def test_generate_keywords(self, mock_openai, sample_product):
@@ -199,4 +244,351 @@ class TestAIEnhancer:
         # Test basic FAQ generation
         faq = enhancer._generate_basic_faq(sample_product)
         assert faq['@type'] == 'FAQPage'
-        assert len(faq['mainEntity']) >= 1
\ No newline at end of file
+        assert len(faq['mainEntity']) >= 1
+    
+    @patch('src.ai.enhancer.OpenAI')
+    def test_deterministic_requests_are_cached(self, mock_openai, sample_product):
+        """Test temperature 0 requests reuse the cached response"""
+        mock_client = Mock()
+        mock_client.chat.completions.create.return_value = Mock(
+            choices=[Mock(message=Mock(content="mug, coffee mug, ceramic"))]
+        )
+        mock_openai.return_value = mock_client
+        
+        enhancer = AIEnhancer("test-key", cache=LLMCache(MemoryBackend()))
+        
+        with patch('time.sleep'):
+            first = enhancer.generate_keywords(sample_product)
+            second = enhancer.generate_keywords(sample_product)
+            enhancer._make_openai_request("creative prompt")
+            enhancer._make_openai_request("creative prompt")
+        
+        assert first == second == ['mug', 'coffee mug', 'ceramic']
+        # One keyword call, then two uncached calls at the default temperature
+        assert mock_client.chat.completions.create.call_count == 3
+    
+    @patch('src.ai.enhancer.OpenAI')
+    def test_generated_descriptions_reused_for_unchanged_products(self, mock_openai, sample_product):
+        """Test regenerating an unchanged product reuses its description only when enabled"""
+        mock_client = Mock()
+        mock_client.chat.completions.create.return_value = Mock(
+            choices=[Mock(message=Mock(content="A sturdy, well made product for everyday use."))]
+        )
+        mock_openai.return_value = mock_client
+        cache = LLMCache(MemoryBackend())
+        description = sample_product['body_html']
+        
+        with patch('time.sleep'):
+            AIEnhancer("test-key", cache=cache, reuse_generated=True).enhance_description(description, sample_product)
+            AIEnhancer("test-key", cache=cache, reuse_generated=True).enhance_description(description, sample_product)
+            assert mock_client.chat.completions.create.call_count == 1
+            
+            changed = dict(sample_product, title="Renamed Product")
+            AIEnhancer("test-key", cache=cache, reuse_generated=True).enhance_description(description, changed)
+            AIEnhancer("test-key", cache=cache).enhance_description(description, sample_product)
+            assert mock_client.chat.completions.create.call_count == 3
+    
+    @patch('src.ai.enhancer.OpenAI')
+    def test_fingerprint_cache_is_bounded(self, mock_openai):
+        """Test the oldest product families are forgotten once the fingerprint cache is full"""
+        enhancer = AIEnhancer("test-key", cache=LLMCache(MemoryBackend()))
+        
+        with patch('src.ai.enhancer._FINGERPRINT_CACHE_SIZE', 2):
+            for title in ('Mug', 'Bowl', 'Plate'):
+                enhancer._remember(enhancer._fingerprint('keywords', {'title': title}), [title.lower()])
+        
+        assert [key[1] for key in enhancer._fingerprint_cache] == ['bowl', 'plate']
+    
+    @patch('src.ai.enhancer.OpenAI')
+    def test_enhance_products_batch_preserves_order(self, mock_openai):
+        """Test concurrent enhancement returns descriptions in product order"""
+        mock_client = Mock()
+        mock_client.chat.completions.create.side_effect = lambda **kwargs: Mock(
+            choices=[Mock(message=Mock(content="Enhanced copy for " + re.search(r"Product \d+", kwargs['messages'][-1]['content']).group()))]
+        )
+        mock_openai.return_value = mock_client
+        
+        enhancer = AIEnhancer("test-key", cache=LLMCache(MemoryBackend()), requests_per_minute=600, max_concurrent=4)
+        products = [{'title': f"Product {i}", 'body_html': f"Original description {i}"} for i in range(10)]
+        
+        with patch('src.ai.rate_limiter.time.sleep'):
+            descriptions = enhancer.enhance_products_batch(products)
+        
+        assert descriptions == [f"Enhanced copy for Product {i}" for i in range(10)]
+        assert enhancer.enhance_products_batch([]) == []
+
+    @patch('src.ai.enhancer.OpenAI')
+    def test_categorize_products_batch(self, mock_openai):
+        """Test unmapped products share one request and keep their order"""
+        mock_client = Mock()
+        mock_client.chat.completions.create.return_value = Mock(
+            choices=[Mock(message=Mock(content='["Electronics", "Not a category"]'))]
+        )
+        mock_openai.return_value = mock_client
+        
+        enhancer = AIEnhancer("test-key", cache=LLMCache(MemoryBackend()))
+        products = [
+            {'title': 'Gizmo', 'product_type': 'Gadget'},
+            {'title': 'Running Shoes', 'product_type': 'Shoes'},
+            {'title': 'Widget', 'product_type': 'Thing'}
+        ]
+        
+        with patch('src.ai.rate_limiter.time.sleep'):
+            categories = enhancer.categorize_products_batch(products)
+        
+        assert categories[0] == 'Electronics'
+        assert categories[1] == 'Apparel & Accessories'
+        assert categories[2] == 'Other'
+        assert mock_client.chat.completions.create.call_count == 1
+    
+    @patch('src.ai.enhancer.OpenAI')
+    def test_categorize_products_batch_reuses_single_product_answers(self, mock_openai):
+        """Test categories cached per product, as a batch flush leaves them, skip the shared request"""
+        mock_client = Mock()
+        mock_openai.return_value = mock_client
+        
+        enhancer = AIEnhancer("test-key", cache=LLMCache(MemoryBackend()))
+        product = {'title': 'Gizmo', 'product_type': 'Gadget'}
+        enhancer.cache.set(enhancer.cache_key(enhancer.analysis_requests(product)['category']), 'Electronics')
+        
+        assert enhancer.categorize_products_batch([product]) == ['Electronics']
+        mock_client.chat.completions.create.assert_not_called()
+    
+    @patch('src.ai.enhancer.OpenAI')
+    def test_categorize_products_batch_falls_back_on_length_mismatch(self, mock_openai):
+        """Test a response without one element per product is retried per product"""
+        mock_client = Mock()
+        mock_client.chat.completions.create.return_value = Mock(
+            choices=[Mock(message=Mock(content='["Electronics"]'))]
+        )
+        mock_openai.return_value = mock_client
+        
+        enhancer = AIEnhancer("test-key", cache=LLMCache(MemoryBackend()))
+        products = [{'title': 'Gizmo', 'product_type': 'Gadget'}, {'title': 'Widget', 'product_type': 'Thing'}]
+        
+        with patch('src.ai.rate_limiter.time.sleep'), \
+             patch.object(enhancer, 'categorize_product', side_effect=['Electronics', 'Home & Garden']) as single:
+            categories = enhancer.categorize_products_batch(products)
+        
+        assert categories == ['Electronics', 'Home & Garden']
+        assert single.call_count == 2
+        assert mock_client.chat.completions.create.call_count == 1
+
+    @patch('src.ai.enhancer.OpenAI')
+    def test_near_duplicate_products_share_keywords(self, mock_openai, sample_product):
+        """Test products differing only in description reuse the first AI result"""
+        mock_client = Mock()
+        mock_client.chat.completions.create.return_value = Mock(
+            choices=[Mock(message=Mock(content="mug, coffee mug, ceramic"))]
+        )
+        mock_openai.return_value = mock_client
+        
+        enhancer = AIEnhancer("test-key", cache=LLMCache(MemoryBackend()))
+        variant = dict(sample_product, title=f"  {sample_product['title'].upper()} ", body_html="<p>Blue edition</p>")
+        
+        assert enhancer.generate_keywords(sample_product) == enhancer.generate_keywords(variant)
+        assert enhancer.generate_keywords(variant, max_keywords=1) == ['mug']
+        assert mock_client.chat.completions.create.call_count == 1
+
+    def test_product_context_matches_per_prompt_preparation(self, sample_product):
+        """Test prompts built from a shared ProductContext match those built from the product"""
+        enhancer = AIEnhancer("test-key")
+        context = ProductContext.from_product(sample_product)
+        
+        assert context.tags_csv == ', '.join(sample_product['tags'][:5])
+        assert enhancer.analysis_requests(sample_product, context) == enhancer.analysis_requests(sample_product)
+
+    def test_attributes_prompt_keeps_attribute_sentences(self):
+        """Test only sentences hinting at attributes are sent for extraction"""
+        enhancer = AIEnhancer("test-key")
+        product = {'body_html': (
+            "<p>Our favourite mug for slow mornings. It is made of stoneware. "
+            "Holds 350 ml and measures 9 cm tall! Loved by customers everywhere.</p>"
+        )}
+        
+        prompt = enhancer.analysis_requests(product)['attributes'].prompt
+        
+        assert "made of stoneware" in prompt
+        assert "9 cm tall" in prompt
+        assert "slow mornings" not in prompt
+        assert "customers everywhere" not in prompt
+
+    def test_truncate_tokens_uses_encoding_when_available(self):
+        """Test token-based truncation, and its character estimate without tiktoken"""
+        words = Mock()
+        words.encode.side_effect = lambda text: text.split(' ')
+        words.decode.side_effect = lambda tokens: ' '.join(tokens)
+        text = "one two three four five six"
+        
+        assert _truncate_tokens(text, 3, words) == "one two three..."
+        assert _truncate_tokens(text, 6, words) == text
+        assert _truncate_tokens(text, 3) == truncate_text(text, 12)
+        assert _count_tokens(text, words) == 6
+    
+    @patch('src.ai.enhancer.OpenAI')
+    def test_encodings_loaded_on_use_per_model(self, mock_openai):
+        """Test tokenizers are not loaded up front and follow the model each prompt goes to"""
+        with patch('src.ai.enhancer._encoding_for', return_value=None) as encoding_for:
+            enhancer = AIEnhancer("test-key", model="gpt-4o", small_model="gpt-4o-mini",
+                                  cache=LLMCache(MemoryBackend()))
+            encoding_for.assert_not_called()
+            
+            enhancer._product_context({'title': 'Mug', 'body_html': '<p>A mug</p>'})
+        
+        assert [call.args[0] for call in encoding_for.call_args_list] == ['gpt-4o', 'gpt-4o-mini']
+
+class TestRateLimiter:
+    """Test RateLimiter"""
+    
+    @staticmethod
+    def _fake_clock():
+        """Mock time module whose sleep advances monotonic"""
+        clock = Mock()
+        clock.now = 0.0
+        clock.monotonic.side_effect = lambda: clock.now
+        clock.sleep.side_effect = lambda seconds: setattr(clock, 'now', clock.now + seconds)
+        return clock
+    
+    def test_bursts_then_waits_for_refill(self):
+        """Test a full bucket allows a burst and then spaces requests out"""
+        clock = self._fake_clock()
+        with patch('src.ai.rate_limiter.time', clock):
+            limiter = RateLimiter(requests_per_minute=6)
+            
+            assert [limiter.acquire() for _ in range(6)] == [0.0] * 6
+            assert limiter.acquire() == pytest.approx(10.0)
+            assert clock.now == pytest.approx(10.0)
+    
+    def test_token_budget_limits_large_requests(self):
+        """Test the token bucket delays requests once tokens run out"""
+        clock = self._fake_clock()
+        with patch('src.ai.rate_limiter.time', clock):
+            limiter = RateLimiter(requests_per_minute=60, tokens_per_minute=600)
+            
+            assert limiter.acquire(500) == 0.0
+            # 400 more tokens are needed, refilled at 10 per second
+            assert limiter.acquire(500) == pytest.approx(40.0)
+    
+    def test_zero_requests_per_minute_is_unlimited(self):
+        """Test a zero request budget disables request limiting"""
+        clock = self._fake_clock()
+        with patch('src.ai.rate_limiter.time', clock):
+            limiter = RateLimiter(requests_per_minute=0)
+            
+            assert [limiter.acquire() for _ in range(100)] == [0.0] * 100
+            assert clock.now == 0.0
+        
+        assert AIEnhancer("test-key", requests_per_minute=0).min_request_interval == 0.0
+
+class TestLLMCache:
+    """Test LLMCache and its backends"""
+    
+    def test_make_key_covers_every_parameter(self):
+        """Test any change to a request's parameters changes its key"""
+        key = LLMCache.make_key(model="gpt-4", prompt="p", max_tokens=10, temperature=0)
+        
+        assert key == LLMCache.make_key(temperature=0, max_tokens=10, prompt="p", model="gpt-4")
+        assert key != LLMCache.make_key(model="gpt-4", prompt="p", max_tokens=11, temperature=0)
+        assert key != LLMCache.make_key(model="gpt-3.5-turbo", prompt="p", max_tokens=10, temperature=0)
+    
+    def test_disk_backend_round_trip_and_ttl(self, tmp_path):
+        """Test responses persist across cache instances until they expire"""
+        key = LLMCache.make_key(prompt="p")
+        LLMCache(DiskBackend(tmp_path)).set(key, "cached response")
+        
+        assert LLMCache(DiskBackend(tmp_path)).get(key) == "cached response"
+        assert LLMCache(DiskBackend(tmp_path), ttl=0).get(key) is None
+        assert LLMCache(DiskBackend(tmp_path)).get(LLMCache.make_key(prompt="other")) is None
+    
+    def test_disk_backend_writes_through_unique_temp_files(self, tmp_path):
+        """Test concurrent writers of one key each use their own temp file"""
+        key = LLMCache.make_key(prompt="p")
+        backend = DiskBackend(tmp_path)
+        
+        with patch('src.ai.cache.os.replace', side_effect=os.replace) as replace:
+            backend.set(key, {'response': 'first'})
+            backend.set(key, {'response': 'second'})
+        
+        first_tmp, second_tmp = (call.args[0] for call in replace.call_args_list)
+        assert first_tmp != second_tmp
+        assert backend.get(key) == {'response': 'second'}
+        assert [p.name for p in (tmp_path / key[:2]).iterdir()] == [f"{key}.json"]
+
+class TestAIBatchEnhancer:
+    """Test AIBatchEnhancer"""
+    
+    @staticmethod
+    def _batch_client(outputs):
+        """Mock client whose batch completes with a chat response per (custom_id, content)"""
+        lines = [
+            json.dumps({
+                'custom_id': custom_id,
+                'response': {'status_code': 200, 'body': {'choices': [{'message': {'content': content}}]}},
+                'error': None
+            })
+            for custom_id, content in outputs
+        ]
+        client = Mock()
+        client.files.create.return_value = Mock(id='file-in')
+        client.batches.create.return_value = Mock(id='batch-1', status='in_progress')
+        client.batches.retrieve.return_value = Mock(id='batch-1', status='completed', output_file_id='file-out')
+        client.files.content.return_value = Mock(content='\n'.join(lines).encode())
+        return client
+    
+    @patch('src.ai.enhancer.OpenAI')
+    def test_flush_resolves_futures_and_warms_cache(self, mock_openai, sample_product):
+        """Test batched keyword responses are served to generate_keywords from the cache"""
+        from src.ai.batch import AIBatchEnhancer
+        
+        client = self._batch_client([('123456789:keywords', 'mug, coffee mug')])
+        mock_openai.return_value = client
+        enhancer = AIEnhancer("test-key", cache=LLMCache(MemoryBackend()))
+        batch = AIBatchEnhancer(enhancer, poll_interval=0)
+        
+        futures = batch.queue_product_analysis([sample_product])
+        with patch('time.sleep'):
+            results = batch.flush()
+        
+        submitted = client.files.create.call_args.kwargs['file'][1].decode().splitlines()
+        assert [json.loads(line)['custom_id'] for line in submitted] == list(futures)
+        assert results['123456789:keywords'] == 'mug, coffee mug'
+        assert futures['123456789:keywords'].result() == 'mug, coffee mug'
+        # Requests missing from the batch output resolve to None
+        assert all(f.result() is None for key, f in futures.items() if key != '123456789:keywords')
+        
+        assert enhancer.generate_keywords(sample_product) == ['mug', 'coffee mug']
+        client.chat.completions.create.assert_not_called()
+    
+    @patch('src.ai.enhancer.OpenAI')
+    def test_cached_requests_are_not_submitted(self, mock_openai):
+        """Test queueing a cached deterministic prompt resolves it without a batch"""
+        from src.ai.batch import AIBatchEnhancer
+        
+        client = self._batch_client([])
+        mock_openai.return_value = client
+        enhancer = AIEnhancer("test-key", cache=LLMCache(MemoryBackend()))
+        request = ChatRequest("prompt", max_tokens=50, temperature=0)
+        enhancer.cache.set(enhancer.cache_key(request), "Electronics")
+        batch = AIBatchEnhancer(enhancer)
+        
+        future = batch.queue("p1", request)
+        
+        assert future.result() == "Electronics"
+        assert batch.flush() == {}
+        client.files.create.assert_not_called()
+    
+    @patch('src.ai.enhancer.OpenAI')
+    def test_failed_batch_raises(self, mock_openai):
+        """Test a batch that does not complete fails its pending futures"""
+        from src.ai.batch import AIBatchEnhancer
+        
+        client = self._batch_client([])
+        client.batches.retrieve.return_value = Mock(id='batch-1', status='expired', output_file_id=None)
+        mock_openai.return_value = client
+        batch = AIBatchEnhancer(AIEnhancer("test-key", cache=LLMCache(MemoryBackend())))
+        
+        future = batch.queue("p1", ChatRequest("prompt"))
+        with patch('time.sleep'), pytest.raises(AIEnhancementError):
+            batch.flush()
+        
+        assert isinstance(future.exception(), AIEnhancementError)
@@ -4,6 +4,7 @@ Tests for CLI commands
 """
 
 import pytest
+import click
 from click.testing import CliRunner
 from unittest.mock import Mock, patch, mock_open
 import json
@@ -19,6 +20,30 @@ from cli.commands.setup import setup
 class TestCLICommands:
     """Test CLI commands"""
     
+    def test_display_results_non_terminal_emits_json_line(self, capsys):
+        """Test piped generate output is a single JSON summary line"""
+        from cli.commands.generate import _display_results
+        
+        schemas = {
+            'shop_domain': 'test-shop',
+            'total_products': 3,
+            'collections': [{}],
+            'generated_at': '2024-01-01T00:00:00',
+            'sample_product': {'title': 'Product 0', 'schemas': {}}
+        }
+        
+        with patch('cli.commands.generate.console') as mock_console:
+            mock_console.is_terminal = False
+            _display_results(schemas, 'out.json', 1234)
+        
+        lines = capsys.readouterr().out.splitlines()
+        assert len(lines) == 1
+        summary = json.loads(lines[0])
+        assert summary['total_products'] == 3
+        assert summary['collections'] == 1
+        assert summary['file_size'] == 1234
+        mock_console.print.assert_not_called()
+    
     def test_cli_help(self):
         """Test CLI help command"""
         runner = CliRunner()
@@ -27,11 +52,31 @@ class TestCLICommands:
         assert result.exit_code == 0
         assert "Shopify Structured Data Generator CLI" in result.output
     
+    def test_cli_resolves_commands_lazily(self):
+        """Test subcommands are listed statically and resolved on demand"""
+        ctx = click.Context(cli)
+        
+        assert cli.list_commands(ctx) == ['generate', 'analyze', 'validate', 'setup']
+        assert cli.get_command(ctx, 'validate') is validate
+        assert cli.get_command(ctx, 'generate') is generate
+        assert cli.get_command(ctx, 'unknown') is None
+    
+    def test_cli_help_uses_command_docstrings(self):
+        """Test the static help table matches the first docstring line of each subcommand"""
+        from cli.main import _LAZY_COMMANDS
+        
+        result = CliRunner().invoke(cli, ['--help'])
+        ctx = click.Context(cli)
+        
+        for name in cli.list_commands(ctx):
+            assert _LAZY_COMMANDS[name] == cli.get_command(ctx, name).help.split('\n')[0]
+            assert _LAZY_COMMANDS[name] in result.output
+    
     @patch('cli.commands.generate.console')
     @patch('cli.commands.generate.Table')
-    @patch('cli.commands.generate.Progress')
-    @patch('cli.commands.generate.AIEnhancer')
-    @patch('cli.commands.generate.SchemaGenerator')
+    @patch('rich.progress.Progress')
+    @patch('src.ai.enhancer.AIEnhancer')
+    @patch('src.core.generator.SchemaGenerator')
     @patch('cli.commands.generate.SchemaConfig')
     def test_generate_command_basic(self, mock_config_class, mock_generator_class, mock_ai_enhancer_class, mock_progress, mock_table, mock_console):
         """Test basic generate command"""
@@ -45,9 +90,9 @@ class TestCLICommands:
         mock_client = Mock()
         mock_client.get_shop_info.return_value = {'name': 'Test Shop'}
         mock_generator.client = mock_client
-        mock_generator.generate_complete_schema_package.return_value = {
+        mock_generator.write_schema_package.return_value = {
             'total_products': 5,
-            'products': [{'title': f'Product {i}'} for i in range(5)],
+            'sample_product': {'title': 'Product 0'},
             'collections': [],
             'generated_at': '2024-01-01T00:00:00'
         }
@@ -90,7 +135,78 @@ class TestCLICommands:
                         if any("Schema generation complete" in str(arg) for arg in call[0])]
         assert len(success_calls) > 0, "Success message not found in console output"
         
-        mock_generator.generate_complete_schema_package.assert_called_once()
+        mock_generator.write_schema_package.assert_called_once()
+    
+    @patch('cli.commands.generate.console')
+    @patch('rich.progress.Progress')
+    @patch('src.ai.enhancer.AIEnhancer')
+    @patch('src.core.generator.SchemaGenerator')
+    def test_generate_reads_env_settings_with_credentials_from_flags(self, mock_generator_class,
+                                                                    mock_ai_enhancer_class, mock_progress,
+                                                                    mock_console):
+        """Test .env settings apply even when credentials are passed as flags"""
+        seen = {}
+        def make_enhancer(*args, **kwargs):
+            seen['base_url'] = os.environ.get('OPENAI_BASE_URL')
+            seen['small_model'] = kwargs.get('small_model')
+            return Mock()
+        mock_ai_enhancer_class.side_effect = make_enhancer
+        
+        mock_generator = mock_generator_class.return_value
+        mock_generator.client.get_shop_info.return_value = {'name': 'Test Shop'}
+        mock_generator.write_schema_package.return_value = {'total_products': 0}
+        mock_progress.return_value.__enter__ = Mock(return_value=Mock())
+        mock_progress.return_value.__exit__ = Mock(return_value=None)
+        
+        runner = CliRunner()
+        with runner.isolated_filesystem(), patch.dict(os.environ, {}):
+            os.environ.pop('OPENAI_BASE_URL', None)
+            os.environ.pop('OPENAI_SMALL_MODEL', None)
+            with open('.env', 'w') as f:
+                f.write("OPENAI_BASE_URL=http://localhost:3030/v1\nOPENAI_SMALL_MODEL=local-small\n")
+            
+            result = runner.invoke(generate, [
+                '--shop-domain', 'test-shop', '--access-token', 'test-token',
+                '--openai-key', 'test-key', '--enable-ai', '--output', 'out.json'
+            ])
+        
+        assert result.exit_code == 0, result.output
+        assert seen == {'base_url': 'http://localhost:3030/v1', 'small_model': 'local-small'}
+    
+    @pytest.mark.parametrize('output, writer', [
+        ('out.json', 'write_schema_package'),
+        ('out.jsonl', 'stream_schema_package'),
+    ])
+    @patch('cli.commands.generate.console')
+    @patch('rich.progress.Progress')
+    @patch('src.core.generator.SchemaGenerator')
+    def test_generate_failure_keeps_previous_output(self, mock_generator_class, mock_progress, mock_console,
+                                                    output, writer):
+        """Test a generation error leaves an existing output file unchanged"""
+        mock_generator = mock_generator_class.return_value
+        mock_generator.client.get_shop_info.return_value = {'name': 'Test Shop'}
+        
+        def fail_midway(fp, **kwargs):
+            fp.write(b'{"partial": ')
+            raise RuntimeError("Shopify request failed")
+        getattr(mock_generator, writer).side_effect = fail_midway
+        mock_progress.return_value.__enter__ = Mock(return_value=Mock())
+        mock_progress.return_value.__exit__ = Mock(return_value=None)
+        
+        runner = CliRunner()
+        with runner.isolated_filesystem():
+            with open(output, 'w') as f:
+                f.write('{"previous": true}')
+            
+            result = runner.invoke(generate, [
+                '--shop-domain', 'test-shop', '--access-token', 'test-token', '--output', output
+            ])
+            
+            with open(output) as f:
+                assert f.read() == '{"previous": true}'
+            assert os.listdir('.') == [output]
+        
+        assert result.exit_code != 0
     
     def test_validate_command_with_valid_schemas(self):
         """Test validate command with valid schemas"""
@@ -169,6 +285,44 @@ class TestCLICommands:
         assert result.exit_code == 1  # Should fail validation
         assert "Validation failed" in result.output
     
+    @patch('cli.commands.validate.display_validation_summary')
+    @patch('cli.commands.validate.display_validation_table')
+    def test_validate_command_failing_report_skips_display(self, mock_table, mock_summary):
+        """Test a failing non-interactive run with --output only saves the report"""
+        invalid_schemas = {
+            'products': [{'title': 'Test Product', 'schemas': {'product': {'@type': 'Product'}}}]
+        }
+        
+        runner = CliRunner()
+        with runner.isolated_filesystem():
+            with open('invalid_schemas.json', 'w') as f:
+                json.dump(invalid_schemas, f)
+            
+            result = runner.invoke(validate, ['invalid_schemas.json', '--output', 'report.txt', '--format', 'text'])
+            report_saved = os.path.exists('report.txt')
+        
+        assert result.exit_code == 1
+        assert "Validation failed" in result.output
+        assert report_saved
+        mock_table.assert_not_called()
+        mock_summary.assert_not_called()
+    
+    @patch('cli.commands.validate.display_validation_summary')
+    @patch('cli.commands.validate.display_validation_table')
+    def test_validate_command_quiet(self, mock_table, mock_summary):
+        """Test --quiet skips displaying results but keeps the exit status"""
+        runner = CliRunner()
+        with runner.isolated_filesystem():
+            with open('schemas.json', 'w') as f:
+                json.dump({'products': []}, f)
+            
+            result = runner.invoke(validate, ['schemas.json', '--quiet'])
+        
+        assert result.exit_code == 0
+        assert "Validation passed" in result.output
+        mock_table.assert_not_called()
+        mock_summary.assert_not_called()
+    
     @patch('cli.commands.setup.test_shopify_connection')
     @patch('cli.commands.setup.Confirm.ask')
     @patch('cli.commands.setup.Prompt.ask')
@@ -202,4 +356,476 @@ class TestCLICommands:
         assert "Setup Complete!" in result.output
         
         # Should create .env file
-        assert os.path.exists('.env')
\ No newline at end of file
+        assert os.path.exists('.env')
+    
+    @patch('cli.commands.setup.test_openai_connection')
+    @patch('cli.commands.setup.test_shopify_connection')
+    def test_verify_connections_runs_checks_concurrently(self, mock_shopify, mock_openai):
+        """Test Shopify and OpenAI credentials are verified at the same time"""
+        import threading
+        from cli.commands.setup import verify_connections
+        
+        # Each check blocks until the other one has started
+        barrier = threading.Barrier(2, timeout=5)
+        mock_shopify.side_effect = lambda *args: barrier.wait() is not None
+        mock_openai.side_effect = lambda *args: barrier.wait() is not None
+        
+        result = verify_connections({
+            'shop_domain': 'test-shop',
+            'access_token': 'test-token',
+            'openai_api_key': 'test-key'
+        })
+        
+        assert result == {'shop_domain': 'test-shop', 'access_token': 'test-token'}
+        mock_shopify.assert_called_once_with('test-shop', 'test-token')
+        mock_openai.assert_called_once_with('test-key')
+    
+    def test_write_env_values_updates_in_place(self):
+        """Test env values are merged into an existing file in one write"""
+        from cli.commands.setup import write_env_values
+        from dotenv import dotenv_values
+        
+        runner = CliRunner()
+        with runner.isolated_filesystem():
+            with open('.env', 'w') as f:
+                f.write("# Shopify settings\nexport MAX_PRODUCTS=5\nCUSTOM=keep\n")
+            
+            write_env_values('.env', {'MAX_PRODUCTS': '100', 'SHOPIFY_ACCESS_TOKEN': "it's"})
+            
+            with open('.env') as f:
+                content = f.read()
+            
+            assert content.startswith("# Shopify settings\nMAX_PRODUCTS='100'\nCUSTOM=keep\n")
+            assert dotenv_values('.env') == {
+                'MAX_PRODUCTS': '100',
+                'CUSTOM': 'keep',
+                'SHOPIFY_ACCESS_TOKEN': "it's"
+            }
+            assert os.listdir('.') == ['.env']
+    
+    def test_write_env_values_keeps_credentials_private(self):
+        """Test a new env file is owner-only and an existing file keeps its mode"""
+        from cli.commands.setup import write_env_values
+        
+        runner = CliRunner()
+        with runner.isolated_filesystem():
+            write_env_values('.env', {'SHOPIFY_ACCESS_TOKEN': 'secret'})
+            assert os.stat('.env').st_mode & 0o777 == 0o600
+            
+            os.chmod('.env', 0o640)
+            write_env_values('.env', {'OPENAI_API_KEY': 'key'})
+            assert os.stat('.env').st_mode & 0o777 == 0o640
+            
+            # A failed write leaves the original file and no temp files behind
+            with patch('cli.commands.setup.os.replace', side_effect=OSError("disk full")):
+                with pytest.raises(OSError):
+                    write_env_values('.env', {'MAX_PRODUCTS': '5'})
+            assert os.listdir('.') == ['.env']
+    
+    @patch('src.core.shopify_client.ShopifyClient')
+    def test_shopify_connection_reuses_client(self, mock_client_class):
+        """Test repeated connection tests with the same credentials share one client"""
+        from cli.commands import setup as setup_module
+        
+        setup_module._get_client.cache_clear()
+        mock_client_class.return_value.get_shop_info.return_value = {'name': 'Test Shop'}
+        
+        assert setup_module.test_shopify_connection('test-shop', 'test-token')
+        assert setup_module.test_shopify_connection('test-shop', 'test-token')
+        
+        mock_client_class.assert_called_once()
+        assert mock_client_class.return_value.get_shop_info.call_count == 2
+    
+    @patch('openai.OpenAI')
+    def test_openai_connection_lists_models(self, mock_openai_class):
+        """Test the OpenAI key check uses the model list instead of a completion"""
+        from cli.commands.setup import test_openai_connection
+        
+        mock_client = mock_openai_class.return_value
+        mock_client.models.list.return_value = Mock(data=[Mock(id='gpt-4o-mini')])
+        
+        assert test_openai_connection('test-key') is True
+        mock_client.models.list.assert_called_once()
+        mock_client.chat.completions.create.assert_not_called()
+    
+    def test_doctor_finds_config_files(self):
+        """Test doctor reports configuration files found in the working directory"""
+        from cli.commands.setup import doctor
+        
+        runner = CliRunner()
+        with runner.isolated_filesystem():
+            with open('config.yml', 'w') as f:
+                f.write("shop_domain: test-shop\n")
+            os.mkdir('config.yaml')  # directories are not config files
+            
+            result = runner.invoke(doctor)
+        
+        assert result.exit_code == 0
+        assert "Found configuration files: config.yml" in result.output
+    
+    @patch('cli.commands.setup.Confirm.ask')
+    def test_confirm_uses_default_once_input_runs_out(self, mock_ask):
+        """Test confirmations read piped answers and fall back to their default at EOF"""
+        from cli.commands.setup import _confirm
+        
+        mock_ask.return_value = False
+        assert _confirm("Save?", default=True) is False
+        mock_ask.assert_called_once_with("Save?", default=True)
+        
+        mock_ask.side_effect = EOFError
+        assert _confirm("Save?", default=True) is True
+        assert _confirm("Remove?") is False
+    
+    @patch('cli.commands.setup.setup_shopify_credentials')
+    @patch('cli.commands.setup.test_shopify_connection', return_value=False)
+    def test_failed_connection_aborts_without_terminal(self, mock_test_connection, mock_credentials):
+        """Test a failed connection with piped input stops instead of asking for credentials again"""
+        from cli.commands.setup import verify_connections
+        
+        with patch('sys.stdin') as mock_stdin, patch('cli.commands.setup.Confirm.ask', side_effect=EOFError):
+            mock_stdin.isatty.return_value = False
+            with pytest.raises(click.ClickException, match="Could not connect to Shopify"):
+                verify_connections({'shop_domain': 'test-shop', 'access_token': 'bad-token'})
+        
+        mock_credentials.assert_not_called()
+    
+    def test_normalize_shop_domain(self):
+        """Test pasted shop domains and URLs are reduced to the shop name"""
+        from cli.commands.setup import normalize_shop_domain
+        
+        assert normalize_shop_domain('test-shop') == 'test-shop'
+        assert normalize_shop_domain('Test-Shop.myshopify.com') == 'test-shop'
+        assert normalize_shop_domain(' https://test-shop.myshopify.com/ ') == 'test-shop'
+        assert normalize_shop_domain('http://test-shop') == 'test-shop'
+        assert normalize_shop_domain('test shop') == ''
+        assert normalize_shop_domain('https://example.com/store') == ''
+    
+    def test_run_comprehensive_validation_checks_each_product_schema(self):
+        """Test product, breadcrumb and FAQ schemas are all validated per product"""
+        from cli.commands.validate import run_comprehensive_validation, _get_validator
+        
+        schemas = {
+            'products': [{
+                'title': 'Test Product',
+                'schemas': {
+                    'product': {'@type': 'Product', 'name': 'Test Product'},
+                    'breadcrumb': {'@type': 'BreadcrumbList', 'itemListElement': []},
+                    'faq': {'@type': 'FAQPage', 'mainEntity': []}
+                }
+            }]
+        }
+        
+        results = run_comprehensive_validation(schemas, _get_validator(), 'all', False, False)
+        
+        product_schemas = results['products'][0]['schemas']
+        assert list(product_schemas) == ['product', 'breadcrumb', 'faq']
+        assert all(not validation['valid'] for validation in product_schemas.values())
+        assert results['summary']['total_invalid'] == 3
+        
+        results = run_comprehensive_validation(schemas, _get_validator(), 'product', False, False)
+        assert list(results['products'][0]['schemas']) == ['product']
+    
+    def test_run_comprehensive_validation_parallel_matches_serial(self):
+        """Test large product lists validated in a process pool give the serial results"""
+        from cli.commands import validate as validate_module
+        
+        products = [
+            {
+                'product_id': i,
+                'title': f'Product {i}',
+                'schemas': {
+                    'product': {'@type': 'Product', 'name': f'Product {i}'} if i % 2 else {'@type': 'Product'},
+                    'faq': {'@type': 'FAQPage', 'mainEntity': []}
+                }
+            }
+            for i in range(validate_module._PARALLEL_MIN_PRODUCTS)
+        ]
+        schemas = {'products': products}
+        validator = validate_module._get_validator()
+        
+        parallel = validate_module.run_comprehensive_validation(schemas, validator, 'all', True, True)
+        with patch.object(validate_module, '_PARALLEL_MIN_PRODUCTS', len(products) + 1):
+            serial = validate_module.run_comprehensive_validation(schemas, validator, 'all', True, True)
+        
+        assert parallel['products'] == serial['products']
+        assert parallel['summary'] == serial['summary']
+        assert parallel['google_compatibility'] == serial['google_compatibility']
+        assert [p['product_id'] for p in parallel['products']] == list(range(len(products)))
+    
+    def test_validate_in_pool_reads_a_bounded_window(self):
+        """Test pooled validation only reads a few batches ahead of the results it yields"""
+        from concurrent.futures import ThreadPoolExecutor
+        from cli.commands import validate as validate_module
+        
+        read = []
+        def products():
+            for i in range(10 * validate_module._POOL_BATCH_SIZE):
+                read.append(i)
+                yield {'product_id': i}
+        
+        with patch.object(validate_module, 'ProcessPoolExecutor', ThreadPoolExecutor), \
+             patch.object(validate_module.os, 'cpu_count', return_value=1):
+            outcomes = validate_module._validate_in_pool(products(), lambda batch: batch)
+            assert next(outcomes) == {'product_id': 0}
+            assert len(read) <= 2 * validate_module._POOL_BATCH_SIZE
+            assert len(list(outcomes)) == len(read) - 1 == 10 * validate_module._POOL_BATCH_SIZE - 1
+        
+    def test_run_comprehensive_validation_accepts_streamed_sections(self):
+        """Test products and collections may be generators, as streamed from ijson"""
+        from cli.commands.validate import run_comprehensive_validation, _get_validator
+        
+        products = [{'title': f'Product {i}', 'schemas': {'product': {'@type': 'Product'}}} for i in range(3)]
+        collections = [{'@type': 'CollectionPage', 'name': 'Sale'}]
+        
+        listed = run_comprehensive_validation(
+            {'products': products, 'collections': collections}, _get_validator(), 'all', False, False
+        )
+        streamed = run_comprehensive_validation(
+            {'products': iter(products), 'collections': iter(collections)}, _get_validator(), 'all', False, False
+        )
+        
+        assert streamed['products'] == listed['products']
+        assert streamed['collections'] == listed['collections']
+        assert streamed['summary'] == listed['summary']
+        assert streamed['file_info']['total_schemas'] == listed['file_info']['total_schemas'] == 4
+    
+    def test_load_schema_bundle(self, tmp_path):
+        """Test schema files load into sections that validate like the parsed file"""
+        from cli.commands.validate import load_schema_bundle
+        
+        bundle = {
+            'organization': {'@type': 'Organization', 'name': 'Store'},
+            'products': [{'title': 'A'}, {'title': 'B'}],
+            'collections': []
+        }
+        schema_file = tmp_path / 'schemas.json'
+        schema_file.write_text(json.dumps(bundle))
+        
+        schemas = load_schema_bundle(str(schema_file))
+        
+        assert schemas['organization'] == bundle['organization']
+        assert list(schemas['products']) == bundle['products']
+        assert list(schemas['collections']) == []
+    
+    @patch('cli.commands.validate.run_comprehensive_validation')
+    @patch('cli.commands.validate.load_schema_bundle')
+    def test_validate_closes_streams_when_parsing_fails(self, mock_load, mock_run):
+        """Test streamed sections are closed when validation stops partway through the file"""
+        import inspect
+        
+        def stream():
+            yield {'title': 'A'}
+            yield {'title': 'B'}
+        
+        products = stream()
+        next(products)
+        mock_load.return_value = {'products': products, 'organization': {'name': 'Store'}}
+        mock_run.side_effect = json.JSONDecodeError("Expecting value", "", 0)
+        
+        runner = CliRunner()
+        with runner.isolated_filesystem():
+            open('schemas.json', 'w').close()
+            result = runner.invoke(validate, ['schemas.json'])
+        
+        assert 'Invalid JSON file' in result.output
+        assert inspect.getgeneratorstate(products) == inspect.GEN_CLOSED
+    
+    def test_load_schema_bundle_closes_organization_parser(self, tmp_path):
+        """Test reading the organization closes its parser instead of leaving the file open"""
+        from cli.commands import validate as validate_module
+        
+        closed = []
+        def items(path, prefix):
+            try:
+                yield {'name': 'Store'}
+            finally:
+                closed.append(prefix)
+        
+        with patch.object(validate_module, 'ijson', Mock()), \
+             patch.object(validate_module, 'iter_json_items', side_effect=items):
+            schemas = validate_module.load_schema_bundle(str(tmp_path / 'schemas.json'))
+        
+        assert schemas['organization'] == {'name': 'Store'}
+        assert closed == ['organization']
+    
+    def test_validate_command_reads_json_lines(self):
+        """Test validate accepts the JSON Lines files written by generate"""
+        metadata = {
+            'organization': {'@context': 'https://schema.org', '@type': 'Organization', 'name': 'Test Store',
+                             'url': 'https://test-store.myshopify.com'},
+            'collections': [],
+            'shop_domain': 'test-store'
+        }
+        product = {
+            'product_id': 1, 'handle': 'mug', 'title': 'Mug',
+            'schemas': {'product': {
+                '@context': 'https://schema.org/', '@type': 'Product', 'name': 'Mug',
+                'description': 'A ceramic mug', 'image': ['https://example.com/mug.jpg'],
+                'offers': [{'@type': 'Offer', 'price': '9.99', 'priceCurrency': 'USD',
+                            'availability': 'https://schema.org/InStock'}]
+            }}
+        }
+        
+        runner = CliRunner()
+        with runner.isolated_filesystem():
+            with open('schemas.jsonl', 'w') as f:
+                f.write(json.dumps(metadata) + '\n' + json.dumps(product) + '\n\n')
+            
+            from cli.commands.validate import load_schema_bundle
+            schemas = load_schema_bundle('schemas.jsonl')
+            assert schemas['organization'] == metadata['organization']
+            assert list(schemas['products']) == [product]
+            
+            result = runner.invoke(validate, ['schemas.jsonl', '--format', 'json'])
+        
+        assert result.exit_code == 0, result.output
+        assert '"processed_schemas": 2' in result.output
+    
+    def test_save_validation_report_json(self, tmp_path):
+        """Test JSON validation reports round-trip, including non-JSON values"""
+        from datetime import datetime
+        from cli.commands.validate import save_validation_report
+        
+        results = {
+            'summary': {'total_valid': 1, 'total_invalid': 0, 'total_warnings': 0, 'total_errors': 0},
+            'products': [{'title': 'Café Mug', 'checked_at': datetime(2024, 1, 1)}]
+        }
+        report = tmp_path / 'report.json'
+        
+        save_validation_report(results, str(report), 'json')
+        
+        saved = json.loads(report.read_text(encoding='utf-8'))
+        assert saved['summary'] == results['summary']
+        assert saved['products'][0]['title'] == 'Café Mug'
+        assert saved['products'][0]['checked_at'].startswith('2024-01-01')
+    
+    def test_run_comprehensive_validation_summary_counts(self):
+        """Test summary totals, with warnings counted as errors in strict mode"""
+        from cli.commands.validate import run_comprehensive_validation, _get_validator
+        
+        schemas = {
+            'products': [{'title': 'Mug', 'schemas': {'product': {'@type': 'Product', 'name': 'Mug'}}}],
+            'collections': [{'@type': 'CollectionPage', 'name': 'Sale'}, {'title': 'Empty', 'schema': {}}]
+        }
+        product = _get_validator().validate_product_schema(schemas['products'][0]['schemas']['product'])
+        errors, warnings = len(product['errors']), len(product['warnings'])
+        
+        lax = run_comprehensive_validation(schemas, _get_validator(), 'all', False, False)['summary']
+        strict = run_comprehensive_validation(schemas, _get_validator(), 'all', False, True)['summary']
+        
+        assert lax == {'total_valid': 1, 'total_invalid': 2, 'total_warnings': warnings, 'total_errors': errors + 1}
+        assert strict == dict(lax, total_errors=errors + 1 + warnings)
+    
+    def test_run_comprehensive_validation_without_schema_data(self):
+        """Test product and collection results can leave out the validated schema"""
+        from cli.commands.validate import run_comprehensive_validation, _get_validator
+        
+        schemas = {
+            'organization': {'@type': 'Organization', 'name': 'Store'},
+            'products': [{'title': 'Mug', 'schemas': {'product': {'@type': 'Product', 'name': 'Mug'}}}],
+            'collections': [{'@type': 'CollectionPage', 'name': 'Sale'}]
+        }
+        
+        results = run_comprehensive_validation(schemas, _get_validator(), 'all', False, False, store_schema=False)
+        
+        assert 'schema_data' not in results['products'][0]['schemas']['product']
+        assert 'schema_data' not in results['collections'][0]
+        assert results['organization']['schema_data'] == schemas['organization']
+    
+    def test_display_validation_table_rows(self):
+        """Test the results table has one row per validated schema"""
+        from cli.commands.validate import display_validation_table
+        
+        valid = {'valid': True, 'errors': [], 'warnings': ['w']}
+        results = {
+            'organization': {'valid': False, 'errors': ['e'], 'warnings': [], 'schema_data': {'name': 'Store'}},
+            'products': [{'title': 'A very long product title indeed', 'schemas': {'product': valid, 'faq': valid}}],
+            'collections': [{'title': 'Sale', 'valid': True, 'errors': [], 'warnings': []}]
+        }
+        
+        with patch('cli.commands.validate.console') as mock_console:
+            display_validation_table(results)
+        
+        table = mock_console.print.call_args[0][0]
+        names = list(table.columns[1].cells)
+        assert table.row_count == 4
+        assert names == ['Store', 'A very long product ...', 'A very long product ...', 'Sale']
+        assert list(table.columns[2].cells) == ['❌ Invalid', '✅ Valid', '✅ Valid', '✅ Valid']
+    
+    def test_save_validation_report_text(self, tmp_path):
+        """Test the text report lists the summary and every schema's issues"""
+        from cli.commands.validate import save_validation_report
+        
+        results = {
+            'summary': {'total_valid': 1, 'total_invalid': 1, 'total_warnings': 1, 'total_errors': 1},
+            'organization': None,
+            'products': [{
+                'title': 'Mug',
+                'schemas': {
+                    'product': {'valid': True, 'errors': [], 'warnings': ['Recommended field missing: sku']},
+                    'faq': {'valid': False, 'errors': ['No FAQ questions found'], 'warnings': []}
+                }
+            }]
+        }
+        report = tmp_path / 'report.txt'
+        
+        save_validation_report(results, str(report), 'text')
+        
+        assert report.read_text(encoding='utf-8').endswith(
+            "  Total Warnings: 1\n\n"
+            "PRODUCT: Mug\n"
+            "  PRODUCT SCHEMA: VALID\n"
+            "    WARNING: Recommended field missing: sku\n"
+            "  FAQ SCHEMA: INVALID\n"
+            "    ERROR: No FAQ questions found\n"
+            "\n"
+        )
+    
+    def test_display_detailed_errors_lists_only_schemas_with_issues(self):
+        """Test detailed errors skip clean products and clean schemas"""
+        from cli.commands.validate import display_detailed_errors
+        
+        clean = {'valid': True, 'errors': [], 'warnings': []}
+        results = {
+            'organization': None,
+            'products': [
+                {'title': 'Clean', 'schemas': {'product': clean}},
+                {'title': 'Mug', 'schemas': {'product': clean, 'faq': {'valid': False, 'errors': ['No FAQ'], 'warnings': []}}}
+            ],
+            'collections': []
+        }
+        
+        with patch('cli.commands.validate.console') as mock_console:
+            display_detailed_errors(results)
+        
+        printed = '\n'.join(str(call.args[0]) for call in mock_console.print.call_args_list)
+        assert 'Clean' not in printed
+        assert 'Product: Mug' in printed
+        assert 'Faq Schema' in printed
+        assert 'Product Schema' not in printed
+        assert 'No FAQ' in printed
+    
+    def test_run_comprehensive_validation_organization_counts(self):
+        """Test organization warnings only count as errors in strict mode"""
+        from cli.commands.validate import run_comprehensive_validation, _get_validator
+        
+        schemas = {'organization': {'@type': 'Organization', 'name': 'Store', 'url': 'https://example.com'}}
+        
+        lax = run_comprehensive_validation(schemas, _get_validator(), 'organization', False, False)
+        strict = run_comprehensive_validation(schemas, _get_validator(), 'organization', False, True)
+        
+        warnings = len(lax['organization']['warnings'])
+        errors = len(lax['organization']['errors'])
+        assert warnings > 0
+        assert lax['summary']['total_errors'] == errors
+        assert strict['summary']['total_errors'] == errors + warnings
+        assert strict['summary']['total_warnings'] == lax['summary']['total_warnings'] == warnings
+    
+    def test_track_passes_through_without_terminal(self):
+        """Test progress is only wrapped around iterables on a terminal"""
+        from cli.commands.validate import _track
+        
+        items = [1, 2, 3]
+        with patch('cli.commands.validate.console') as mock_console:
+            mock_console.is_terminal = False
+            assert _track(items, "Validating...") is items
@@ -7,7 +7,7 @@ import pytest
 import tempfile
 import os
 import yaml
-from core.config import SchemaConfig
+from src.core.config import SchemaConfig
 
 class TestSchemaConfig:
     """Test SchemaConfig class"""
@@ -72,6 +72,20 @@ class TestSchemaConfig:
                        'ENABLE_AI_FEATURES', 'MAX_PRODUCTS']:
                 os.environ.pop(key, None)
     
+    def test_config_from_mapping(self):
+        """Test loading configuration from an explicit mapping"""
+        config = SchemaConfig.from_mapping({
+            'SHOPIFY_SHOP_DOMAIN': 'mapped-shop',
+            'SHOPIFY_ACCESS_TOKEN': 'mapped-token',
+            'MAX_PRODUCTS': '10'
+        })
+        
+        assert config.shop_domain == 'mapped-shop'
+        assert config.access_token == 'mapped-token'
+        assert config.openai_api_key is None
+        assert config.enable_ai_features is False
+        assert config.max_products == 10
+    
     def test_config_to_yaml_file(self):
         """Test saving configuration to YAML file"""
         config = SchemaConfig(
@@ -125,4 +139,19 @@ class TestSchemaConfig:
             assert config.max_products == 75
         
         finally:
-            os.unlink(temp_file)
\ No newline at end of file
+            os.unlink(temp_file)
+    
+    def test_config_json_round_trip_and_edits(self, tmp_path):
+        """Test JSON config files round-trip and edits are picked up despite caching"""
+        path = str(tmp_path / 'config.json')
+        SchemaConfig(shop_domain="json-shop", access_token="json-token", max_products=10).to_file(path)
+        
+        assert SchemaConfig.from_file(path).max_products == 10
+        
+        SchemaConfig(shop_domain="json-shop", access_token="json-token", max_products=20).to_file(path)
+        stat = os.stat(path)
+        os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1))
+        
+        config = SchemaConfig.from_file(path)
+        assert config.shop_domain == "json-shop"
+        assert config.max_products == 20
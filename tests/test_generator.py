@@ -4,6 +4,9 @@ Tests for schema generator
 """
 
 import pytest
+import io
+import json
+import threading
 from unittest.mock import Mock, patch
 from src.core.generator import SchemaGenerator
 
@@ -76,6 +79,25 @@ class TestSchemaGenerator:
             assert home_item['position'] == 1
             assert home_item['name'] == "Home"
     
+    def test_breadcrumb_uses_first_matching_shop_collection(self, sample_config, sample_product):
+        """Test the breadcrumb collection follows the shop's collection order"""
+        collections = [
+            {"id": 1, "title": "Sale", "handle": "sale"},
+            {"id": 2, "title": "Shoes", "handle": "shoes"}
+        ]
+        product = dict(sample_product, collections=[{"id": 2}, {"id": 3}, {"id": 1}])
+        
+        with patch('src.core.generator.ShopifyClient'):
+            generator = SchemaGenerator(sample_config)
+            items = generator.generate_breadcrumb_schema(product, collections)['itemListElement']
+            
+            assert [item['name'] for item in items] == ["Home", "Sale", sample_product['title']]
+            assert items[1]['item'].endswith("/collections/sale")
+            
+            # Products outside every collection get no collection crumb
+            product = dict(sample_product, collections=[{"id": 3}])
+            assert len(generator.generate_breadcrumb_schema(product, collections)['itemListElement']) == 2
+    
     def test_generate_offers_with_multiple_variants(self, sample_config, sample_shop_info):
         """Test offer generation with multiple variants"""
         variants = [
@@ -111,6 +133,23 @@ class TestSchemaGenerator:
             assert offers[1]['availability'] == "https://schema.org/OutOfStock"
             assert offers[1]['sku'] == "TEST-L"
     
+    def test_offer_shop_fields_computed_once_per_shop(self, sample_config, sample_shop_info):
+        """Test the validity date and seller are shared by offers for the same shop"""
+        variants = [{"price": "9.99", "inventory_quantity": 1}, {"price": "12.99", "inventory_quantity": 1}]
+        
+        with patch('src.core.generator.ShopifyClient'), \
+             patch('src.core.generator.generate_price_valid_until', return_value='2030-01-01') as mock_date:
+            generator = SchemaGenerator(sample_config)
+            offers = generator._generate_offers(variants, sample_shop_info)
+            offers += generator._generate_offers(variants, sample_shop_info)
+            
+            assert mock_date.call_count == 1
+            assert all(offer['priceValidUntil'] == '2030-01-01' for offer in offers)
+            assert offers[0]['seller'] == {"@type": "Organization", "name": sample_shop_info['name']}
+            
+            generator._generate_offers(variants, dict(sample_shop_info))
+            assert mock_date.call_count == 2
+    
     def test_categorize_product_basic(self, sample_config):
         """Test basic product categorization"""
         with patch('src.core.generator.ShopifyClient'):
@@ -176,4 +215,145 @@ class TestSchemaGenerator:
         assert 'breadcrumb' in product_package['schemas']
         
         if sample_config.include_faq:
-            assert 'faq' in product_package['schemas']
\ No newline at end of file
+            assert 'faq' in product_package['schemas']
+    
+    @patch('src.core.generator.ShopifyClient')
+    def test_write_schema_package_streams_valid_json(self, mock_client_class, sample_config,
+                                                    sample_shop_info, sample_product, sample_collection):
+        """Test streaming the schema package to a file"""
+        mock_client = Mock()
+        mock_client.get_shop_info.return_value = sample_shop_info
+        mock_client.get_products.return_value = iter([sample_product, sample_product])
+        mock_client.get_collections.return_value = [sample_collection]
+        mock_client_class.return_value = mock_client
+        
+        generator = SchemaGenerator(sample_config)
+        seen = []
+        output = io.BytesIO()
+        summary = generator.write_schema_package(output, on_product=lambda count, _: seen.append(count))
+        
+        written = json.loads(output.getvalue())
+        assert written['total_products'] == 2
+        assert len(written['products']) == 2
+        assert written['products'][0]['product_id'] == sample_product['id']
+        assert written['organization']['name'] == sample_shop_info['name']
+        assert len(written['collections']) == 1
+        
+        assert seen == [1, 2]
+        assert summary['total_products'] == 2
+        assert summary['sample_product']['title'] == sample_product['title']
+        assert 'products' not in summary
+    
+    @patch('src.core.generator.ShopifyClient')
+    def test_stream_schema_package_writes_json_lines(self, mock_client_class, sample_config,
+                                                     sample_shop_info, sample_product, sample_collection):
+        """Test the JSON Lines package holds metadata first, then one product per line"""
+        mock_client = Mock()
+        mock_client.get_shop_info.return_value = sample_shop_info
+        mock_client.get_products.return_value = iter([sample_product, sample_product])
+        mock_client.get_collections.return_value = [sample_collection]
+        mock_client_class.return_value = mock_client
+        
+        output = io.BytesIO()
+        manifest = SchemaGenerator(sample_config).stream_schema_package(output)
+        
+        lines = [json.loads(line) for line in output.getvalue().splitlines()]
+        
+        assert len(lines) == 3
+        assert lines[0]['organization']['name'] == sample_shop_info['name']
+        assert len(lines[0]['collections']) == 1
+        assert [line['product_id'] for line in lines[1:]] == [sample_product['id']] * 2
+        
+        assert manifest['total_products'] == 2
+        assert manifest['sample_product'] == lines[1]
+    
+    @patch('src.core.generator.ShopifyClient')
+    def test_bulk_export_only_for_whole_large_catalogs(self, mock_client_class, sample_config, sample_shop_info):
+        """Test a bulk export is used only when every product of a large catalog is generated"""
+        mock_client = mock_client_class.return_value
+        mock_client.get_products.return_value = iter([])
+        mock_client.bulk_export_products.return_value = iter([])
+        sample_config.max_products = 5000
+        generator = SchemaGenerator(sample_config)
+        
+        mock_client.get_product_count.return_value = 100000
+        list(generator.iter_product_schemas(sample_shop_info, []))
+        mock_client.bulk_export_products.assert_not_called()
+        mock_client.get_products.assert_called_once_with(5000)
+        
+        mock_client.get_product_count.return_value = 4000
+        list(generator.iter_product_schemas(sample_shop_info, []))
+        mock_client.bulk_export_products.assert_called_once_with(5000)
+    
+    @patch('src.core.generator.ShopifyClient')
+    def test_ai_products_generated_concurrently_in_order(self, mock_client_class, sample_config_with_ai,
+                                                         sample_shop_info, sample_product):
+        """Test products waiting on AI calls overlap but keep catalog order"""
+        products = [dict(sample_product, id=i, title=f"Product {i}") for i in range(10)]
+        mock_client = Mock()
+        mock_client.get_products.return_value = iter(products)
+        mock_client_class.return_value = mock_client
+        
+        barrier = threading.Barrier(2, timeout=5)
+        
+        def generate_faq_schema(product):
+            # The first two products only finish if they run at the same time
+            if product['id'] < 2:
+                barrier.wait()
+            return {}
+        
+        mock_ai_enhancer = Mock()
+        mock_ai_enhancer.enhance_products_batch.side_effect = lambda batch: [p['title'] for p in batch]
+        mock_ai_enhancer.categorize_products_batch.side_effect = lambda batch: ['Other'] * len(batch)
+        mock_ai_enhancer.generate_faq_schema.side_effect = generate_faq_schema
+        
+        generator = SchemaGenerator(sample_config_with_ai, ai_enhancer=mock_ai_enhancer, max_workers=4)
+        packages = list(generator.iter_product_schemas(sample_shop_info, []))
+        
+        assert [package['product_id'] for package in packages] == list(range(10))
+    
+    @patch('src.core.generator.ShopifyClient')
+    def test_ai_results_requested_per_batch(self, mock_client_class, sample_config_with_ai,
+                                            sample_shop_info, sample_product):
+        """Test AI descriptions and categories are requested a batch of products at a time"""
+        products = [dict(sample_product, id=i, title=f"Product {i}") for i in range(25)]
+        mock_client = Mock()
+        mock_client.get_products.return_value = iter(products)
+        mock_client_class.return_value = mock_client
+        
+        mock_ai_enhancer = Mock()
+        mock_ai_enhancer.enhance_products_batch.side_effect = lambda batch: [f"About {p['title']}" for p in batch]
+        mock_ai_enhancer.categorize_products_batch.side_effect = lambda batch: ['Electronics'] * len(batch)
+        mock_ai_enhancer.generate_faq_schema.return_value = {}
+        
+        generator = SchemaGenerator(sample_config_with_ai, ai_enhancer=mock_ai_enhancer, max_workers=1)
+        packages = list(generator.iter_product_schemas(sample_shop_info, []))
+        
+        batch_sizes = [len(call.args[0]) for call in mock_ai_enhancer.enhance_products_batch.call_args_list]
+        assert batch_sizes == [20, 5]
+        assert mock_ai_enhancer.categorize_products_batch.call_count == 2
+        assert [package['schemas']['product']['description'] for package in packages] == [
+            f"About Product {i}" for i in range(25)
+        ]
+        assert {package['schemas']['product']['category'] for package in packages} == {'Electronics'}
+        mock_ai_enhancer.enhance_description.assert_not_called()
+        mock_ai_enhancer.categorize_product.assert_not_called()
+        assert generator._ai_prefetched == {}
+    
+    @patch('src.core.generator.ShopifyClient')
+    def test_products_generated_in_processes_in_order(self, mock_client_class, sample_config,
+                                                      sample_shop_info, sample_product, sample_collection):
+        """Test process pool generation matches serial generation, batch boundaries included"""
+        products = [dict(sample_product, id=i, title=f"Product {i}") for i in range(40)]
+        mock_client = Mock()
+        mock_client_class.return_value = mock_client
+        
+        mock_client.get_products.return_value = iter(products)
+        serial = list(SchemaGenerator(sample_config).iter_product_schemas(sample_shop_info, [sample_collection]))
+        
+        mock_client.get_products.return_value = iter(products)
+        generator = SchemaGenerator(sample_config, processes=2)
+        packages = list(generator.iter_product_schemas(sample_shop_info, [sample_collection]))
+        
+        assert [package['product_id'] for package in packages] == list(range(40))
+        assert packages == serial
@@ -8,6 +8,7 @@ import requests
 import json
 from unittest.mock import Mock, patch
 from src.core.shopify_client import ShopifyClient, ShopifyAPIError
+from src.utils.constants import SHOPIFY_PRODUCT_FIELDS
 
 class TestShopifyClient:
     """Test ShopifyClient class"""
@@ -71,10 +72,35 @@ class TestShopifyClient:
             result = client._make_request('GET', '/shop.json')
         
         assert result == {'shop': {'name': 'Test Shop'}}
-        # Should be called twice: once for 429 retry, once for approaching rate limit
-        assert mock_sleep.call_count == 2
-        assert mock_sleep.call_args_list == [((1,),), ((2,),)]
+        # Only the 429 retry waits; a nearly full bucket paces later requests instead
+        assert mock_sleep.call_args_list == [((1,),)]
         assert mock_session_instance.request.call_count == 2
+        assert client.rate_limit_remaining <= 1
+    
+    @patch('src.core.shopify_client.requests.Session')
+    def test_requests_paced_to_leak_rate(self, mock_session, sample_config):
+        """Test requests burst up to the bucket size, then wait for it to leak"""
+        response = Mock()
+        response.status_code = 200
+        response.headers = {'content-type': 'application/json'}
+        response.json.return_value = {'shop': {}}
+        mock_session.return_value.request.return_value = response
+        
+        with patch('src.core.shopify_client.time') as mock_time:
+            mock_time.monotonic.return_value = 100.0
+            client = ShopifyClient(sample_config)
+            for _ in range(40):
+                client.get_shop_info()
+            assert not mock_time.sleep.called
+            
+            client.get_shop_info()
+            mock_time.sleep.assert_called_once_with(0.5)
+            
+            # A second after that wait, two more requests fit without waiting
+            mock_time.monotonic.return_value = 101.5
+            client.get_shop_info()
+            client.get_shop_info()
+            assert mock_time.sleep.call_count == 1
     
     @patch('src.core.shopify_client.requests.Session')
     def test_non_json_response_error(self, mock_session, sample_config):
@@ -138,15 +164,6 @@ class TestShopifyClient:
         mock_session_instance = Mock()
         mock_session_instance.request.side_effect = [first_response, second_response]
         
-        # Mock the head method for pagination - first call returns next link, second call returns no link
-        first_head_response = Mock()
-        first_head_response.headers = {'Link': '</admin/api/2023-10/products.json?page_info=next123>; rel="next"'}
-        
-        second_head_response = Mock()
-        second_head_response.headers = {'Link': ''}  # No next page
-        
-        mock_session_instance.head.side_effect = [first_head_response, second_head_response]
-        
         mock_session.return_value = mock_session_instance
         
         client = ShopifyClient(sample_config)
@@ -156,6 +173,16 @@ class TestShopifyClient:
         assert products[0] == sample_product
         assert products[1] == sample_product
         assert mock_session_instance.request.call_count == 2
+        
+        # Only the fields the generator reads are requested
+        first_params = mock_session_instance.request.call_args_list[0][1]['params']
+        assert first_params['fields'] == ','.join(SHOPIFY_PRODUCT_FIELDS)
+        assert 'body_html' in first_params['fields']
+        
+        # The next page link is read from each GET response, without extra requests
+        assert not mock_session_instance.head.called
+        second_url = mock_session_instance.request.call_args_list[1][0][1]
+        assert second_url == f"{sample_config.base_url}/products.json?page_info=next123"
     
     def test_parse_next_link(self, sample_config):
         """Test parsing of pagination links"""
@@ -165,6 +192,14 @@ class TestShopifyClient:
         link_header = '</admin/api/2023-10/products.json?page_info=abc123>; rel="next"'
         next_link = client._parse_next_link(link_header)
         assert 'page_info=abc123' in next_link
+        assert next_link == '/products.json?page_info=abc123'
+        
+        # Test with previous and next links, as on middle pages
+        link_header = (
+            '<https://test-store.myshopify.com/admin/api/2023-10/products.json?page_info=prev1>; rel="previous", '
+            '<https://test-store.myshopify.com/admin/api/2023-10/products.json?limit=250&page_info=next2>; rel="next"'
+        )
+        assert client._parse_next_link(link_header) == '/products.json?limit=250&page_info=next2'
         
         # Test with no next link
         link_header = '</admin/api/2023-10/products.json?page_info=abc123>; rel="prev"'
@@ -173,4 +208,100 @@ class TestShopifyClient:
         
         # Test with empty header
         next_link = client._parse_next_link('')
-        assert next_link is None
\ No newline at end of file
+        assert next_link is None
+    
+    def test_client_with_shared_session(self, sample_config):
+        """Test a shared session gets credentials per request, not on the session"""
+        shared_session = Mock()
+        shared_session.headers = {}
+        
+        mock_response = Mock()
+        mock_response.status_code = 200
+        mock_response.headers = {'content-type': 'application/json'}
+        mock_response.json.return_value = {'shop': {'name': 'Test Shop'}}
+        shared_session.request.return_value = mock_response
+        
+        client = ShopifyClient(sample_config, session=shared_session)
+        client.get_shop_info()
+        
+        assert client.session is shared_session
+        assert shared_session.headers == {}
+        _, kwargs = shared_session.request.call_args
+        assert kwargs['headers']['X-Shopify-Access-Token'] == sample_config.access_token
+    
+    @patch('src.core.shopify_client.requests.get')
+    @patch('src.core.shopify_client.requests.Session')
+    def test_bulk_export_products(self, mock_session, mock_get, sample_config):
+        """Test a bulk export is polled, downloaded and reassembled into REST products"""
+        def graphql_response(data):
+            response = Mock()
+            response.status_code = 200
+            response.headers = {'content-type': 'application/json'}
+            response.json.return_value = {'data': data}
+            return response
+        
+        mock_session_instance = Mock()
+        mock_session_instance.request.side_effect = [
+            graphql_response({'bulkOperationRunQuery': {
+                'bulkOperation': {'id': 'gid://shopify/BulkOperation/1', 'status': 'CREATED'},
+                'userErrors': []
+            }}),
+            graphql_response({'currentBulkOperation': {
+                'id': 'gid://shopify/BulkOperation/1', 'status': 'COMPLETED',
+                'url': 'https://storage.example.com/export.jsonl'
+            }})
+        ]
+        mock_session.return_value = mock_session_instance
+        
+        lines = [
+            {'id': 'gid://shopify/Product/1', 'handle': 'shoe', 'title': 'Shoe', 'productType': 'Shoes', 'tags': []},
+            {'url': 'https://cdn.example.com/shoe.jpg', '__parentId': 'gid://shopify/Product/1'},
+            {'id': 'gid://shopify/ProductVariant/11', 'title': 'Default', 'price': '49.99',
+             'inventoryQuantity': 3, 'weightUnit': 'KILOGRAMS', '__parentId': 'gid://shopify/Product/1'},
+            {'id': 'gid://shopify/Product/2', 'handle': 'sock', 'title': 'Sock', 'tags': ['wool']}
+        ]
+        download = mock_get.return_value.__enter__.return_value
+        download.iter_lines.return_value = [json.dumps(line).encode() for line in lines]
+        
+        client = ShopifyClient(sample_config)
+        with patch('time.sleep'):
+            products = list(client.bulk_export_products())
+        
+        assert [p['id'] for p in products] == [1, 2]
+        assert products[0]['images'] == [{'src': 'https://cdn.example.com/shoe.jpg'}]
+        assert products[0]['variants'][0]['price'] == '49.99'
+        assert products[0]['variants'][0]['weight_unit'] == 'kg'
+        assert products[1]['variants'] == []
+        
+        # The signed download URL is fetched without the shop's credentials
+        assert mock_get.call_args[0][0] == 'https://storage.example.com/export.jsonl'
+        assert 'headers' not in mock_get.call_args[1]
+    
+    @patch('src.core.shopify_client.requests.Session')
+    def test_graphql_throttled_by_query_cost(self, mock_session, sample_config):
+        """Test GraphQL queries leave the REST bucket alone and wait out THROTTLED errors"""
+        def graphql_response(body):
+            response = Mock()
+            response.status_code = 200
+            response.headers = {'content-type': 'application/json'}
+            response.json.return_value = body
+            return response
+        
+        throttle_status = {'maximumAvailable': 1000.0, 'currentlyAvailable': 0, 'restoreRate': 50.0}
+        mock_session.return_value.request.side_effect = [
+            graphql_response({
+                'errors': [{'message': 'Throttled', 'extensions': {'code': 'THROTTLED'}}],
+                'extensions': {'cost': {'throttleStatus': throttle_status}}
+            }),
+            graphql_response({'data': {'shop': {'name': 'Test'}}})
+        ]
+        
+        with patch('src.core.shopify_client.time') as mock_time:
+            mock_time.monotonic.return_value = 100.0
+            client = ShopifyClient(sample_config)
+            
+            assert client._graphql('{ shop { name } }') == {'shop': {'name': 'Test'}}
+        
+        # The retry waits for its 10 points at 50 points per second
+        mock_time.sleep.assert_called_once_with(0.2)
+        assert client.rate_limit_remaining == 40
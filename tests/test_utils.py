@@ -4,10 +4,14 @@ Tests for utility functions
 """
 
 import pytest
-from utils.helpers import (
+from src.utils.helpers import (
     clean_html, generate_price_valid_until, extract_numeric_value,
-    normalize_currency, truncate_text, format_price
+    normalize_currency, truncate_text, format_price, dump_json_bytes, load_json_bytes, write_json,
+    match_category
 )
+import io
+import json
+from unittest.mock import patch
 
 class TestUtilityFunctions:
     """Test utility functions"""
@@ -44,6 +48,33 @@ class TestUtilityFunctions:
         assert 'Product Features' in result
         assert 'Feature 1' in result
     
+    def test_clean_html_parses_each_body_once(self):
+        """Test repeated cleaning of the same HTML is served from the cache"""
+        html_input = "<p>Cached <em>once</em></p>"
+        clean_html(html_input)
+        hits = clean_html.cache_info().hits
+        
+        assert clean_html(html_input) == "Cached once"
+        assert clean_html.cache_info().hits == hits + 1
+    
+    def test_clean_html_lxml_matches_html_parser(self):
+        """Test the lxml fast path extracts the same text as BeautifulSoup"""
+        pytest.importorskip('lxml.html')
+        
+        html_input = "<div><h2>Features</h2><script>alert(1)</script>Fits <ul><li>A &amp; B</li></ul><style>p{}</style></div>"
+        
+        fast = clean_html.__wrapped__(html_input)
+        with patch('src.utils.helpers.lxml', None):
+            assert clean_html.__wrapped__(html_input) == fast == "FeaturesFits A & B"
+    
+    def test_match_category_prefers_earlier_mapping_keys(self):
+        """Test matching across texts picks the key listed first in CATEGORY_MAPPING"""
+        assert match_category("Leather Bags") == 'Apparel & Accessories'
+        assert match_category("gadget", "Consumer Electronics") == 'Electronics'
+        assert match_category("electronics", "clothing") == match_category("electronics clothing")
+        assert match_category("mystery box", "") is None
+        assert match_category() is None
+    
     def test_generate_price_valid_until(self):
         """Test price valid until date generation"""
         from datetime import datetime, timedelta
@@ -90,4 +121,36 @@ class TestUtilityFunctions:
         assert format_price("29.99") == "29.99"
         assert format_price("$29.99") == "29.99"
         assert format_price("29") == "29.00"
-        assert format_price("invalid") == "invalid"
\ No newline at end of file
+        assert format_price("invalid") == "invalid"
+    
+    def test_dump_json_bytes(self):
+        """Test JSON serialization helper"""
+        data = {'name': 'Café', 'offers': [{'price': '29.99'}]}
+        
+        result = dump_json_bytes(data)
+        assert isinstance(result, bytes)
+        assert json.loads(result) == data
+        assert 'Café'.encode('utf-8') in result
+        
+        compact = dump_json_bytes(data, indent=False)
+        assert b'\n' not in compact
+        assert json.loads(compact) == data
+    
+    def test_load_json_bytes(self):
+        """Test JSON parsing helper with and without orjson"""
+        payload = '{"name": "Café", "tags": ["a"]}'.encode('utf-8')
+        
+        assert load_json_bytes(payload) == {'name': 'Café', 'tags': ['a']}
+        with patch('src.utils.helpers.orjson', None):
+            assert load_json_bytes(payload) == {'name': 'Café', 'tags': ['a']}
+    
+    def test_write_json_without_orjson(self):
+        """Test streamed JSON writing with the stdlib fallback"""
+        data = {'name': 'Café', 'tags': ['a', 'b']}
+        
+        output = io.BytesIO()
+        with patch('src.utils.helpers.orjson', None):
+            write_json(output, data)
+        
+        assert json.loads(output.getvalue()) == data
+        assert 'Café'.encode('utf-8') in output.getvalue()
\ No newline at end of file
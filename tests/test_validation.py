@@ -60,6 +60,25 @@ class TestSchemaValidator:
         assert any('name' in error for error in result['errors'])
         assert any('offers' in error for error in result['errors'])
     
+    def test_validate_product_schema_invalid_offers(self):
+        """Test offer problems are reported on the product result"""
+        validator = SchemaValidator()
+        
+        product_schema = {
+            "@type": "Product",
+            "name": "Test Product",
+            "offers": [
+                {"@type": "Offer", "price": "10.00", "priceCurrency": "USD", "availability": "InStock"},
+                "not an offer"
+            ]
+        }
+        
+        result = validator.validate_product_schema(product_schema)
+        
+        assert result['valid'] is False
+        assert "Offer 1 availability should use schema.org URL" in result['errors']
+        assert "Offer 2 must be an object" in result['errors']
+    
     def test_validate_organization_schema_valid(self):
         """Test validation of valid organization schema"""
         validator = SchemaValidator()
@@ -131,7 +150,7 @@ class TestSchemaValidator:
         assert result['schema_type'] == 'FAQPage'
         assert len(result['errors']) == 0
     
-    @patch('validation.schema_validator.requests.Session.get')
+    @patch('src.validation.schema_validator.requests.Session.get')
     def test_analyze_existing_structured_data(self, mock_get):
         """Test analysis of existing structured data"""
         validator = SchemaValidator()
@@ -180,4 +199,40 @@ class TestSchemaValidator:
         
         assert result['eligible_for_rich_results'] is False
         assert len(result['errors']) > 0
-        assert any('offers' in error for error in result['errors'])
\ No newline at end of file
+        assert any('offers' in error for error in result['errors'])
+    
+    def test_validate_against_google_requirements_cached(self):
+        """Test products sharing a template reuse the cached Google result"""
+        validator = SchemaValidator()
+        
+        first = validator.validate_against_google_requirements({"@type": "Product", "name": "Mug"})
+        first['schema_name'] = 'Mug'
+        first['errors'].append('annotated by caller')
+        second = validator.validate_against_google_requirements({"@type": "Product", "name": "Cup"})
+        with_image = validator.validate_against_google_requirements(
+            {"@type": "Product", "name": "Cup", "image": "https://example.com/cup.jpg"}
+        )
+        
+        assert 'schema_name' not in second
+        assert 'annotated by caller' not in second['errors']
+        assert len(validator._google_cache) == 2
+        assert any('Ensure images' in warning for warning in with_image['warnings'])
+        assert not any('Ensure images' in warning for warning in second['warnings'])
+    
+    def test_validate_against_google_requirements_bulk(self):
+        """Test bulk Google Rich Results validation"""
+        validator = SchemaValidator()
+        
+        schemas = [
+            {"@type": "Product", "name": "Complete", "offers": {"@type": "Offer"}},
+            {"@type": "Product", "name": "Missing offers"},
+            {"@type": "Organization", "name": "Store"}
+        ]
+        
+        results = validator.validate_against_google_requirements_bulk(schemas)
+        
+        assert len(results) == 3
+        assert results[0]['eligible_for_rich_results'] is True
+        assert results[1]['eligible_for_rich_results'] is False
+        assert results[2]['errors'] == []
+        assert results == [validator.validate_against_google_requirements(s) for s in schemas]
\ No newline at end of file
@@ -14,17 +14,17 @@ import tempfile
 from datetime import datetime
 import traceback
 
-# Add project root and src to path for imports
+# Add project root to path so the src package imports without an install
 project_root = Path(__file__).parent.parent
 sys.path.insert(0, str(project_root))
-sys.path.insert(0, str(project_root / 'src'))
 
 try:
-    from core.config import SchemaConfig
-    from core.generator import SchemaGenerator
-    from ai.enhancer import AIEnhancer
-    from validation.schema_validator import SchemaValidator
-    from utils.exceptions import SchemaGeneratorError, ValidationError
+    from src.core.config import SchemaConfig
+    from src.core.generator import SchemaGenerator
+    from src.ai.enhancer import AIEnhancer
+    from src.validation.schema_validator import SchemaValidator
+    from src.utils.exceptions import SchemaGeneratorError, ValidationError
+    from src.utils.helpers import load_json_bytes
 except ImportError as e:
     print(f"Import error: {e}")
     print("Please ensure you're running from the project root directory")
@@ -96,7 +96,10 @@ def generate_schemas():
         )
         
         # Initialize components
-        ai_enhancer = AIEnhancer(openai_key) if config.enable_ai_features and openai_key else None
+        ai_enhancer = (
+            AIEnhancer(openai_key, small_model=config.openai_small_model)
+            if config.enable_ai_features and openai_key else None
+        )
         generator = SchemaGenerator(config, ai_enhancer)
         
         # Test connection
@@ -104,9 +107,6 @@ def generate_schemas():
         if not shop_info.get('name'):
             return jsonify({'error': 'Unable to connect to Shopify API'}), 400
         
-        # Generate schemas
-        schemas = generator.generate_complete_schema_package()
-        
         # Save to temporary file
         timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
         filename = f"schemas_{shop_domain}_{timestamp}.json"
@@ -115,9 +115,16 @@ def generate_schemas():
         # Ensure upload directory exists
         os.makedirs(app.config['UPLOAD_FOLDER'], exist_ok=True)
         
-        # Save the file
-        with open(filepath, 'w', encoding='utf-8') as f:
-            json.dump(schemas, f, indent=2, ensure_ascii=False)
+        # Generate schemas, streaming each product package to a temp file that only
+        # takes the download name once generation succeeds
+        fd, tmp_path = tempfile.mkstemp(dir=app.config['UPLOAD_FOLDER'], prefix=f".{filename}.", suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                schemas = generator.write_schema_package(f, shop_info=shop_info)
+            os.replace(tmp_path, filepath)
+        except BaseException:
+            os.unlink(tmp_path)
+            raise
         
         # Verify file was created
         if not os.path.exists(filepath):
@@ -131,7 +138,7 @@ def generate_schemas():
             'filename': filename,
             'filepath': filepath,
             'stats': {
-                'total_schemas': len(schemas.get('products', [])),
+                'total_schemas': schemas['total_products'],
                 'shop_name': shop_info['name'],
                 'generated_at': datetime.now().isoformat()
             }
@@ -197,7 +204,7 @@ def validate_schemas():
         
         # Read and parse JSON
         try:
-            schemas = json.load(file)
+            schemas = load_json_bytes(file.read())
         except json.JSONDecodeError as e:
             return jsonify({'error': f'Invalid JSON file: {str(e)}'}), 400
         